@@ -0,0 +1,256 @@
+"""
+Batch Monte Carlo simulator of 2 player games with the rules of samplegame, vectorized with NumPy.
+
+    python -m analytics.montecarlo [--games N] [--strategies stand:17 stand:15] [--order alternate] [--seed S]
+
+The rules are taken from samplegame.core :
+  - Hands start empty. Each player draws from their own deck of 52 cards, up to 5 cards.
+  - One ace counts 11 unless the hand exceeds 21 with it.
+  - The game ends as soon as a hand exceeds 21, and that hand loses. So at most one hand exceeds 21.
+  - Otherwise the better value wins, and equal values split the pot. (Draw)
+
+Which hand exceeds 21 first depends on the order of play, which is not fixed on chain.
+'alternate' : players draw in turns, player 1 first. 'sequential' : player 1 plays out the hand before player 2.
+
+NumPy is an optional dependency of this tool, not of the SCOREs.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from samplegame.core.core import BLACKJACK, DECK_SIZE, MAX_CARDS, Deck, Hand, card_is_ace, card_values, hand_values, winners
+
+ORDERS = ('alternate', 'sequential')
+DEFAULT_BATCH_SIZE = 1_000_000
+
+# Lookup tables of samplegame.core as arrays
+_CARD_VALUES = np.array(card_values, dtype=np.int8)
+_CARD_IS_ACE = np.array(card_is_ace, dtype=bool)
+_HAND_VALUES = np.array(hand_values, dtype=np.int8)
+
+
+def stand_on(threshold: int):
+    """
+    :return: The strategy hitting until the value of hand reaches 'threshold', as 'hitUntil' of samplegame
+    """
+    def strategy(values: np.ndarray, cards: np.ndarray, soft: np.ndarray) -> np.ndarray:
+        return values < threshold
+
+    strategy.__name__ = f'stand:{threshold}'
+    return strategy
+
+
+def hit_soft(threshold: int):
+    """
+    :return: The strategy hitting until 'threshold', and also hitting the soft hand (an ace counting 11) of 'threshold'
+    """
+    def strategy(values: np.ndarray, cards: np.ndarray, soft: np.ndarray) -> np.ndarray:
+        return (values < threshold) | (soft & (values == threshold))
+
+    strategy.__name__ = f'soft:{threshold}'
+    return strategy
+
+
+# name -> factory with an int param, for the command line. e.g. 'stand:17'
+STRATEGIES = {
+    'stand': stand_on,
+    'soft': hit_soft
+}
+
+
+def parse_strategy(name: str):
+    kind, _, param = name.partition(':')
+    if kind not in STRATEGIES or not param.isdigit():
+        raise ValueError(f"Unknown strategy : {name}. Use one of {', '.join(f'{kind}:N' for kind in STRATEGIES)}")
+    return STRATEGIES[kind](int(param))
+
+
+def deal_indexes(rng: np.random.Generator, games: int) -> np.ndarray:
+    """
+    :return: (games, 5) The random index of each draw among the remaining cards, as 'Deck.deal' picks with the hash
+    """
+    return np.stack([rng.integers(0, DECK_SIZE - cursor, size=games, dtype=np.int8) for cursor in range(MAX_CARDS)], axis=1)
+
+
+def cards_of(indexes: np.ndarray) -> np.ndarray:
+    """
+    :param indexes: (games, 5) The random indexes of 'deal_indexes'
+    :return: (games, 5) The card indexes dealt, skipping the dealt cards in the order of card index as 'Deck.deal'
+    """
+    cards = np.empty_like(indexes)
+    for cursor in range(indexes.shape[1]):
+        card = indexes[:, cursor].copy()
+        # Dealt cards in ascending order : each of them not above the card pushes it to the next remaining card
+        for dealt in np.sort(cards[:, :cursor], axis=1).T:
+            card += dealt <= card
+        cards[:, cursor] = card
+    return cards
+
+
+def values_after(cards: np.ndarray) -> tuple:
+    """
+    :return: (games, 6) The value of hand with the first 0 ~ 5 cards, and whether an ace counts 11 in it
+    """
+    games = cards.shape[0]
+    hard = np.zeros((games, MAX_CARDS + 1), dtype=np.int8)
+    has_ace = np.zeros((games, MAX_CARDS + 1), dtype=bool)
+    hard[:, 1:] = np.cumsum(_CARD_VALUES[cards], axis=1)
+    has_ace[:, 1:] = np.logical_or.accumulate(_CARD_IS_ACE[cards], axis=1)
+    values = _HAND_VALUES[hard, has_ace.astype(np.int8)]
+    return values, values != hard
+
+
+def play(values: np.ndarray, soft: np.ndarray, strategy) -> np.ndarray:
+    """
+    :return: (games,) The number of cards drawn by the strategy, when the player is not stopped by the other
+    """
+    games = values.shape[0]
+    drawn = np.zeros(games, dtype=np.int8)
+    rows = np.arange(games)
+    for cursor in range(MAX_CARDS):
+        value = values[rows, drawn]
+        hit = (drawn == cursor) & (value <= BLACKJACK) & np.asarray(strategy(value, drawn, soft[rows, drawn]), dtype=bool)
+        drawn += hit
+    return drawn
+
+
+def simulate_batch(rng: np.random.Generator, games: int, strategies: tuple, order: str = 'alternate') -> dict:
+    """
+    Simulates a batch of games. The arrays of result are per game.
+
+    :return: 'cards' : (2, games, 5) cards of the decks, 'drawn' : (2, games) the number of cards in the final hands,
+             'values' : (2, games) the final values, 'outcome' : (games,) 1 if player 1 wins, -1 if player 2 wins, 0 for a draw
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Unknown order : {order}")
+
+    cards = np.stack([cards_of(deal_indexes(rng, games)) for _ in strategies])
+    values, soft = zip(*(values_after(player_cards) for player_cards in cards))
+    drawn = np.stack([play(player_values, player_soft, strategy) for player_values, player_soft, strategy in zip(values, soft, strategies)])
+
+    rows = np.arange(games)
+    bust = np.stack([values[player][rows, drawn[player]] > BLACKJACK for player in range(2)])
+
+    # The game ends at the first hand exceeding 21, and the other hand keeps the cards drawn until then
+    if order == 'alternate':
+        player1_first = bust[0] & (~bust[1] | (drawn[0] <= drawn[1]))
+        stop_player2 = np.minimum(drawn[1], drawn[0] - 1)
+        stop_player1 = drawn[1]
+    else:
+        player1_first = bust[0]
+        stop_player2 = np.zeros_like(drawn[1])
+        stop_player1 = drawn[0]
+    player2_first = bust[1] & ~player1_first
+    drawn[1] = np.where(player1_first, stop_player2, drawn[1])
+    drawn[0] = np.where(player2_first, np.minimum(drawn[0], stop_player1), drawn[0])
+
+    final_values = np.stack([values[player][rows, drawn[player]] for player in range(2)])
+    outcome = np.sign(final_values[0].astype(np.int16) - final_values[1])
+    outcome[player1_first] = -1
+    outcome[player2_first] = 1
+    return {
+        'cards': cards,
+        'drawn': drawn,
+        'values': final_values,
+        'outcome': outcome.astype(np.int8)
+    }
+
+
+def simulate(games: int, strategies: tuple, order: str = 'alternate', seed: int = None, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    :param games: The number of games to simulate
+    :param strategies: The strategies of player 1 & 2 : (values, cards, soft) -> bool array, True to hit
+    :return: The distributions from the view of player 1. EV is in the unit of prize per game
+    """
+    rng = np.random.default_rng(seed)
+    outcomes = np.zeros(3, dtype=np.int64)
+    busts = np.zeros(2, dtype=np.int64)
+    value_counts = np.zeros((2, 10 * MAX_CARDS + 1), dtype=np.int64)
+
+    start_time = time.perf_counter()
+    remaining = games
+    while remaining > 0:
+        batch = simulate_batch(rng, min(batch_size, remaining), strategies, order)
+        outcomes += np.bincount(batch['outcome'] + 1, minlength=3)
+        busts += (batch['values'] > BLACKJACK).sum(axis=1)
+        for player in range(2):
+            value_counts[player] += np.bincount(batch['values'][player], minlength=value_counts.shape[1])
+        remaining -= len(batch['outcome'])
+    elapsed = time.perf_counter() - start_time
+
+    loss, draw, win = (outcomes / games).tolist()
+    return {
+        'games': games,
+        'strategies': [getattr(strategy, '__name__', str(strategy)) for strategy in strategies],
+        'order': order,
+        'win': win,
+        'draw': draw,
+        'loss': loss,
+        'bust': (busts / games).tolist(),
+        'ev': win - loss,
+        'values': [{value: count / games for value, count in enumerate(counts) if count} for counts in value_counts.tolist()],
+        'games_per_second': games / elapsed if elapsed > 0 else None
+    }
+
+
+def cross_check(batch: dict, games: int = 1000) -> int:
+    """
+    Replays the first games of the batch with the scalar Deck & Hand of samplegame.core, and compares the values & winners.
+
+    :return: The number of games checked
+    :raise AssertionError: If the vectorized result is different from the scalar one
+    """
+    games = min(games, len(batch['outcome']))
+    for game in range(games):
+        final_values = []
+        for player in range(2):
+            cards = batch['cards'][player, game].tolist()
+            # The hash function of the deck returns the card index itself, which has been picked among the remaining cards
+            remaining = list(range(DECK_SIZE))
+            indexes = []
+            for card in cards:
+                indexes.append(remaining.index(card))
+                remaining.remove(card)
+            deck = Deck(bytes(32), hash_function=lambda data, indexes=iter(indexes): next(indexes).to_bytes(1, 'big'))
+            if [deck.deal(0, '') for _ in cards] != cards:
+                raise AssertionError(f"Game {game} : cards of player {player + 1} differ from Deck.deal")
+
+            hand = Hand()
+            for card in cards[:batch['drawn'][player, game]]:
+                hand.add_card(card)
+            if hand.value != batch['values'][player, game]:
+                raise AssertionError(f"Game {game} : value of player {player + 1} is {batch['values'][player, game]}, Hand says {hand.value}")
+            final_values.append(hand.value)
+
+        outcome = {(0,): 1, (1,): -1, (0, 1): 0}.get(tuple(winners(final_values)))
+        if outcome != batch['outcome'][game]:
+            raise AssertionError(f"Game {game} : outcome is {batch['outcome'][game]}, winners says {outcome}")
+    return games
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(prog='python -m analytics.montecarlo', description="Monte Carlo simulation of samplegame BLACKJACK")
+    parser.add_argument('--games', type=int, default=1_000_000)
+    parser.add_argument('--strategies', nargs=2, default=['stand:17', 'stand:17'], metavar='STRATEGY',
+                        help=f"strategies of player 1 & 2 : {', '.join(f'{kind}:N' for kind in STRATEGIES)}")
+    parser.add_argument('--order', choices=ORDERS, default='alternate')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--cross-check', type=int, default=1000, help="the number of games to replay with the scalar Hand")
+    args = parser.parse_args(argv)
+
+    try:
+        strategies = tuple(parse_strategy(name) for name in args.strategies)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.cross_check > 0:
+        cross_check(simulate_batch(np.random.default_rng(args.seed), args.cross_check, strategies, args.order), args.cross_check)
+    report = simulate(args.games, strategies, args.order, args.seed, args.batch_size)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+from unittest import TestCase, skipIf
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    from ..montecarlo import ORDERS, cards_of, cross_check, deal_indexes, hit_soft, parse_strategy, simulate, simulate_batch, stand_on
+
+
+@skipIf(np is None, "NumPy is not installed")
+class TestMonteCarlo(TestCase):
+
+    def test_cards_of(self):
+        cards = cards_of(deal_indexes(np.random.default_rng(0), 10000))
+        self.assertTrue(((0 <= cards) & (cards < 52)).all())
+        # The cards of a deck are all different
+        self.assertTrue((np.diff(np.sort(cards, axis=1), axis=1) > 0).all())
+
+    def test_cross_check(self):
+        for order in ORDERS:
+            for strategies in ((stand_on(17), stand_on(17)), (hit_soft(17), stand_on(12)), (stand_on(22), stand_on(0))):
+                with self.subTest(order=order, strategies=[strategy.__name__ for strategy in strategies]):
+                    batch = simulate_batch(np.random.default_rng(1), 3000, strategies, order)
+                    self.assertEqual(3000, cross_check(batch, 3000))
+
+    def test_game_ends_at_first_bust(self):
+        batch = simulate_batch(np.random.default_rng(2), 10000, (stand_on(22), stand_on(22)), 'sequential')
+        # Player 1 always hits up to 5 cards or bust, and player 2 never draws after it
+        player1_bust = batch['values'][0] > 21
+        self.assertTrue(player1_bust.any())
+        self.assertTrue((batch['drawn'][1][player1_bust] == 0).all())
+        self.assertTrue((batch['outcome'][player1_bust] == -1).all())
+        self.assertFalse(((batch['values'][0] > 21) & (batch['values'][1] > 21)).any())
+
+    def test_simulate(self):
+        report = simulate(20000, (parse_strategy('stand:17'), parse_strategy('stand:17')), seed=3, batch_size=7000)
+        self.assertEqual(report, {**simulate(20000, (stand_on(17), stand_on(17)), seed=3, batch_size=7000),
+                                  'games_per_second': report['games_per_second']})
+        self.assertAlmostEqual(1, report['win'] + report['draw'] + report['loss'])
+        self.assertAlmostEqual(report['win'] - report['loss'], report['ev'])
+        self.assertAlmostEqual(1, sum(report['values'][0].values()))
+
+        # Nobody draws, so every game is a draw with empty hands
+        report = simulate(1000, (stand_on(0), stand_on(0)))
+        self.assertEqual(1, report['draw'])
+        self.assertEqual([{0: 1.0}, {0: 1.0}], report['values'])
+
+        with self.assertRaises(ValueError):
+            parse_strategy('double:17')
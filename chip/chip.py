@@ -1,7 +1,25 @@
 from iconservice import *
 
+from .multicall.multicall import decode_calls
+
 TAG = 'BLACKJACK_TOKEN'
 
+# Batch params are packed as fixed size records : Address(prefix + body) & unsigned 256 bits big-endian value
+ADDRESS_SIZE = 21
+VALUE_SIZE = 32
+
+
+def unpack_addresses(data: bytes) -> list:
+    if len(data) % ADDRESS_SIZE != 0:
+        revert("Invalid address list")
+    return [Address.from_bytes_including_prefix(data[i:i + ADDRESS_SIZE]) for i in range(0, len(data), ADDRESS_SIZE)]
+
+
+def unpack_values(data: bytes) -> list:
+    if len(data) % VALUE_SIZE != 0:
+        revert("Invalid value list")
+    return [int.from_bytes(data[i:i + VALUE_SIZE], 'big') for i in range(0, len(data), VALUE_SIZE)]
+
 
 class TokenFallbackInterface(InterfaceScore):
     @interface
@@ -13,6 +31,17 @@ class Chip(IconScoreBase):
     _BALANCES = 'balances'
     _TOTAL_SUPPLY = 'total_supply'
     _DECIMALS = 'decimals'
+    _GAMES = 'games'
+
+    # Readonly methods allowed in multicall, with the types of their params
+    _MULTICALL_METHODS = {
+        'name': {},
+        'symbol': {},
+        'decimals': {},
+        'totalSupply': {},
+        'balanceOf': {'_owner': Address},
+        'isGame': {'_game': Address}
+    }
 
     @eventlog(indexed=3)
     def Transfer(self, _from: Address, _to: Address, _value: int, _data: bytes):
@@ -22,10 +51,18 @@ class Chip(IconScoreBase):
     def Bet(self, _from: Address, _to: Address, _value: int):
         pass
 
+    @eventlog(indexed=1)
+    def CollectStakes(self, _to: Address, _value: int, _count: int):
+        pass
+
     @eventlog(indexed=2)
     def Burn(self, _from: Address, _value: int):
         pass
 
+    @eventlog(indexed=1)
+    def GameRegistered(self, _game: Address, _registered: bool):
+        pass
+
     def on_install(self, _decimals: int = 8) -> None:
         super().on_install()
 
@@ -41,6 +78,8 @@ class Chip(IconScoreBase):
         self._balances = DictDB(self._BALANCES, db, value_type=int)
         self._decimals = VarDB(self._DECIMALS, db, value_type=int)
         self._total_supply = VarDB(self._TOTAL_SUPPLY, db, value_type=int)
+        # Game SCOREs allowed to move the chips of players by the batch settlement methods
+        self._games = DictDB(self._GAMES, db, value_type=bool)
 
     @external(readonly=True)
     def name(self) -> str:
@@ -78,6 +117,43 @@ class Chip(IconScoreBase):
         """
         return self._balances[_owner]
 
+    @external(readonly=True)
+    def multicall(self, _calls: str) -> list:
+        """
+        Calls the readonly methods in _MULTICALL_METHODS at once. e.g. balances of many owners in a single call.
+
+        :param _calls: JSON list of {"method": name of method, "params": {name of param: value}}. (Up to 100 calls)
+        :return: The results of calls, in the order of calls
+        """
+        return [getattr(self, method)(**params) for method, params in decode_calls(_calls, self._MULTICALL_METHODS)]
+
+    @external(readonly=True)
+    def isGame(self, _game: Address) -> bool:
+        """
+        :return: True if _game is allowed to invoke collectStakes & payout
+        """
+        return self._games[_game]
+
+    @external
+    def setGame(self, _game: Address, _registered: bool = True):
+        """
+        Registers the game SCORE allowed to invoke collectStakes & payout, or unregisters it. Only the owner of SCORE can invoke this method.
+
+        :param _game: The address of game SCORE
+        :param _registered: False to unregister the game SCORE
+        """
+        if self.msg.sender != self.owner:
+            revert("Only owner of SCORE can register the game")
+        if not _game.is_contract:
+            revert("Game must be Contract Address")
+
+        self._games[_game] = _registered
+        self.GameRegistered(_game, _registered)
+
+    def _check_game(self):
+        if not self._games[self.msg.sender]:
+            revert("This method should be invoked by the registered game SCORE")
+
     @external
     def mint(self, _amount: int):
         """
@@ -132,4 +208,53 @@ class Chip(IconScoreBase):
         self._balances[_from] = self._balances[_from] - _value
         self._balances[_to] = self._balances[_to] + _value
         self.Bet(_from, _to, _value)
-        self.Transfer(_from, _to, _value, None)
\ No newline at end of file
+        self.Transfer(_from, _to, _value, None)
+
+    @external
+    def collectStakes(self, _froms: bytes, _value: int):
+        """
+        Collects the stake of every player in a single call. This method should be invoked by the registered game SCORE.
+
+        :param _froms: The addresses of players packed as 21 bytes records
+        :param _value: The amount of chips to collect from each player
+        """
+        self._check_game()
+        if _value < 0:
+            revert('Stake cannot be less than zero')
+
+        froms = unpack_addresses(_froms)
+        for _from in froms:
+            if self._balances[_from] < _value:
+                revert(f"Out of balance : {_from}")
+            self._balances[_from] = self._balances[_from] - _value
+            self.Transfer(_from, self.msg.sender, _value, None)
+
+        self._balances[self.msg.sender] = self._balances[self.msg.sender] + _value * len(froms)
+        self.CollectStakes(self.msg.sender, _value, len(froms))
+
+    @external
+    def payout(self, _tos: bytes, _values: bytes) -> list:
+        """
+        Transfers chips of the caller to every player in a single call. This method should be invoked by the registered game SCORE.
+
+        :param _tos: The addresses of players packed as 21 bytes records
+        :param _values: The amount of chips to pay to each player, packed as 32 bytes records. (0 for no payment)
+        :return: The chip balances of players after the payment, in the order of _tos
+        """
+        self._check_game()
+        tos = unpack_addresses(_tos)
+        values = unpack_values(_values)
+        if len(tos) != len(values):
+            revert("The number of addresses and values must be same")
+        if sum(values) > self._balances[self.msg.sender]:
+            revert("Out of balance")
+
+        balances = []
+        for _to, _value in zip(tos, values):
+            if _value > 0:
+                self._balances[_to] = self._balances[_to] + _value
+                self.Transfer(self.msg.sender, _to, _value, None)
+            balances.append(self._balances[_to])
+
+        self._balances[self.msg.sender] = self._balances[self.msg.sender] - sum(values)
+        return balances
@@ -0,0 +1,63 @@
+from iconservice import *
+
+# Samplegame & chip SCOREs keep identical copies of this module, because a SCORE package can not import another one
+
+MAX_CALLS = 100
+
+
+def convert_param(value, value_type: type):
+    # Params in JSON are strings or numbers. Integers & booleans may be hex strings like the params of JSON-RPC
+    if value is None:
+        return None
+    if value_type == Address:
+        if not isinstance(value, str):
+            raise TypeError(f"Address must be a string : {value}")
+        return Address.from_string(value)
+    if value_type == str:
+        return str(value)
+    if isinstance(value, str):
+        value = int(value, 0)
+    if not isinstance(value, int):
+        raise TypeError(f"Not a number : {value}")
+    return bool(value) if value_type == bool else int(value)
+
+
+def decode_calls(calls: str, methods: dict) -> list:
+    """
+    Decodes the calls of multicall, and converts their params to the types declared in 'methods'.
+    Reverts on any malformed call, param or value.
+
+    :param calls: JSON list of {"method": name of method, "params": {name of param: value}}
+    :param methods: name of method -> {name of param: type of param}, of the methods allowed in multicall
+    :return: list of (name of method, params)
+    """
+    try:
+        calls = json_loads(calls)
+    except (TypeError, ValueError):
+        revert("Calls must be a JSON list")
+    if not isinstance(calls, list) or len(calls) > MAX_CALLS:
+        revert(f"Calls must be a list of up to {MAX_CALLS} calls")
+
+    decoded_calls = []
+    for call in calls:
+        if not isinstance(call, dict):
+            revert(f"Call must be an object of method & params : {call}")
+        method = call.get('method')
+        if not isinstance(method, str) or method not in methods:
+            revert(f"{method} is not allowed in multicall")
+
+        param_types = methods[method]
+        call_params = call.get('params') or {}
+        if not isinstance(call_params, dict):
+            revert(f"Params of {method} must be an object")
+
+        params = {}
+        for name, value in call_params.items():
+            if name not in param_types:
+                revert(f"{method} has no param {name}")
+            try:
+                params[name] = convert_param(value, param_types[name])
+            except (TypeError, ValueError, KeyError):
+                revert(f"Invalid value of {name} in {method} : {value}")
+        decoded_calls.append((method, params))
+    return decoded_calls
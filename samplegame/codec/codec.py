@@ -0,0 +1,71 @@
+from iconservice import *
+
+ADDRESS_SIZE = 21
+VALUE_SIZE = 32
+
+
+def encode_int(value: int) -> bytes:
+    # Length prefixed signed big-endian integer
+    body = value.to_bytes((value.bit_length() + 8) // 8, 'big', signed=True)
+    return bytes([len(body)]) + body
+
+
+def encode_bool(value: bool) -> bytes:
+    return b'\x01' if value else b'\x00'
+
+
+def encode_address(address: Address) -> bytes:
+    # Address prefix(EOA / Contract) + 20 bytes body
+    return address.to_bytes_including_prefix()
+
+
+def encode_addresses(addresses: list) -> bytes:
+    return bytes([len(addresses)]) + b''.join(address.to_bytes_including_prefix() for address in addresses)
+
+
+def encode_ints(values: list) -> bytes:
+    return bytes([len(values)]) + b''.join(encode_int(value) for value in values)
+
+
+def pack_addresses(addresses: list) -> bytes:
+    # Fixed size records for the batch methods of Chip SCORE
+    return b''.join(address.to_bytes_including_prefix() for address in addresses)
+
+
+def pack_values(values: list) -> bytes:
+    return b''.join(value.to_bytes(VALUE_SIZE, 'big') for value in values)
+
+
+class RecordReader:
+    """
+    A class reads the fields encoded by the functions above, in the order of encoding.
+    """
+
+    def __init__(self, data: bytes, offset: int = 0):
+        self._data = data
+        self._offset = offset
+
+    def read_byte(self) -> int:
+        value = self._data[self._offset]
+        self._offset += 1
+        return value
+
+    def read_bool(self) -> bool:
+        return self.read_byte() == 1
+
+    def read_int(self) -> int:
+        length = self.read_byte()
+        value = int.from_bytes(self._data[self._offset:self._offset + length], 'big', signed=True)
+        self._offset += length
+        return value
+
+    def read_address(self) -> Address:
+        value = Address.from_bytes_including_prefix(self._data[self._offset:self._offset + ADDRESS_SIZE])
+        self._offset += ADDRESS_SIZE
+        return value
+
+    def read_addresses(self) -> list:
+        return [self.read_address() for _ in range(self.read_byte())]
+
+    def read_ints(self) -> list:
+        return [self.read_int() for _ in range(self.read_byte())]
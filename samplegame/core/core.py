@@ -0,0 +1,219 @@
+"""
+The rules of BLACKJACK : deck & dealing, hand scoring, and the state machine of game room.
+This module imports nothing, so that off-chain tools (analytics, bots) can use the rules without iconservice.
+The SCORE uses it through the classes of deck, hand & gameroom packages, which add the hash function & storage encodings.
+"""
+
+suits = ('Hearts', 'Diamonds', 'Spades', 'Clubs')
+ranks = ('Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine', 'Ten', 'Jack', 'Queen', 'King', 'Ace')
+values = {'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5, 'Six': 6, 'Seven': 7, 'Eight': 8,
+          'Nine': 9, 'Ten': 10, 'Jack': 10, 'Queen': 10, 'King': 10, 'Ace': 11}
+
+DECK_SIZE = len(suits) * len(ranks)
+SEED_SIZE = 32
+DEALT_SIZE = (DECK_SIZE + 7) // 8
+
+MAX_CARDS = 5
+BLACKJACK = 21
+
+# Hard value (Ace counts 1) of each card index. Card index = suit index * 13 + rank index
+card_values = tuple(1 if rank == 'Ace' else values[rank] for suit in suits for rank in ranks)
+card_is_ace = tuple(rank == 'Ace' for suit in suits for rank in ranks)
+# hand_values[hard value][whether the hand has an ace] : One ace counts 11 unless the hand busts with it
+hand_values = tuple((hard, hard + 10 if hard + 10 <= BLACKJACK else hard) for hard in range(10 * MAX_CARDS + 1))
+
+OPEN = 'open'
+FULL = 'full'
+PLAYING = 'playing'
+STATUSES = (OPEN, FULL, PLAYING)
+
+DEFAULT_SEATS = 2
+MAX_SEATS = 7
+
+
+def card_to_dict(card: int) -> dict:
+    return {'suit': suits[card // len(ranks)], 'rank': ranks[card % len(ranks)]}
+
+
+def card_from_dict(card: dict) -> int:
+    return suits.index(card['suit']) * len(ranks) + ranks.index(card['rank'])
+
+
+def winners(final_values: list) -> list:
+    """
+    :param final_values: The values of hands in the order of seats
+    :return: Indexes of the hands with the best value not exceeding 21. All of them if every hand exceeds 21. (Draw)
+    """
+    best_value = -1
+    winner_indexes = []
+    for index, value in enumerate(final_values):
+        if value > BLACKJACK:
+            continue
+        if value > best_value:
+            best_value = value
+            winner_indexes = [index]
+        elif value == best_value:
+            winner_indexes.append(index)
+
+    if not winner_indexes:
+        winner_indexes = list(range(len(final_values)))
+    return winner_indexes
+
+
+def prize_tier(prize_per_game: int) -> int:
+    # Prize tiers are grouped by the number of decimal digits. (0 ~ 9 : 0, 10 ~ 99 : 1, 100 ~ 999 : 2, ...)
+    return len(str(prize_per_game)) - 1
+
+
+class Deck:
+    """
+    A deck of 52 cards stored as a per-game seed & a bit mask of the dealt cards, instead of the list of cards.
+    The card of index 'i' is Card(suits[i // 13], ranks[i % 13]). The number of dealt cards is the draw cursor.
+
+    :param hash_function: bytes -> bytes digest used to deal. (e.g. sha3_256) Defaults to the 'hash_function' of class
+    """
+    hash_function = None
+
+    def __init__(self, seed: bytes, dealt: int = 0, hash_function=None):
+        self.seed = seed
+        self.dealt = dealt
+        if hash_function is not None:
+            self.hash_function = hash_function
+
+    @classmethod
+    def from_bytes(cls, deck: bytes, hash_function=None) -> 'Deck':
+        return cls(deck[:SEED_SIZE], int.from_bytes(deck[SEED_SIZE:], 'big'), hash_function)
+
+    @property
+    def cursor(self) -> int:
+        return bin(self.dealt).count('1')
+
+    def deal(self, block_height: int, sender_address) -> int:
+        # Pick one of the remaining cards with the seed, the draw cursor and the block information of dealing time
+        if self.hash_function is None:
+            raise ValueError("No hash function to deal with")
+
+        cursor = self.cursor
+        deal_input = self.seed + cursor.to_bytes(1, 'big') + (str(block_height) + str(sender_address)).encode()
+        random_index = int.from_bytes(bytes(self.hash_function(deal_input)), 'big') % (DECK_SIZE - cursor)
+
+        for card_index in range(DECK_SIZE):
+            if self.dealt >> card_index & 1:
+                continue
+            if random_index == 0:
+                break
+            random_index -= 1
+
+        self.dealt |= 1 << card_index
+        return card_index
+
+    def __bytes__(self):
+        return self.seed + self.dealt.to_bytes(DEALT_SIZE, 'big')
+
+
+class Hand:
+    """
+    Cards on the hand are stored as card indexes of the deck, with the hard value of them.
+    """
+
+    def __init__(self, cards: list = None, fix: bool = False):
+        if cards is None:
+            self.cards = []
+        else:
+            self.cards = cards
+
+        self.fix = fix
+        self.hard_value = 0
+        self.has_ace = False
+        for card in self.cards:
+            self.hard_value += card_values[card]
+            self.has_ace |= card_is_ace[card]
+
+    @classmethod
+    def from_bytes(cls, hand: bytes) -> 'Hand':
+        return cls(list(hand[1:]), hand[0] == 1)
+
+    @property
+    def value(self) -> int:
+        return hand_values[self.hard_value][self.has_ace]
+
+    @property
+    def aces(self) -> int:
+        # The number of aces counting 11
+        return 1 if self.value != self.hard_value else 0
+
+    @property
+    def is_bust(self) -> bool:
+        return self.value > BLACKJACK
+
+    def add_card(self, card: int):
+        self.cards.append(card)
+        self.hard_value += card_values[card]
+        self.has_ace |= card_is_ace[card]
+
+    def to_dict(self) -> dict:
+        return {
+            'cards': [card_to_dict(card) for card in self.cards],
+            'value': self.value,
+            'aces': self.aces,
+            'fix': self.fix
+        }
+
+    def __bytes__(self):
+        return bytes([1 if self.fix else 0]) + bytes(self.cards)
+
+
+class GameRoom:
+    """
+    The state of game room. Participants & owner are the values identifying players, e.g. Address of iconservice.
+    """
+
+    def __init__(self, _owner, _game_room_id, _creation_time: int, _prize_per_game: int, _participants: list = None, _active: bool = False,
+                 _seats: int = DEFAULT_SEATS):
+        self.owner = _owner
+        self.game_room_id = _game_room_id
+        self.creation_time = _creation_time
+        self.prize_per_game = _prize_per_game
+        if _participants is None:
+            self.participants = []
+        else:
+            self.participants = _participants
+        self.active = _active
+        self.seats = _seats
+
+    def join(self, _participant):
+        self.participants.append(_participant)
+
+    def escape(self, _participant_to_escape):
+        self.participants.remove(_participant_to_escape)
+
+    def game_start(self):
+        self.active = True
+
+    def game_stop(self):
+        self.active = False
+
+    @property
+    def status(self) -> str:
+        if self.active:
+            return PLAYING
+        return FULL if self.is_full else OPEN
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.participants) >= self.seats
+
+    @property
+    def prize_tier(self) -> int:
+        return prize_tier(self.prize_per_game)
+
+    def to_dict(self) -> dict:
+        return {
+            'owner': f'{self.owner}',
+            'game_room_id': f'{self.game_room_id}',
+            'creation_time': self.creation_time,
+            'prize_per_game': self.prize_per_game,
+            'participants': [str(participant) for participant in self.participants],
+            'active': self.active,
+            'seats': self.seats
+        }
@@ -1,30 +1,22 @@
 from iconservice import *
 
-from ..card.card import Card
+from ..core import core
+from ..core.core import DECK_SIZE, SEED_SIZE, DEALT_SIZE, card_from_dict
 
-suits = ('Hearts', 'Diamonds', 'Spades', 'Clubs')
-ranks = ('Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine', 'Ten', 'Jack', 'Queen', 'King', 'Ace')
 
+class Deck(core.Deck):
+    """
+    The deck of core dealing with sha3_256 of iconservice.
+    """
+    hash_function = staticmethod(sha3_256)
 
-class Deck:
-
-    def __init__(self, deck: list = None):
-        self.deck = deck
-        # If deck is empty list, fill the deck with cards
-        if self.deck is None:
-            self.deck = []
-            for suit in suits:
-                for rank in ranks:
-                    self.deck.append(str(Card(suit, rank)))
-
-    def deal(self, block_height: int, sender_address: Address):
-        deal_input = str(block_height) + str(sender_address)
-        random_index = int.from_bytes(bytes(sha3_256(deal_input.encode())), 'big') % len(self.deck)
-        single_card = self.deck.pop(random_index)
-        return single_card
-
-    def __str__(self):
-        response = {
-            'deck': self.deck
-        }
-        return json_dumps(response)
+    @classmethod
+    def from_bytes(cls, deck: bytes, hash_function=None) -> 'Deck':
+        # JSON encoded decks of previous version start with '{', and list the remaining cards as JSON of Card.
+        # The encoded deck has a fixed size, because its first byte may also be '{'
+        if len(deck) != SEED_SIZE + DEALT_SIZE and deck[0] == ord('{'):
+            remaining = {card_from_dict(json_loads(card)) for card in json_loads(deck.decode())['deck']}
+            dealt = sum(1 << card for card in range(DECK_SIZE) if card not in remaining)
+            # The deck of previous version has no seed. It is derived from the stored deck
+            return cls(sha3_256(deck), dealt, hash_function)
+        return super().from_bytes(deck, hash_function)
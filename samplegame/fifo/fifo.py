@@ -0,0 +1,40 @@
+from iconservice import *
+
+
+class FifoDB:
+    """
+    A FIFO queue stored on DictDB with head & tail positions. Both of put & pop cost the same regardless of its length.
+    """
+
+    def __init__(self, key: str, db: IconScoreDatabase, value_type: type):
+        self._items = DictDB(f'{key}|items', db, value_type=value_type)
+        self._head = VarDB(f'{key}|head', db, value_type=int)
+        self._tail = VarDB(f'{key}|tail', db, value_type=int)
+
+    def __len__(self) -> int:
+        return self._tail.get() - self._head.get()
+
+    def __getitem__(self, index: int):
+        # The position from the head. (0 : the oldest item)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Index out of range : {index}")
+        return self._items[self._head.get() + index]
+
+    def put(self, value):
+        tail = self._tail.get()
+        self._items[tail] = value
+        self._tail.set(tail + 1)
+
+    def peek(self):
+        if len(self) == 0:
+            return None
+        return self._items[self._head.get()]
+
+    def pop(self):
+        if len(self) == 0:
+            return None
+        head = self._head.get()
+        value = self._items[head]
+        self._items.remove(head)
+        self._head.set(head + 1)
+        return value
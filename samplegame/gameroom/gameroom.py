@@ -1,38 +1,48 @@
 from iconservice import *
 
-
-class GameRoom:
-
-    def __init__(self, _owner: Address, _game_room_id: Address, _creation_time: int, _prize_per_game: int, _participants: list = None, _active: bool = False):
-        self.owner = _owner
-        self.game_room_id = _game_room_id
-        self.creation_time = _creation_time
-        self.prize_per_game = _prize_per_game
-        if _participants is None:
-            self.participants = []
-        else:
-            self.participants = _participants
-        self.active = _active
-
-    def join(self, _participant: Address):
-        self.participants.append(str(_participant))
-
-    def escape(self, _participant_to_escape: Address):
-        self.participants.remove(str(_participant_to_escape))
-
-    def game_start(self):
-        self.active = True
-
-    def game_stop(self):
-        self.active = False
+from ..codec.codec import RecordReader, encode_address, encode_addresses, encode_bool, encode_int
+from ..core import core
+from ..core.core import STATUSES, OPEN, FULL, PLAYING, DEFAULT_SEATS, MAX_SEATS, prize_tier
+
+# The first byte of encoded game room. JSON encoded game rooms of previous version start with '{'
+# Version 1 has no seats, and the game rooms of it have 2 seats
+VERSION = 2
+
+
+class GameRoom(core.GameRoom):
+    """
+    The game room of core, with the encodings of SCORE storage. Owner, game room ID & participants are Address.
+    """
+
+    @classmethod
+    def from_string(cls, game_room: str) -> 'GameRoom':
+        game_room_dict = json_loads(game_room)
+        return cls(Address.from_string(game_room_dict['owner']), Address.from_string(game_room_dict['game_room_id']), game_room_dict['creation_time'],
+                   game_room_dict['prize_per_game'], [Address.from_string(participant) for participant in game_room_dict['participants']],
+                   game_room_dict['active'], game_room_dict.get('seats', DEFAULT_SEATS))
+
+    @classmethod
+    def from_bytes(cls, game_room: bytes) -> 'GameRoom':
+        if game_room[0] == ord('{'):
+            return cls.from_string(game_room.decode())
+
+        reader = RecordReader(game_room)
+        version = reader.read_byte()
+        if version not in (1, VERSION):
+            raise ValueError(f"Unknown game room version : {version}")
+        owner = reader.read_address()
+        game_room_id = reader.read_address()
+        creation_time = reader.read_int()
+        prize_per_game = reader.read_int()
+        active = reader.read_bool()
+        participants = reader.read_addresses()
+        seats = reader.read_int() if version == VERSION else DEFAULT_SEATS
+        return cls(owner, game_room_id, creation_time, prize_per_game, participants, active, seats)
 
     def __str__(self):
-        response = {
-            'owner': f'{self.owner}',
-            'game_room_id': f'{self.game_room_id}',
-            'creation_time': self.creation_time,
-            'prize_per_game': self.prize_per_game,
-            'participants': self.participants,
-            'active': self.active
-        }
-        return json_dumps(response)
+        return json_dumps(self.to_dict())
+
+    def __bytes__(self):
+        return bytes([VERSION]) + encode_address(self.owner) + encode_address(self.game_room_id) + encode_int(self.creation_time) + \
+            encode_int(self.prize_per_game) + encode_bool(self.active) + encode_addresses(self.participants) + \
+            encode_int(self.seats)
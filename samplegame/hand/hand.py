@@ -1,36 +1,26 @@
 from iconservice import *
 
+from ..card.card import Card
+from ..core import core
+from ..core.core import suits, ranks, MAX_CARDS, card_from_dict
 
-values = {'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5, 'Six': 6, 'Seven': 7, 'Eight': 8,
-          'Nine': 9, 'Ten': 10, 'Jack': 10, 'Queen': 10, 'King': 10, 'Ace': 11}
 
+class Hand(core.Hand):
+    """
+    The hand of core, with the JSON representation of SCORE.
+    """
 
-class Hand:
-
-    def __init__(self, cards: list = None, value: int = 0, aces: int = 0, fix: bool = False):
-        if cards is None:
-            self.cards = []
-        else:
-            self.cards = cards
-
-        self.value = value  # start with zero value
-        self.aces = aces  # add an attribute to keep track of aces
-        self.fix = fix
-
-    def add_card(self, card):
-        self.cards.append(card)
-        self.value += values[json_loads(card)['rank']]
-        if json_loads(card)['rank'] == 'Ace':
-            self.aces += 1  # add to self.aces
-
-    def adjust_for_ace(self):
-        while self.value > 21 and self.aces:
-            self.value -= 10
-            self.aces -= 1
+    @classmethod
+    def from_bytes(cls, hand: bytes) -> 'Hand':
+        # JSON encoded hands of previous version start with '{', and list the cards as JSON of Card
+        if hand[0] == ord('{'):
+            hand_dict = json_loads(hand.decode())
+            return cls([card_from_dict(json_loads(card)) for card in hand_dict['cards']], hand_dict['fix'])
+        return super().from_bytes(hand)
 
     def __str__(self):
         response = {
-            'cards': self.cards,
+            'cards': [str(Card(suits[card // len(ranks)], ranks[card % len(ranks)])) for card in self.cards],
             'value': self.value,
             'aces': self.aces,
             'fix': self.fix
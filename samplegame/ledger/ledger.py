@@ -0,0 +1,104 @@
+from iconservice import *
+
+from ..codec.codec import pack_addresses, pack_values
+
+NAME = "blackjack chips"
+SYMBOL = "chips"
+
+
+class ChipLedger:
+    """
+    A ledger kept by the separate Chip SCORE. Every method is an inter-SCORE call.
+    """
+
+    def __init__(self, chip: InterfaceScore):
+        self._chip = chip
+
+    def decimals(self) -> int:
+        return self._chip.decimals()
+
+    def total_supply(self) -> int:
+        return self._chip.totalSupply()
+
+    def balance_of(self, owner: Address) -> int:
+        return self._chip.balanceOf(owner)
+
+    def mint(self, owner: Address, amount: int):
+        # Chip SCORE mints chips to the origin of transaction, which is 'owner'
+        self._chip.mint(amount)
+
+    def burn(self, owner: Address, amount: int):
+        self._chip.burn(amount)
+
+    def collect_stakes(self, players: list, value: int):
+        self._chip.collectStakes(pack_addresses(players), value)
+
+    def payout(self, players: list, values: list) -> list:
+        return self._chip.payout(pack_addresses(players), pack_values(values))
+
+
+class EmbeddedLedger:
+    """
+    A ledger kept in the DB of SampleGame SCORE, with the same semantics as Chip SCORE. No inter-SCORE call is required.
+    """
+    _BALANCES = 'balances'
+    _TOTAL_SUPPLY = 'total_supply'
+    _DECIMALS = 'decimals'
+
+    def __init__(self, db: IconScoreDatabase, game_address: Address, transfer_eventlog):
+        self._balances = DictDB(self._BALANCES, db, value_type=int)
+        self._total_supply = VarDB(self._TOTAL_SUPPLY, db, value_type=int)
+        self._decimals = VarDB(self._DECIMALS, db, value_type=int)
+        self._game_address = game_address
+        self._transfer_eventlog = transfer_eventlog
+
+    def initialize(self, decimals: int):
+        self._total_supply.set(0)
+        self._decimals.set(decimals)
+
+    def decimals(self) -> int:
+        return self._decimals.get()
+
+    def total_supply(self) -> int:
+        return self._total_supply.get()
+
+    def balance_of(self, owner: Address) -> int:
+        return self._balances[owner]
+
+    def mint(self, owner: Address, amount: int):
+        chips = amount * (10 ** self._decimals.get())
+        self._balances[owner] = self._balances[owner] + chips
+        self._total_supply.set(self._total_supply.get() + chips)
+        self._transfer_eventlog(ZERO_SCORE_ADDRESS, owner, chips, None)
+
+    def burn(self, owner: Address, amount: int):
+        chips = amount * (10 ** self._decimals.get())
+        if self._balances[owner] < chips:
+            revert(f"You don't have enough chips to burn. Your balance: {self._balances[owner]}")
+
+        self._balances[owner] = self._balances[owner] - chips
+        self._total_supply.set(self._total_supply.get() - chips)
+        self._transfer_eventlog(owner, ZERO_SCORE_ADDRESS, chips, None)
+
+    def collect_stakes(self, players: list, value: int):
+        for player in players:
+            if self._balances[player] < value:
+                revert(f"Out of balance : {player}")
+            self._balances[player] = self._balances[player] - value
+            self._transfer_eventlog(player, self._game_address, value, None)
+
+        self._balances[self._game_address] = self._balances[self._game_address] + value * len(players)
+
+    def payout(self, players: list, values: list) -> list:
+        if sum(values) > self._balances[self._game_address]:
+            revert("Out of balance")
+
+        balances = []
+        for player, value in zip(players, values):
+            if value > 0:
+                self._balances[player] = self._balances[player] + value
+                self._transfer_eventlog(self._game_address, player, value, None)
+            balances.append(self._balances[player])
+
+        self._balances[self._game_address] = self._balances[self._game_address] - sum(values)
+        return balances
@@ -0,0 +1,77 @@
+from iconservice import *
+
+from ..gameroom.gameroom import GameRoom
+from ..hand.hand import Hand
+
+
+class _CachedDictDB:
+
+    def __init__(self, db: DictDB, loader, dumper):
+        self._db = db
+        self._loader = loader
+        self._dumper = dumper
+        # key -> [loaded object (None if removed), stored string (None if not stored)]
+        self._entries = {}
+
+    def get(self, key):
+        if key not in self._entries:
+            stored = self._db[key]
+            if stored:
+                self._entries[key] = [self._loader(stored), stored]
+            else:
+                self._entries[key] = [None, None]
+        return self._entries[key][0]
+
+    def add(self, key, value):
+        if key in self._entries:
+            self._entries[key][0] = value
+        else:
+            self._entries[key] = [value, self._db[key] or None]
+
+    def remove(self, key):
+        self.add(key, None)
+
+    def flush(self):
+        for key, (value, stored) in self._entries.items():
+            if value is None:
+                if stored is not None:
+                    self._db.remove(key)
+                continue
+
+            # Write back only the objects which have been changed since loaded
+            serialized = self._dumper(value)
+            if serialized != stored:
+                self._db[key] = serialized
+                self._entries[key][1] = serialized
+
+
+class Repository:
+    """
+    A class loads game rooms & hands at most once per transaction, and writes back only the changed ones on flush.
+    """
+
+    def __init__(self, game_room_db: DictDB, hand_db: DictDB):
+        self._game_rooms = _CachedDictDB(game_room_db, GameRoom.from_bytes, bytes)
+        self._hands = _CachedDictDB(hand_db, Hand.from_bytes, bytes)
+
+    def get_game_room(self, game_room_id: Address) -> GameRoom:
+        return self._game_rooms.get(game_room_id)
+
+    def add_game_room(self, game_room: GameRoom):
+        self._game_rooms.add(game_room.game_room_id, game_room)
+
+    def remove_game_room(self, game_room_id: Address):
+        self._game_rooms.remove(game_room_id)
+
+    def get_hand(self, participant: Address) -> Hand:
+        return self._hands.get(participant)
+
+    def add_hand(self, participant: Address, hand: Hand):
+        self._hands.add(participant, hand)
+
+    def remove_hand(self, participant: Address):
+        self._hands.remove(participant)
+
+    def flush(self):
+        self._game_rooms.flush()
+        self._hands.flush()
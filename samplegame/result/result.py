@@ -0,0 +1,69 @@
+from iconservice import *
+
+from ..codec.codec import RecordReader, encode_address, encode_addresses, encode_int, encode_ints
+from ..core.core import winners
+
+# The first byte of encoded result
+VERSION = 1
+
+
+class Result:
+    """
+    The result of a game. Hand values & payouts are in the order of participants.
+    """
+
+    def __init__(self, _result_id: int, _game_room_id: Address, _block_height: int, _prize_per_game: int,
+                 _participants: list, _values: list, _payouts: list = None):
+        self.result_id = _result_id
+        self.game_room_id = _game_room_id
+        self.block_height = _block_height
+        self.prize_per_game = _prize_per_game
+        self.participants = _participants
+        self.values = _values
+        if _payouts is None:
+            self.payouts = [0] * len(_participants)
+        else:
+            self.payouts = _payouts
+
+    @classmethod
+    def from_bytes(cls, result: bytes) -> 'Result':
+        reader = RecordReader(result)
+        version = reader.read_byte()
+        if version != VERSION:
+            raise ValueError(f"Unknown result version : {version}")
+        result_id = reader.read_int()
+        game_room_id = reader.read_address()
+        block_height = reader.read_int()
+        prize_per_game = reader.read_int()
+        participants = reader.read_addresses()
+        values = reader.read_ints()
+        payouts = reader.read_ints()
+        return cls(result_id, game_room_id, block_height, prize_per_game, participants, values, payouts)
+
+    @property
+    def winners(self) -> list:
+        return winners(self.values)
+
+    def to_dict(self) -> dict:
+        return {
+            'result_id': self.result_id,
+            'game_room_id': str(self.game_room_id),
+            'block_height': self.block_height,
+            'prize_per_game': self.prize_per_game,
+            'players': [{'player': str(participant), 'value': value, 'payout': payout}
+                        for participant, value, payout in zip(self.participants, self.values, self.payouts)]
+        }
+
+    def __str__(self):
+        winners = self.winners
+        winner_names = ", ".join(str(self.participants[index]) for index in winners)
+        if len(winners) == len(self.participants):
+            return f"Draw!! {winner_names}."
+
+        winner_indexes = set(winners)
+        loser_names = ", ".join(str(participant) for index, participant in enumerate(self.participants) if index not in winner_indexes)
+        return f"{winner_names} wins against {loser_names}."
+
+    def __bytes__(self):
+        return bytes([VERSION]) + encode_int(self.result_id) + encode_address(self.game_room_id) + encode_int(self.block_height) + \
+            encode_int(self.prize_per_game) + encode_addresses(self.participants) + encode_ints(self.values) + encode_ints(self.payouts)
@@ -1,8 +1,14 @@
 from iconservice import *
 
+from .codec.codec import RecordReader, encode_address, encode_int
 from .deck.deck import Deck
-from .gameroom.gameroom import GameRoom
-from .hand.hand import Hand
+from .fifo.fifo import FifoDB
+from .gameroom.gameroom import GameRoom, STATUSES, OPEN, FULL, PLAYING, DEFAULT_SEATS, MAX_SEATS, prize_tier
+from .hand.hand import Hand, MAX_CARDS
+from .ledger.ledger import ChipLedger, EmbeddedLedger, NAME, SYMBOL
+from .multicall.multicall import decode_calls
+from .repository.repository import Repository
+from .result.result import Result
 
 TAG = 'BLACKJACK'
 
@@ -12,6 +18,14 @@ class ChipInterface(InterfaceScore):
     A class contains designated methods of Chip SCORE, enable SampleGame to use methods without implementing repeatedly.
     """
 
+    @interface
+    def decimals(self) -> int:
+        pass
+
+    @interface
+    def totalSupply(self) -> int:
+        pass
+
     @interface
     def mint(self, _value: int):
         pass
@@ -32,6 +46,14 @@ class ChipInterface(InterfaceScore):
     def bet(self, _from: Address, _to: Address, _value: int):
         pass
 
+    @interface
+    def collectStakes(self, _froms: bytes, _value: int):
+        pass
+
+    @interface
+    def payout(self, _tos: bytes, _values: bytes) -> list:
+        pass
+
 
 class SampleGame(IconScoreBase):
     """
@@ -40,13 +62,65 @@ class SampleGame(IconScoreBase):
     _TOKEN_ADDRESS = "token_address"
     _GAME_ROOM = "game_room"
     _GAME_ROOM_LIST = "game_room_list"
+    _GAME_ROOM_INDEX = "game_room_index"
+    _GAME_ROOM_TIERS = "game_room_tiers"
+    _GAME_ROOM_TIER_REGISTERED = "game_room_tier_registered"
     _IN_GAME_ROOM = "in_game_room"
     _DECK = "deck"
     _HAND = "hand"
-    _RESULTS = "results"
+    _RESULT = "result"
+    _LAST_RESULT_ID = "last_result_id"
+    _PLAYER_RESULTS = "player_results"
+    _ROOM_RESULTS = "room_results"
+    _LAST_PRUNED_RESULT_ID = "last_pruned_result_id"
+    _RESULTS_TO_KEEP = "results_to_keep"
+    _RESULT_RETENTION_BLOCKS = "result_retention_blocks"
+    # Free text results of previous version
+    _LEGACY_RESULTS = "results"
 
     _READY = "ready"
     _GAME_START_TIME = "game_start_time"
+    _EXPIRY_QUEUE = "expiry_queue"
+    _MATCH_QUEUE = "match_queue"
+    _MATCH_TICKET = "match_ticket"
+    _LAST_MATCH_TICKET = "last_match_ticket"
+
+    _MAX_ROOMS_PER_PAGE = 50
+    _MAX_ROOMS_TO_SCAN = 200
+    _MAX_ROOMS_TO_FINALIZE = 20
+    _MAX_ROOMS_TO_MIGRATE = 100
+    # Matching scans the queue until the first valid entry. This bound of popped entries only keeps the transaction
+    # in the step limit. If it is reached, the caller waits in the queue, and the next callers continue from there
+    _MAX_MATCH_ENTRIES_TO_SCAN = 100
+    _MAX_RESULTS_PER_PAGE = 50
+    _MAX_RESULTS_TO_PRUNE = 50
+    # Pruning more than one result per game keeps the number of results flat at steady traffic, and catches up after the retention is reduced
+    _RESULTS_TO_PRUNE_PER_GAME = 2
+    _DEFAULT_RESULTS_TO_KEEP = 10000
+
+    # Readonly methods allowed in multicall, with the types of their params
+    _MULTICALL_METHODS = {
+        'name': {},
+        'symbol': {},
+        'decimals': {},
+        'totalSupply': {},
+        'balanceOf': {'_owner': Address},
+        'getGameRoomList': {'_offset': int, '_limit': int, '_vacantOnly': bool, '_prizeMin': int, '_prizeMax': int, '_active': bool},
+        'getMatchQueueLength': {'_prizePerGame': int},
+        'getChipBalance': {},
+        'showMine': {},
+        'getGameState': {'_gameRoomId': Address},
+        'getResults': {'_offset': int, '_limit': int},
+        'getResultsFor': {'_player': Address, '_offset': int, '_limit': int},
+        'getRoomResults': {'_gameRoomId': Address, '_offset': int, '_limit': int},
+        'getResultRetention': {}
+    }
+    # The game is finalized when it has been active for more than _GAME_EXPIRY_BLOCKS blocks
+    _GAME_EXPIRY_BLOCKS = 60
+
+    @eventlog(indexed=3)
+    def Transfer(self, _from: Address, _to: Address, _value: int, _data: bytes):
+        pass
 
     @eventlog(indexed=1)
     def Calculate(self, _gameRoomId: Address):
@@ -60,158 +134,445 @@ class SampleGame(IconScoreBase):
     def Fix(self, _fromAddress: Address, _gameRoomId: Address):
         pass
 
-    def on_install(self, _tokenAddress: Address) -> None:
+    @eventlog(indexed=2)
+    def GameResult(self, _resultId: int, _gameRoomId: Address, _result: bytes):
+        pass
+
+    def on_install(self, _tokenAddress: Address = None, _decimals: int = 8) -> None:
+        """
+        :param _tokenAddress: The address of Chip SCORE. If it is omitted, the chip ledger is kept in this SCORE. (Embedded mode)
+        :param _decimals: The decimals of chips in embedded mode
+        """
         super().on_install()
-        if _tokenAddress.is_contract:
+        if _tokenAddress is None:
+            self._get_ledger().initialize(_decimals)
+        elif _tokenAddress.is_contract:
             self._VDB_token_address.set(_tokenAddress)
         else:
             revert("Input params must be Contract Address")
 
     def on_update(self, **kwargs) -> None:
         super().on_update()
-        pass
+        # The rest of game rooms are moved by 'migrateGameRooms', so that the update fits in the step limit
+        self._migrate_game_rooms(self._MAX_ROOMS_TO_MIGRATE)
 
     def __init__(self, db: 'IconScoreDatabase') -> None:
         super().__init__(db)
         self._db = db
         self._VDB_token_address = VarDB(self._TOKEN_ADDRESS, db, value_type=Address)
-        self._DDB_game_room = DictDB(self._GAME_ROOM, db, value_type=str)
+        self._DDB_game_room = DictDB(self._GAME_ROOM, db, value_type=bytes)
+        self._DDB_game_room_index = DictDB(self._GAME_ROOM_INDEX, db, value_type=int)
+        self._DDB_game_room_tier_registered = DictDB(self._GAME_ROOM_TIER_REGISTERED, db, value_type=bool)
         self._DDB_game_start_time = DictDB(self._GAME_START_TIME, db, value_type=int)
+        # (game room ID, game start time) of started games, in the order of game start time
+        self._FDB_expiry_queue = FifoDB(self._EXPIRY_QUEUE, db, value_type=bytes)
+        # The ticket of player waiting in the match queue. The entries of queue with another ticket are stale
+        self._DDB_match_ticket = DictDB(self._MATCH_TICKET, db, value_type=int)
+        self._VDB_last_match_ticket = VarDB(self._LAST_MATCH_TICKET, db, value_type=int)
         self._DDB_in_game_room = DictDB(self._IN_GAME_ROOM, db, value_type=Address)
-        self._DDB_deck = DictDB(self._DECK, db, value_type=str)
-        self._DDB_hand = DictDB(self._HAND, db, value_type=str)
+        self._DDB_deck = DictDB(self._DECK, db, value_type=bytes)
+        self._DDB_hand = DictDB(self._HAND, db, value_type=bytes)
         self._DDB_ready = DictDB(self._READY, db, value_type=bool)
-
-    def _get_game_room_list(self):
+        self._DDB_result = DictDB(self._RESULT, db, value_type=bytes)
+        self._VDB_last_result_id = VarDB(self._LAST_RESULT_ID, db, value_type=int)
+        # Results with ID up to this one are pruned
+        self._VDB_last_pruned_result_id = VarDB(self._LAST_PRUNED_RESULT_ID, db, value_type=int)
+        self._VDB_results_to_keep = VarDB(self._RESULTS_TO_KEEP, db, value_type=int)
+        self._VDB_result_retention_blocks = VarDB(self._RESULT_RETENTION_BLOCKS, db, value_type=int)
+        self._repository = None
+
+    def _open_repository(self):
+        # Game rooms & hands loaded in a transaction are cached in the repository, and written back by 'flush' at the end of it
+        self._repository = Repository(self._DDB_game_room, self._DDB_hand)
+
+    def _get_game_room_list(self, status: str, tier: int):
+        # The lobby is partitioned by the status of game room(open / full / playing) and the prize tier
+        return ArrayDB(f'{self._GAME_ROOM_LIST}|{status}|{tier}', self._db, value_type=bytes)
+
+    def _get_legacy_game_room_list(self):
+        # The single game room list used before the lobby was partitioned. Its copies of game rooms are not updated by game start
         return ArrayDB(self._GAME_ROOM_LIST, self._db, value_type=str)
 
-    def _get_results(self):
-        return ArrayDB(self._RESULTS, self._db, value_type=str)
+    def _get_game_room_tiers(self):
+        return ArrayDB(self._GAME_ROOM_TIERS, self._db, value_type=int)
+
+    def _iter_game_room_lists(self, statuses: tuple = STATUSES, tier_min: int = 0, tier_max: int = None):
+        for tier in sorted(self._get_game_room_tiers()):
+            if tier < tier_min or (tier_max is not None and tier > tier_max):
+                continue
+            for status in statuses:
+                yield self._get_game_room_list(status, tier)
+
+    def _put_game_room_list(self, game_room: GameRoom):
+        tier = game_room.prize_tier
+        if not self._DDB_game_room_tier_registered[tier]:
+            self._DDB_game_room_tier_registered[tier] = True
+            self._get_game_room_tiers().put(tier)
+
+        game_room_list = self._get_game_room_list(game_room.status, tier)
+        self._DDB_game_room_index[game_room.game_room_id] = len(game_room_list)
+        game_room_list.put(bytes(game_room))
+
+    def _is_listed(self, game_room_id: Address, status: str, tier: int) -> bool:
+        game_room_list = self._get_game_room_list(status, tier)
+        index = self._DDB_game_room_index[game_room_id]
+        return index < len(game_room_list) and GameRoom.from_bytes(game_room_list[index]).game_room_id == game_room_id
+
+    def _is_migrating(self) -> bool:
+        return len(self._get_legacy_game_room_list()) > 0
+
+    def _update_game_room_list(self, game_room: GameRoom, last_status: str):
+        # The game room of previous version which has not been moved yet is put to its partition now
+        if self._is_migrating() and not self._is_listed(game_room.game_room_id, last_status, game_room.prize_tier):
+            self._put_game_room_list(game_room)
+            return
+
+        # Move the game room to another partition if its status has been changed
+        if game_room.status == last_status:
+            game_room_list = self._get_game_room_list(last_status, game_room.prize_tier)
+            game_room_list[self._DDB_game_room_index[game_room.game_room_id]] = bytes(game_room)
+        else:
+            self._remove_game_room_list(game_room.game_room_id, last_status, game_room.prize_tier)
+            self._put_game_room_list(game_room)
+
+    def _remove_game_room_list(self, game_room_id: Address, status: str, tier: int):
+        if self._is_migrating() and not self._is_listed(game_room_id, status, tier):
+            return
+
+        # Move the last game room to the slot of removed one, so that the removal costs the same regardless of list size
+        game_room_list = self._get_game_room_list(status, tier)
+        index = self._DDB_game_room_index[game_room_id]
+        last_game_room = game_room_list.pop()
+        if index < len(game_room_list):
+            game_room_list[index] = last_game_room
+            self._DDB_game_room_index[GameRoom.from_bytes(last_game_room).game_room_id] = index
+        self._DDB_game_room_index.remove(game_room_id)
+
+    def _migrate_game_rooms(self, max_count: int) -> int:
+        # Move the game rooms of the legacy game room list to their partitions, with the status of their records
+        legacy_game_room_list = self._get_legacy_game_room_list()
+        migrated = 0
+        while migrated < max_count and len(legacy_game_room_list) > 0:
+            game_room_id = Address.from_string(json_loads(legacy_game_room_list.pop())['game_room_id'])
+            migrated += 1
+
+            # The game room may have been crashed, or put to its partition by a transaction since the update
+            game_room = self._DDB_game_room[game_room_id]
+            if game_room is None:
+                continue
+            game_room = GameRoom.from_bytes(game_room)
+            if not self._is_listed(game_room_id, game_room.status, game_room.prize_tier):
+                self._put_game_room_list(game_room)
+                # The games started by the previous version are finalized by finalizeExpired as well
+                if game_room.active:
+                    self._FDB_expiry_queue.put(encode_address(game_room_id) + encode_int(self._DDB_game_start_time[game_room_id]))
+        return migrated
+
+    def _get_match_queue(self, prize_per_game: int):
+        # (player, ticket) of players waiting for a match, per prize per game
+        return FifoDB(f'{self._MATCH_QUEUE}|{prize_per_game}', self._db, value_type=bytes)
+
+    def _get_ledger(self):
+        token_address = self._VDB_token_address.get()
+        if token_address is None:
+            return EmbeddedLedger(self._db, self.address, self.Transfer)
+        return ChipLedger(self.create_interface_score(token_address, ChipInterface))
+
+    def _get_player_results(self, player: Address):
+        # IDs of the results of games which the player has played, from the oldest one
+        return FifoDB(f'{self._PLAYER_RESULTS}|{player}', self._db, value_type=int)
+
+    def _get_room_results(self, game_room_id: Address):
+        # IDs of the results of games played in the game room, from the oldest one
+        return FifoDB(f'{self._ROOM_RESULTS}|{game_room_id}', self._db, value_type=int)
+
+    @external(readonly=True)
+    def name(self) -> str:
+        return NAME
+
+    @external(readonly=True)
+    def symbol(self) -> str:
+        return SYMBOL
+
+    @external(readonly=True)
+    def decimals(self) -> int:
+        return self._get_ledger().decimals()
 
-    def _bet(self, bet_from: Address, amount: int):
-        chip = self.create_interface_score(self._VDB_token_address.get(), ChipInterface)
-        chip.bet(bet_from, self.address, amount)
+    @external(readonly=True)
+    def totalSupply(self) -> int:
+        return self._get_ledger().total_supply()
 
     @external(readonly=True)
-    def balanceOf(self) -> int:
-        chip = self.create_interface_score(self._VDB_token_address.get(), ChipInterface)
-        return chip.balanceOf(self.msg.sender)
+    def balanceOf(self, _owner: Address = None) -> int:
+        """
+        :param _owner: The owner of Chips. (default : the sender)
+        :return: The amount of chips owned by _owner
+        """
+        return self._get_ledger().balance_of(self.msg.sender if _owner is None else _owner)
+
+    @external(readonly=True)
+    def multicall(self, _calls: str) -> list:
+        """
+        Calls the readonly methods in _MULTICALL_METHODS at once.
+
+        :param _calls: JSON list of {"method": name of method, "params": {name of param: value}}. (Up to 100 calls)
+        :return: The results of calls, in the order of calls
+        """
+        return [getattr(self, method)(**params) for method, params in decode_calls(_calls, self._MULTICALL_METHODS)]
 
     @external(readonly=True)
     def showGameRoomList(self) -> list:
         response = []
-        game_room_list = self._get_game_room_list()
 
-        for game_room in game_room_list:
-            game_room_dict = json_loads(game_room)
-            game_room_id = game_room_dict['game_room_id']
-            creation_time = game_room_dict['creation_time']
-            prize_per_game = game_room_dict['prize_per_game']
-            participants = game_room_dict['participants']
-            room_has_vacant_seat = "is Full" if len(participants) > 1 else "has a vacant seat"
-            response.append(f"{game_room_id} : ({len(participants)} / 2). The room {room_has_vacant_seat}. Prize : {prize_per_game}. Creation time : {creation_time}")
+        for game_room_list in self._iter_game_room_lists():
+            for game_room in game_room_list:
+                game_room = GameRoom.from_bytes(game_room)
+                participants = game_room.participants
+                room_has_vacant_seat = "is Full" if game_room.is_full else "has a vacant seat"
+                response.append(f"{game_room.game_room_id} : ({len(participants)} / {game_room.seats}). The room {room_has_vacant_seat}. "
+                                f"Prize : {game_room.prize_per_game}. Creation time : {game_room.creation_time}")
 
         return response
 
+    @external(readonly=True)
+    def getGameRoomList(self, _offset: int = 0, _limit: int = 20, _vacantOnly: bool = False,
+                        _prizeMin: int = None, _prizeMax: int = None, _active: bool = None) -> dict:
+        """
+        Paginated & filtered lobby query.
+
+        :param _offset: The position to start scanning from, over the partitions matching the filters
+        :param _limit: The maximum number of game rooms to return. (Capped at _MAX_ROOMS_PER_PAGE)
+        :param _vacantOnly: If True, only the game rooms which have a vacant seat are returned
+        :param _prizeMin: The minimum prize per game (inclusive)
+        :param _prizeMax: The maximum prize per game (inclusive)
+        :param _active: If set, only the game rooms with the equivalent active status are returned
+        :return: 'rooms' : list of game rooms, 'next' : offset to continue scanning from with the same filters. (-1 if there are no more rooms)
+        """
+        if _offset < 0 or _limit < 1:
+            revert("Offset must not be negative and limit must be positive")
+        limit = min(_limit, self._MAX_ROOMS_PER_PAGE)
+
+        # Only the partitions which can contain the matching game rooms are scanned
+        if _active is None:
+            statuses = STATUSES
+        else:
+            statuses = (PLAYING,) if _active else (OPEN, FULL)
+        if _vacantOnly:
+            statuses = tuple(status for status in statuses if status == OPEN)
+        tier_min = 0 if _prizeMin is None or _prizeMin < 0 else prize_tier(_prizeMin)
+        tier_max = None if _prizeMax is None else prize_tier(max(_prizeMax, 0))
+
+        rooms = []
+        scanned = 0
+        # 'position' is the offset of the first game room of current partition, over all the scanned partitions
+        position = 0
+        for game_room_list in self._iter_game_room_lists(statuses, tier_min, tier_max):
+            game_room_list_length = len(game_room_list)
+            if position + game_room_list_length <= _offset:
+                position += game_room_list_length
+                continue
+
+            index = max(_offset - position, 0)
+            while index < game_room_list_length:
+                # Stop scanning after _MAX_ROOMS_TO_SCAN rooms even if the page is not filled, and let the client continue from 'next'
+                if len(rooms) >= limit or scanned >= self._MAX_ROOMS_TO_SCAN:
+                    return {
+                        'rooms': rooms,
+                        'next': position + index
+                    }
+
+                game_room = GameRoom.from_bytes(game_room_list[index])
+                index += 1
+                scanned += 1
+
+                if _prizeMin is not None and game_room.prize_per_game < _prizeMin:
+                    continue
+                if _prizeMax is not None and game_room.prize_per_game > _prizeMax:
+                    continue
+
+                rooms.append({
+                    'game_room_id': str(game_room.game_room_id),
+                    'creation_time': game_room.creation_time,
+                    'prize_per_game': game_room.prize_per_game,
+                    'participants': len(game_room.participants),
+                    'seats': game_room.seats,
+                    'active': game_room.active
+                })
+            position += game_room_list_length
+
+        return {
+            'rooms': rooms,
+            'next': -1
+        }
+
     @external
-    def createRoom(self, _prizePerGame: int = 10):
+    def createRoom(self, _prizePerGame: int = 10, _seats: int = DEFAULT_SEATS):
+        self._open_repository()
+
         # Check whether 'self.msg.sender' is now participating to game room or not
         if self._DDB_in_game_room[self.msg.sender] is not None:
             revert("You already joined to another room")
 
+        if _prizePerGame < 0:
+            revert("Prize per game must not be negative")
+
+        if not 2 <= _seats <= MAX_SEATS:
+            revert(f"The number of seats must be between 2 and {MAX_SEATS}")
+
         # Check whether the chip balance of 'self.msg.sender' exceeds the prize_per_game or not
-        chip = self.create_interface_score(self._VDB_token_address.get(), ChipInterface)
-        if chip.balanceOf(self.msg.sender) < _prizePerGame:
+        if self._get_ledger().balance_of(self.msg.sender) < _prizePerGame:
             revert("Set the prize not to exceed your balance")
 
-        # Create the game room & Get in to it & Set the prize_per_game value
-        game_room = GameRoom(self.msg.sender, self.msg.sender, self.block.height, _prizePerGame)
-        game_room.join(self.msg.sender)
-        self._DDB_game_room[self.msg.sender] = str(game_room)
+        self._create_game_room(self.msg.sender, _prizePerGame, _seats)
+        self._repository.flush()
+
+    def _create_game_room(self, owner: Address, prize_per_game: int, seats: int = DEFAULT_SEATS, guests: tuple = ()) -> GameRoom:
+        # Create the game room & Get the owner and guests in to it & Set the prize_per_game value
+        game_room = GameRoom(owner, owner, self.block.height, prize_per_game, _seats=seats)
+        self._repository.add_game_room(game_room)
+        for participant in (owner,) + tuple(guests):
+            self._seat(game_room, participant)
+        # List the game room once, with the status after all of them are seated
+        self._put_game_room_list(game_room)
+        return game_room
 
-        game_room_list = self._get_game_room_list()
-        game_room_list.put(str(game_room))
-        self._DDB_in_game_room[self.msg.sender] = self.msg.sender
+    def _join_game_room(self, game_room: GameRoom, participant: Address):
+        # Get in to the game room
+        last_status = game_room.status
+        self._seat(game_room, participant)
+        self._update_game_room_list(game_room, last_status)
 
-        # Initialize the deck of participant
-        new_deck = Deck()
-        self._DDB_deck[self.msg.sender] = str(new_deck)
-        new_hand = Hand()
-        self._DDB_hand[self.msg.sender] = str(new_hand)
+    def _seat(self, game_room: GameRoom, participant: Address):
+        game_room.join(participant)
+        self._DDB_in_game_room[participant] = game_room.game_room_id
 
-    def _crash_room(self, game_room_id: Address):
-        game_room_to_crash_dict = json_loads(self._DDB_game_room[game_room_id])
+        # Initialize the hand of participant & Leave the match queue
+        self._repository.add_hand(participant, Hand())
+        self._DDB_match_ticket.remove(participant)
 
-        game_room_to_crash = GameRoom(Address.from_string(game_room_to_crash_dict['owner']), Address.from_string(game_room_to_crash_dict['game_room_id']), game_room_to_crash_dict['creation_time'],
-                             game_room_to_crash_dict['prize_per_game'], game_room_to_crash_dict['participants'], game_room_to_crash_dict['active'])
+    def _crash_room(self, game_room_id: Address):
+        game_room_to_crash = self._repository.get_game_room(game_room_id)
         participants_to_escape = game_room_to_crash.participants
         for partcipant in participants_to_escape:
-            self._DDB_in_game_room.remove(Address.from_string(partcipant))
+            self._leave_game_room(partcipant)
+
+        self._DDB_game_start_time.remove(game_room_id)
+        self._repository.remove_game_room(game_room_id)
+        self._remove_game_room_list(game_room_id, game_room_to_crash.status, game_room_to_crash.prize_tier)
 
-        self._DDB_game_room.remove(game_room_id)
-        game_room_list = list(self._get_game_room_list())
-        game_room_list.remove(json_dumps(game_room_to_crash_dict))
-        for count in range(len(self._get_game_room_list())):
-            self._get_game_room_list().pop()
+    @external
+    def migrateGameRooms(self, _maxCount: int = 50):
+        """
+        Moves the game rooms of previous version, left by the update, to the lobby partitions. Anyone can call this method
+        until 'getLegacyGameRoomCount' returns 0. The game rooms not moved yet are not listed in the lobby.
 
-        for game_room in game_room_list:
-            self._get_game_room_list().put(game_room)
+        :param _maxCount: The maximum number of game rooms to move. (Capped at _MAX_ROOMS_TO_MIGRATE)
+        """
+        self._migrate_game_rooms(min(_maxCount, self._MAX_ROOMS_TO_MIGRATE))
+
+    @external(readonly=True)
+    def getLegacyGameRoomCount(self) -> int:
+        return len(self._get_legacy_game_room_list())
 
     @external
     def joinRoom(self, _gameRoomId: Address):
+        self._open_repository()
+
         # Check whether the game room with game_room_id is existent or not
-        if self._DDB_game_room[_gameRoomId] is "":
+        game_room = self._repository.get_game_room(_gameRoomId)
+        if game_room is None:
             revert(f"There is no game room which has equivalent id to {_gameRoomId}")
 
         # Check the participant is already joined to another game_room
         if self._DDB_in_game_room[self.msg.sender] is not None:
             revert(f"You already joined to another game room : {self._DDB_in_game_room[self.msg.sender]}")
 
-        game_room_dict = json_loads(self._DDB_game_room[_gameRoomId])
-        game_room = GameRoom(Address.from_string(game_room_dict['owner']), Address.from_string(game_room_dict['game_room_id']), game_room_dict['creation_time'],
-                             game_room_dict['prize_per_game'], game_room_dict['participants'], game_room_dict['active'])
-        game_room_list = self._get_game_room_list()
-
         # Check the chip balance of 'self.msg.sender' before getting in
-        chip = self.create_interface_score(self._VDB_token_address.get(), ChipInterface)
-        if chip.balanceOf(self.msg.sender) < game_room.prize_per_game:
+        if self._get_ledger().balance_of(self.msg.sender) < game_room.prize_per_game:
             revert(f"Not enough Chips to join this game room {_gameRoomId}. Require {game_room.prize_per_game} chips")
 
-        # Check the game room's participants. Max : 2
-        if len(game_room.participants) > 1:
+        # Check the vacant seat of game room
+        if game_room.is_full:
             revert(f"Full : Can not join to game room {_gameRoomId}")
 
-        # Get in to the game room
-        game_room.join(self.msg.sender)
-        self._DDB_in_game_room[self.msg.sender] = _gameRoomId
-        self._DDB_game_room[_gameRoomId] = str(game_room)
+        # The participants of the active game have been dealt already
+        if game_room.active:
+            revert(f"The game of game room {_gameRoomId} is not finalized yet")
+
+        self._join_game_room(game_room, self.msg.sender)
+        self._repository.flush()
+
+    @external
+    def queueForMatch(self, _prizePerGame: int = 10):
+        """
+        Pairs 'self.msg.sender' with the player waiting for the same prize per game, into a new game room.
+        The waiting player becomes the owner of game room. If nobody is waiting, 'self.msg.sender' waits in the queue.
+
+        :param _prizePerGame: The prize per game to play with
+        """
+        self._open_repository()
+
+        if self._DDB_in_game_room[self.msg.sender] is not None:
+            revert("You already joined to another room")
+        if self._DDB_match_ticket[self.msg.sender] != 0:
+            revert("You are already waiting for a match")
+        if _prizePerGame < 0:
+            revert("Prize per game must not be negative")
+        if self._get_ledger().balance_of(self.msg.sender) < _prizePerGame:
+            revert("Set the prize not to exceed your balance")
 
-        game_room_index_gen = (index for index in range(len(game_room_list)) if game_room.game_room_id == Address.from_string(json_loads(game_room_list[index])['game_room_id']))
+        match_queue = self._get_match_queue(_prizePerGame)
+        # Skip the stale entries until the first valid one, or until the queue is empty
+        for _ in range(self._MAX_MATCH_ENTRIES_TO_SCAN):
+            entry = match_queue.pop()
+            if entry is None:
+                break
+
+            reader = RecordReader(entry)
+            waiting_player = reader.read_address()
+            ticket = reader.read_int()
+            # The waiting player may have left the queue, joined another game room or spent the chips
+            if self._DDB_match_ticket[waiting_player] != ticket:
+                continue
+            if self._get_ledger().balance_of(waiting_player) < _prizePerGame:
+                self._DDB_match_ticket.remove(waiting_player)
+                continue
+
+            self._create_game_room(waiting_player, _prizePerGame, guests=(self.msg.sender,))
+            self._repository.flush()
+            return
+
+        # Nobody valid is waiting. Wait for the next player
+        ticket = self._VDB_last_match_ticket.get() + 1
+        self._VDB_last_match_ticket.set(ticket)
+        self._DDB_match_ticket[self.msg.sender] = ticket
+        match_queue.put(encode_address(self.msg.sender) + encode_int(ticket))
 
-        try:
-            index = next(game_room_index_gen)
-            game_room_list[index] = str(game_room)
-        except StopIteration:
-            pass
+    @external
+    def leaveMatchQueue(self):
+        if self._DDB_match_ticket[self.msg.sender] == 0:
+            revert("You are not waiting for a match")
+        # The entry of queue becomes stale, and is skipped when it is popped
+        self._DDB_match_ticket.remove(self.msg.sender)
 
-        # Initialize the deck & hand of participant
-        new_deck = Deck()
-        self._DDB_deck[self.msg.sender] = str(new_deck)
-        new_hand = Hand()
-        self._DDB_hand[self.msg.sender] = str(new_hand)
+    @external(readonly=True)
+    def getMatchQueueLength(self, _prizePerGame: int = 10) -> int:
+        """
+        :return: The number of entries in the match queue, including the stale ones
+        """
+        return len(self._get_match_queue(_prizePerGame))
 
     @external
     def escape(self):
+        self._open_repository()
+
         # Check whether 'self.msg.sender' is now participating to game room or not
         if self._DDB_in_game_room[self.msg.sender] is None:
             revert(f'No game room to escape')
 
         # Retrieve the game room ID & Check the game room status
         game_room_id_to_escape = self._DDB_in_game_room[self.msg.sender]
-        game_room_to_escape_dict = json_loads(self._DDB_game_room[game_room_id_to_escape])
-        game_room_to_escape = GameRoom(Address.from_string(game_room_to_escape_dict['owner']), Address.from_string(game_room_to_escape_dict['game_room_id']),
-                                       game_room_to_escape_dict['creation_time'], game_room_to_escape_dict['prize_per_game'],
-                                       game_room_to_escape_dict['participants'], game_room_to_escape_dict['active'])
+        game_room_to_escape = self._repository.get_game_room(game_room_id_to_escape)
 
         if game_room_to_escape.active:
             revert("The game is not finalized yet.")
@@ -219,56 +580,41 @@ class SampleGame(IconScoreBase):
         # Escape from the game room
         if game_room_to_escape.owner == self.msg.sender:
             if len(game_room_to_escape.participants) == 1:
-                game_room_to_escape.escape(self.msg.sender)
                 self._crash_room(game_room_id_to_escape)
             else:
                 revert("Owner can not escape from room which has the other participant")
         else:
+            last_status = game_room_to_escape.status
             game_room_to_escape.escape(self.msg.sender)
-            self._DDB_game_room[game_room_id_to_escape] = str(game_room_to_escape)
-
-        # Set the in_game_room status of 'self.msg.sender' to None
-        game_room_list = self._get_game_room_list()
-        game_room_index_gen = (index for index in range(len(game_room_list)) if game_room_to_escape.game_room_id == Address.from_string(json_loads(game_room_list[index])['game_room_id']))
+            self._update_game_room_list(game_room_to_escape, last_status)
+            self._leave_game_room(self.msg.sender)
 
-        try:
-            index = next(game_room_index_gen)
-            game_room_list[index] = str(game_room_to_escape)
-        except StopIteration:
-            pass
+        self._repository.flush()
 
-        self._DDB_in_game_room.remove(self.msg.sender)
+    def _leave_game_room(self, participant: Address):
+        # Set the in_game_room status of participant to None & Delete the state of participant kept for the game room
+        self._DDB_in_game_room.remove(participant)
+        self._DDB_deck.remove(participant)
+        self._DDB_ready.remove(participant)
+        self._repository.remove_hand(participant)
 
     def _ban(self, game_room_id: Address, participant_to_ban: Address):
         # 방장인 경우 참여인원 모두 나가고 게임방 삭제
         # 게임 룸 정보에서 삭제
         # 게임룸 리스트에 변경사항 반영
-        game_room_dict = json_loads(self._DDB_game_room[game_room_id])
-        game_room = GameRoom(Address.from_string(game_room_dict['owner']), Address.from_string(game_room_dict['game_room_id']), game_room_dict['creation_time'],
-                             game_room_dict['prize_per_game'], game_room_dict['participants'], game_room_dict['active'])
+        game_room = self._repository.get_game_room(game_room_id)
         if game_room.owner == participant_to_ban:
-            # 방 폭파
-            for participant in game_room.participants:
-                self._DDB_in_game_room.remove(Address.from_string(participant))
-                game_room.escape(Address.from_string(participant))
+            # 방 폭파 : 참여인원의 in_game_room 정보는 _crash_room 에서 삭제
             self._crash_room(game_room_id)
         else:
+            last_status = game_room.status
             game_room.escape(participant_to_ban)
-            self._DDB_game_room[game_room_id] = str(game_room)
-            self._DDB_in_game_room.remove(participant_to_ban)
-            game_room_list = self._get_game_room_list()
-            game_room_index_gen = (index for index in range(len(game_room_list)) if game_room.game_room_id == Address.from_string(json_loads(game_room_list[index])['game_room_id']))
-
-            try:
-                index = next(game_room_index_gen)
-                game_room_list[index] = str(game_room)
-            except StopIteration:
-                pass
+            self._leave_game_room(participant_to_ban)
+            self._update_game_room_list(game_room, last_status)
 
     @external(readonly=True)
     def getChipBalance(self) -> int:
-        chip = self.create_interface_score(self._VDB_token_address.get(), ChipInterface)
-        return chip.balanceOf(self.msg.sender)
+        return self._get_ledger().balance_of(self.msg.sender)
 
     @external
     def toggleReady(self):
@@ -281,10 +627,12 @@ class SampleGame(IconScoreBase):
 
     @external
     def gameStart(self):
+        self._open_repository()
+
         game_room_id = self._DDB_in_game_room[self.msg.sender]
-        game_room_dict = json_loads(self._DDB_game_room[game_room_id])
-        game_room = GameRoom(Address.from_string(game_room_dict['owner']), Address.from_string(game_room_dict['game_room_id']), game_room_dict['creation_time'],
-                             game_room_dict['prize_per_game'], game_room_dict['participants'], game_room_dict['active'])
+        if game_room_id is None:
+            revert("Enter the game room first.")
+        game_room = self._repository.get_game_room(game_room_id)
         participants = game_room.participants
 
         # Check the 'self.msg.sender' == game_room.owner
@@ -300,152 +648,425 @@ class SampleGame(IconScoreBase):
 
         # Make sure that all the participants are ready
         for participant in participants:
-            if not self._DDB_ready[Address.from_string(participant)]:
+            if not self._DDB_ready[participant]:
                 revert(f"{participant} is not ready to play game")
 
-        for participant in participants:
-            self._bet(bet_from=Address.from_string(participant), amount=game_room.prize_per_game)
+        # Collect the stakes of all participants in a single call
+        self._get_ledger().collect_stakes(participants, game_room.prize_per_game)
 
         # Game start
+        last_status = game_room.status
         game_room.game_start()
         self._DDB_game_start_time[game_room_id] = self.block.height
-        self._DDB_game_room[game_room_id] = str(game_room)
+        self._FDB_expiry_queue.put(encode_address(game_room_id) + encode_int(self.block.height))
+        self._update_game_room_list(game_room, last_status)
 
         # Set ready status of both participants to False after starting the game
+        # Shuffle a new deck with the seed of this game, and empty the hand for each participant
         for participant in participants:
-            self._DDB_ready[Address.from_string(participant)] = False
+            self._DDB_ready[participant] = False
+            self._DDB_deck[participant] = bytes(Deck(sha3_256(self.tx.hash + participant.to_bytes())))
+            self._repository.add_hand(participant, Hand())
+
+        self._repository.flush()
 
     @external(readonly=True)
     def showMine(self) -> str:
         hand = self._DDB_hand[self.msg.sender]
-        return hand
+        if hand is None:
+            return ""
+        return str(Hand.from_bytes(hand))
+
+    @external(readonly=True)
+    def getGameState(self, _gameRoomId: Address) -> dict:
+        """
+        Returns the state of game room in a single call, for clients to render the table.
+
+        :param _gameRoomId: The game room to query
+        :return: The game room & the state of each participant & the hand of 'self.msg.sender' if seated.
+                 'blocks_until_expiry' is -1 if the game is not active
+        """
+        game_room = self._DDB_game_room[_gameRoomId]
+        if game_room is None:
+            revert(f"There is no game room which has equivalent id to {_gameRoomId}")
+        game_room = GameRoom.from_bytes(game_room)
+
+        blocks_until_expiry = -1
+        if game_room.active:
+            blocks_until_expiry = max(self._expiry_height(_gameRoomId) - self.block.height, 0)
+
+        players = []
+        my_hand = {}
+        for participant in game_room.participants:
+            stored_hand = self._DDB_hand[participant]
+            hand = Hand() if stored_hand is None else Hand.from_bytes(stored_hand)
+            players.append({
+                'player': str(participant),
+                'ready': self._DDB_ready[participant],
+                'fix': hand.fix,
+                'cards': len(hand.cards)
+            })
+            if participant == self.msg.sender:
+                my_hand = hand.to_dict()
+
+        return {
+            'game_room_id': str(game_room.game_room_id),
+            'owner': str(game_room.owner),
+            'creation_time': game_room.creation_time,
+            'prize_per_game': game_room.prize_per_game,
+            'active': game_room.active,
+            'blocks_until_expiry': blocks_until_expiry,
+            'seats': game_room.seats,
+            'players': players,
+            'my_hand': my_hand
+        }
 
     @external
     def hit(self):
+        self._hit(1)
+
+    @external
+    def hitMany(self, _count: int):
+        """
+        Draws up to '_count' cards in a single transaction, with the same rules as 'hit'.
+        Drawing stops early when the hand has 5 cards or exceeds 21.
+
+        :param _count: The number of cards to draw. (1 ~ 5)
+        """
+        if not 1 <= _count <= MAX_CARDS:
+            revert(f"Count must be between 1 and {MAX_CARDS}")
+        self._hit(_count)
+
+    @external
+    def hitUntil(self, _threshold: int, _fix: bool = False):
+        """
+        Draws cards until the value of hand reaches '_threshold', with the same rules as 'hit'.
+        Drawing stops early when the hand has 5 cards or exceeds 21.
+
+        :param _threshold: The value of hand to stop drawing at. (1 ~ 21)
+        :param _fix: If True, fix the hand after drawing
+        """
+        if not 1 <= _threshold <= 21:
+            revert("Threshold must be between 1 and 21")
+        self._hit(MAX_CARDS, _threshold, _fix)
+
+    def _hit(self, count: int, threshold: int = None, fix: bool = False):
+        self._open_repository()
+
         game_room_id = self._DDB_in_game_room[self.msg.sender]
         if game_room_id is None:
             revert("You are not in game")
 
-        game_room_dict = json_loads(self._DDB_game_room[game_room_id])
-        game_room = GameRoom(Address.from_string(game_room_dict['owner']), Address.from_string(game_room_dict['game_room_id']), game_room_dict['creation_time'],
-                             game_room_dict['prize_per_game'], game_room_dict['participants'], game_room_dict['active'])
+        game_room = self._repository.get_game_room(game_room_id)
 
         # Check whether the game is in active mode or not
         if not game_room.active:
             revert("The game is now in inactive mode")
 
         # Hit and adjust the status of deck & hand
-        deck_dict = json_loads(self._DDB_deck[self.msg.sender])
-        deck = Deck(deck_dict['deck'])
-        hand_dict = json_loads(self._DDB_hand[self.msg.sender])
-        hand = Hand(hand_dict['cards'], hand_dict['value'], hand_dict['aces'], hand_dict['fix'])
+        deck = Deck.from_bytes(self._DDB_deck[self.msg.sender])
+        hand = self._repository.get_hand(self.msg.sender)
 
         # Check if the participant has already fixed hands
         if hand.fix:
             revert('You already fixed your hand')
 
-        if len(hand.cards) == 4:
-            hand.fix = True
+        drawn = 0
+        for _ in range(count):
+            if hand.fix or (threshold is not None and hand.value >= threshold):
+                break
+
+            if len(hand.cards) == MAX_CARDS - 1:
+                hand.fix = True
+
+            hand.add_card(deck.deal(self.block.timestamp, self.msg.sender))
+            drawn += 1
+            # The hand exceeding 21 can not hit anymore
+            if hand.value > 21:
+                hand.fix = True
 
-        hand.add_card(deck.deal(self.block.timestamp, self.msg.sender))
-        hand.adjust_for_ace()
-        self._DDB_deck[self.msg.sender] = str(deck)
-        self._DDB_hand[self.msg.sender] = str(hand)
-        self.Hit(self.msg.sender, game_room_id)
+        # The hand has reached the threshold already. Nothing is drawn, and nothing is written
+        if drawn == 0 and not fix:
+            return
 
-        # Check whether the fix status of all participants are True. And, If participant 'hand.value' exceeds 21, finalize the game. & Game must be finalized.
-        if self._check_participants_fix(game_room_id) or hand.value > 21 or self.block.height - self._DDB_game_start_time[game_room_id] > 60:
+        if drawn > 0:
+            self._DDB_deck[self.msg.sender] = bytes(deck)
+            self.Hit(self.msg.sender, game_room_id)
+
+        if fix and not hand.fix:
+            hand.fix = True
+            self.Fix(self.msg.sender, game_room_id)
+
+        # Check whether the fix status of all participants are True. & Game must be finalized.
+        if self._check_participants_fix(game_room_id) or self._is_expired(game_room_id):
             self.calculate(game_room_id)
 
+        self._repository.flush()
+
+    def _expiry_height(self, game_room_id: Address) -> int:
+        # The first block height at which the game is expired
+        return self._DDB_game_start_time[game_room_id] + self._GAME_EXPIRY_BLOCKS + 1
+
+    def _is_expired(self, game_room_id: Address) -> bool:
+        return self.block.height >= self._expiry_height(game_room_id)
+
+    @external
+    def finalizeExpired(self, _maxRooms: int = 10):
+        """
+        Finalizes the oldest expired games. Anyone can call this method to settle the abandoned games.
+
+        :param _maxRooms: The maximum number of started games to examine. (Capped at _MAX_ROOMS_TO_FINALIZE)
+        """
+        self._open_repository()
+
+        for _ in range(min(_maxRooms, self._MAX_ROOMS_TO_FINALIZE)):
+            entry = self._FDB_expiry_queue.peek()
+            if entry is None:
+                break
+
+            # Skip the game which has been finalized already
+            game_room_id = self._get_active_game(entry)
+            if game_room_id is not None and not self._is_expired(game_room_id):
+                # The rest of games in the queue have started later
+                break
+            self._FDB_expiry_queue.pop()
+            if game_room_id is not None:
+                self.calculate(game_room_id)
+
+        self._repository.flush()
+
+    def _get_active_game(self, expiry_queue_entry: bytes):
+        # The game room ID of the entry of expiry queue, if the game of it is not finalized yet
+        reader = RecordReader(expiry_queue_entry)
+        game_room_id = reader.read_address()
+        game_start_time = reader.read_int()
+        game_room = self._repository.get_game_room(game_room_id)
+        if game_room is not None and game_room.active and self._DDB_game_start_time[game_room_id] == game_start_time:
+            return game_room_id
+        return None
+
+    def _drop_finalized_games(self, max_count: int):
+        # Drop the entries of finalized games at the head of expiry queue, so that it does not grow at steady traffic
+        for _ in range(max_count):
+            entry = self._FDB_expiry_queue.peek()
+            if entry is None or self._get_active_game(entry) is not None:
+                break
+            self._FDB_expiry_queue.pop()
+
     def _check_participants_fix(self, game_room_id: Address) -> bool:
-        game_room_dict = json_loads(self._DDB_game_room[game_room_id])
-        game_room = GameRoom(Address.from_string(game_room_dict['owner']), Address.from_string(game_room_dict['game_room_id']), game_room_dict['creation_time'],
-                             game_room_dict['prize_per_game'], game_room_dict['participants'], game_room_dict['active'])
+        game_room = self._repository.get_game_room(game_room_id)
         participants = game_room.participants
 
+        # The game is also over when only one hand not exceeding 21 is left. The hand wins regardless of its value
+        all_fixed = True
+        standing = 0
         for participant in participants:
-            hand_dict = json_loads(self._DDB_hand[Address.from_string(participant)])
-            hand = Hand(hand_dict['cards'], hand_dict['value'], hand_dict['aces'], hand_dict['fix'])
+            hand = self._repository.get_hand(participant)
+            if hand.value <= 21:
+                standing += 1
             if not hand.fix:
-                return False
+                all_fixed = False
 
-        return True
+        return all_fixed or standing <= 1
 
     @external
     def fix(self):
+        self._open_repository()
+
         game_room_id = self._DDB_in_game_room[self.msg.sender]
-        hand_dict = json_loads(self._DDB_hand[self.msg.sender])
-        hand = Hand(hand_dict['cards'], hand_dict['value'], hand_dict['aces'], hand_dict['fix'])
+        if game_room_id is None:
+            revert("You are not in game")
+
+        # A finalized game must not be calculated again
+        if not self._repository.get_game_room(game_room_id).active:
+            revert("The game is now in inactive mode")
+
+        hand = self._repository.get_hand(self.msg.sender)
+        if hand.fix:
+            revert('You already fixed your hand')
 
         hand.fix = True
-        self._DDB_hand[self.msg.sender] = str(hand)
         self.Fix(self.msg.sender, game_room_id)
 
-        if self._check_participants_fix(game_room_id) or self.block.height - self._DDB_game_start_time[game_room_id] > 60:
+        if self._check_participants_fix(game_room_id) or self._is_expired(game_room_id):
             self.calculate(game_room_id)
             self.Calculate(game_room_id)
 
+        self._repository.flush()
+
     def calculate(self, game_room_id: Address = None):
         self.Calculate(game_room_id)
-        chip = self.create_interface_score(self._VDB_token_address.get(), ChipInterface)
 
         # Finalize the game
         self._game_stop(game_room_id)
 
-        # Calculate the result
-        game_room_dict = json_loads(self._DDB_game_room[game_room_id])
-        game_room = GameRoom(Address.from_string(game_room_dict['owner']), Address.from_string(game_room_dict['game_room_id']), game_room_dict['creation_time'],
-                             game_room_dict['prize_per_game'], game_room_dict['participants'], game_room_dict['active'])
-        participants = game_room.participants
-        participant_gen = (participant for participant in participants)
-        first_participant = next(participant_gen)
-        first_hand_dict = json_loads(self._DDB_hand[Address.from_string(first_participant)])
-        first_hand = Hand(first_hand_dict['cards'], first_hand_dict['value'], first_hand_dict['aces'], first_hand_dict['fix'])
-        second_participant = next(participant_gen)
-        second_hand_dict = json_loads(self._DDB_hand[Address.from_string(second_participant)])
-        second_hand = Hand(second_hand_dict['cards'], second_hand_dict['value'], second_hand_dict['aces'], second_hand_dict['fix'])
-
-        results = self._get_results()
-        loser = ""
-        if first_hand.value > 21 or second_hand.value > 21:
-            chip.transfer(Address.from_string(first_participant), game_room.prize_per_game * 2) if second_hand.value > 21 else chip.transfer(Address.from_string(second_participant), game_room.prize_per_game * 2)
-            results.put(f"{first_participant} wins against {second_participant}.") if second_hand.value > 21 else results.put(f"{second_participant} wins against {first_participant}.")
-            loser = first_participant if first_hand.value > 21 else second_participant
-        elif first_hand.value > second_hand.value:
-            chip.transfer(Address.from_string(first_participant), game_room.prize_per_game * 2)
-            results.put(f"{first_participant} wins against {second_participant}.")
-            loser = second_participant
-        elif first_hand.value < second_hand.value:
-            chip.transfer(Address.from_string(second_participant), game_room.prize_per_game * 2)
-            results.put(f"{second_participant} wins against {first_participant}.")
-            loser = first_participant
-        else:
-            chip.transfer(Address.from_string(first_participant), game_room.prize_per_game)
-            chip.transfer(Address.from_string(second_participant), game_room.prize_per_game)
-            results.put(f"Draw!! {first_participant}, {second_participant}.")
-
-        if loser != "" and game_room.prize_per_game > chip.balanceOf(Address.from_string(loser)):
-            self._ban(game_room_id, Address.from_string(loser))
+        # Calculate the result in a single pass. The best value not exceeding 21 wins, and the ties split the pot
+        game_room = self._repository.get_game_room(game_room_id)
+        participants = list(game_room.participants)
+        values = [self._repository.get_hand(participant).value for participant in participants]
+        result_id = self._VDB_last_result_id.get() + 1
+        result = Result(result_id, game_room_id, self.block.height, game_room.prize_per_game, participants, values)
+        winners = result.winners
+
+        # The remainder of split pot goes to the winners in order of seat
+        share, remainder = divmod(game_room.prize_per_game * len(participants), len(winners))
+        payouts = [0] * len(participants)
+        for rank, index in enumerate(winners):
+            payouts[index] = share + 1 if rank < remainder else share
+        result.payouts = payouts
+
+        # Record the result & Index it for each participant and the game room. The event keeps the full record for off-chain archives
+        self._VDB_last_result_id.set(result_id)
+        self._DDB_result[result_id] = bytes(result)
+        for participant in participants:
+            self._get_player_results(participant).put(result_id)
+            # The deck is shuffled again when the next game starts
+            self._DDB_deck.remove(participant)
+        self._get_room_results(game_room_id).put(result_id)
+        self.GameResult(result_id, game_room_id, bytes(result))
+        self._prune_results(self._RESULTS_TO_PRUNE_PER_GAME)
+        self._drop_finalized_games(self._RESULTS_TO_PRUNE_PER_GAME)
+
+        # Pay out the prize & Get the balances after settlement in a single call
+        balances = self._get_ledger().payout(participants, payouts)
+        participants_to_ban = [participant for participant, balance in zip(participants, balances) if balance < game_room.prize_per_game]
+        # Banning the owner crashes the game room, and all participants leave it
+        if game_room.owner in participants_to_ban:
+            participants_to_ban = [game_room.owner]
+        for participant in participants_to_ban:
+            self._ban(game_room_id, participant)
 
     def _game_stop(self, game_room_id):
-        game_room_dict = json_loads(self._DDB_game_room[game_room_id])
-        game_room = GameRoom(Address.from_string(game_room_dict['owner']), Address.from_string(game_room_dict['game_room_id']), game_room_dict['creation_time'],
-                             game_room_dict['prize_per_game'], game_room_dict['participants'], game_room_dict['active'])
+        game_room = self._repository.get_game_room(game_room_id)
+        last_status = game_room.status
         game_room.game_stop()
-        self._DDB_game_room[game_room_id] = str(game_room)
+        self._update_game_room_list(game_room, last_status)
 
     @external(readonly=True)
-    def getResults(self) -> list:
-        return list(self._get_results())
+    def getResults(self, _offset: int = 0, _limit: int = 20) -> list:
+        """
+        :param _offset: The number of latest results to skip
+        :param _limit: The maximum number of results to return. (Capped at _MAX_RESULTS_PER_PAGE)
+        :return: The summaries of the latest results of all games, from the newest one
+        """
+        if _offset < 0 or _limit < 1:
+            revert("Offset must not be negative and limit must be positive")
+        limit = min(_limit, self._MAX_RESULTS_PER_PAGE)
+
+        last_result_id = self._VDB_last_result_id.get() - _offset
+        first_result_id = max(last_result_id - limit, self._VDB_last_pruned_result_id.get())
+        return [str(Result.from_bytes(self._DDB_result[result_id])) for result_id in range(last_result_id, first_result_id, -1)]
+
+    @external(readonly=True)
+    def getResultsFor(self, _player: Address, _offset: int = 0, _limit: int = 20) -> dict:
+        """
+        Returns the results of games which '_player' has played, from the newest one.
+
+        :param _player: The player to query
+        :param _offset: The number of latest results to skip
+        :param _limit: The maximum number of results to return. (Capped at _MAX_RESULTS_PER_PAGE)
+        :return: 'results' : list of results, 'next' : offset to continue from. (-1 if there are no more results)
+        """
+        return self._get_result_page(self._get_player_results(_player), _offset, _limit)
+
+    @external(readonly=True)
+    def getRoomResults(self, _gameRoomId: Address, _offset: int = 0, _limit: int = 20) -> dict:
+        """
+        Returns the results of games played in the game room, from the newest one.
+
+        :param _gameRoomId: The game room to query
+        :param _offset: The number of latest results to skip
+        :param _limit: The maximum number of results to return. (Capped at _MAX_RESULTS_PER_PAGE)
+        :return: 'results' : list of results, 'next' : offset to continue from. (-1 if there are no more results)
+        """
+        return self._get_result_page(self._get_room_results(_gameRoomId), _offset, _limit)
+
+    @external
+    def setResultRetention(self, _resultsToKeep: int = 0, _retentionBlocks: int = 0):
+        """
+        Sets the retention window of results. Results out of the window are pruned in bounded batches.
+
+        :param _resultsToKeep: The number of latest results to keep. (0 : _DEFAULT_RESULTS_TO_KEEP)
+        :param _retentionBlocks: Results older than this number of blocks are pruned. (0 : no limit)
+        """
+        if self.msg.sender != self.owner:
+            revert("Only owner of SCORE can set the retention of results")
+        if _resultsToKeep < 0 or _retentionBlocks < 0:
+            revert("Retention must not be negative")
+
+        self._VDB_results_to_keep.set(_resultsToKeep)
+        self._VDB_result_retention_blocks.set(_retentionBlocks)
+
+    @external(readonly=True)
+    def getResultRetention(self) -> dict:
+        return {
+            'results_to_keep': self._VDB_results_to_keep.get() or self._DEFAULT_RESULTS_TO_KEEP,
+            'retention_blocks': self._VDB_result_retention_blocks.get(),
+            'first_result_id': self._VDB_last_pruned_result_id.get() + 1,
+            'last_result_id': self._VDB_last_result_id.get()
+        }
+
+    @external
+    def pruneResults(self, _maxCount: int = 10):
+        """
+        Prunes the oldest results out of the retention window. Anyone can call this method.
+
+        :param _maxCount: The maximum number of results to prune. (Capped at _MAX_RESULTS_TO_PRUNE)
+        """
+        self._prune_results(min(_maxCount, self._MAX_RESULTS_TO_PRUNE))
+
+    def _prune_results(self, max_count: int):
+        last_result_id = self._VDB_last_result_id.get()
+        results_to_keep = self._VDB_results_to_keep.get() or self._DEFAULT_RESULTS_TO_KEEP
+        retention_blocks = self._VDB_result_retention_blocks.get()
+
+        pruned = 0
+        last_pruned_result_id = self._VDB_last_pruned_result_id.get()
+        while pruned < max_count and last_pruned_result_id < last_result_id:
+            result_id = last_pruned_result_id + 1
+            result = Result.from_bytes(self._DDB_result[result_id])
+            # The rest of results are newer than this one
+            if last_result_id - result_id < results_to_keep and \
+                    (retention_blocks == 0 or self.block.height - result.block_height <= retention_blocks):
+                break
+
+            # The oldest result is at the head of every index containing it
+            for participant in result.participants:
+                self._get_player_results(participant).pop()
+            self._get_room_results(result.game_room_id).pop()
+            self._DDB_result.remove(result_id)
+            last_pruned_result_id = result_id
+            pruned += 1
+        self._VDB_last_pruned_result_id.set(last_pruned_result_id)
+
+        # Spend the rest of the batch on the results of previous version
+        legacy_results = ArrayDB(self._LEGACY_RESULTS, self._db, value_type=str)
+        while pruned < max_count and len(legacy_results) > 0:
+            legacy_results.pop()
+            pruned += 1
+
+    def _get_result_page(self, result_ids: FifoDB, offset: int, limit: int) -> dict:
+        if offset < 0 or limit < 1:
+            revert("Offset must not be negative and limit must be positive")
+        limit = min(limit, self._MAX_RESULTS_PER_PAGE)
+
+        results = []
+        index = len(result_ids) - 1 - offset
+        while index >= 0 and len(results) < limit:
+            results.append(Result.from_bytes(self._DDB_result[result_ids[index]]).to_dict())
+            index -= 1
+
+        return {
+            'results': results,
+            'next': offset + len(results) if index >= 0 else -1
+        }
 
     @external
     @payable
     def mintChips(self):
-        chip = self.create_interface_score(self._VDB_token_address.get(), ChipInterface)
-        chip.mint(self.msg.value)
+        self._get_ledger().mint(self.msg.sender, self.msg.value)
 
     @external
     def exchange(self, amount: int):
-        chip = self.create_interface_score(self._VDB_token_address.get(), ChipInterface)
-        chip.burn(amount)
+        self._get_ledger().burn(self.msg.sender, amount)
         self.icx.transfer(self.msg.sender, amount)
\ No newline at end of file
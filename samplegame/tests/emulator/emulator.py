@@ -0,0 +1,288 @@
+import importlib
+import importlib.util
+import json
+import os
+import sys
+
+from . import runtime
+from .runtime import Address, AddressPrefix, IconScoreDatabase, IconScoreException, revert, sha3_256
+
+# The interval of block timestamps in microseconds
+BLOCK_INTERVAL = 2_000_000
+
+# SCORE classes loaded with the runtime, by the path of SCORE project
+_score_classes = {}
+
+
+def load_score(project_path: str) -> type:
+    """
+    Imports the SCORE project with the runtime of emulator as 'iconservice', under a separate package name.
+    The modules imported with iconservice, if any, are not affected.
+
+    :param project_path: The directory of SCORE project, which has package.json
+    :return: The main SCORE class
+    """
+    project_path = os.path.abspath(project_path)
+    if project_path in _score_classes:
+        return _score_classes[project_path]
+
+    with open(os.path.join(project_path, 'package.json')) as package_json:
+        package = json.load(package_json)
+
+    package_name = f'_emulated_{os.path.basename(project_path)}'
+    iconservice = sys.modules.get('iconservice')
+    sys.modules['iconservice'] = runtime
+    try:
+        spec = importlib.util.spec_from_file_location(package_name, os.path.join(project_path, '__init__.py'),
+                                                      submodule_search_locations=[project_path])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[package_name] = module
+        spec.loader.exec_module(module)
+        main_module = importlib.import_module(f"{package_name}.{package['main_file']}")
+    finally:
+        if iconservice is None:
+            del sys.modules['iconservice']
+        else:
+            sys.modules['iconservice'] = iconservice
+
+    _score_classes[project_path] = getattr(main_module, package['main_score'])
+    return _score_classes[project_path]
+
+
+class Message:
+
+    def __init__(self, sender: Address, value: int):
+        self.sender = sender
+        self.value = value
+
+
+class Transaction:
+
+    def __init__(self, origin: Address, tx_hash: bytes, timestamp: int):
+        self.origin = origin
+        self.hash = tx_hash
+        self.index = 0
+        self.timestamp = timestamp
+
+
+class Block:
+
+    def __init__(self, height: int, timestamp: int):
+        self.height = height
+        self.hash = sha3_256(height.to_bytes(8, 'big'))
+        self.timestamp = timestamp
+
+
+class Context:
+
+    def __init__(self):
+        self.msg = None
+        self.tx = None
+        self.block = Block(0, 0)
+
+
+class Emulator:
+    """
+    Runs SCOREs in process with in-memory storage. Every transaction makes a new block.
+    A failed transaction undoes all the writes & ICX transfers of it, including the ones of inter-SCORE calls.
+
+    :param strict: If True, the errors other than revert are raised after undoing the transaction, instead of failing it
+    """
+    # Steps per byte of storage access, as in the step costs of ICON governance. Only the storage steps are counted
+    STORAGE_STEP_COSTS = {
+        'get': 25,
+        'set': 320,
+        'replace': 80,
+        'delete': -240
+    }
+
+    def __init__(self, strict: bool = True):
+        self.strict = strict
+        self.context = Context()
+        self._scores = {}
+        self._databases = {}
+        self._balances = {}
+        self._wallet_count = 0
+        # (storage, key, previous value) of writes in the current transaction
+        self._journal = None
+        self._event_logs = []
+        self._readonly = False
+        # Storage steps used by the current transaction
+        self._storage_steps = None
+
+    # State
+
+    def write(self, items: dict, key, value):
+        if self._readonly:
+            raise IconScoreException("No permission to write in readonly call")
+        if self._journal is not None:
+            self._journal.append((items, key, items.get(key)))
+        if value is None:
+            items.pop(key, None)
+        else:
+            items[key] = value
+
+    def charge(self, step_type: str, size: int):
+        if self._storage_steps is not None:
+            self._storage_steps += self.STORAGE_STEP_COSTS[step_type] * size
+
+    def _undo(self):
+        for items, key, value in reversed(self._journal):
+            if value is None:
+                items.pop(key, None)
+            else:
+                items[key] = value
+
+    def get_balance(self, address: Address) -> int:
+        return self._balances.get(address, 0)
+
+    def transfer_icx(self, addr_from: Address, addr_to: Address, amount: int):
+        if amount < 0 or self.get_balance(addr_from) < amount:
+            revert(f"Out of balance : {addr_from}")
+        self.write(self._balances, addr_from, self.get_balance(addr_from) - amount)
+        self.write(self._balances, addr_to, self.get_balance(addr_to) + amount)
+
+    def emit(self, score_address: Address, signature: str, indexed: list, data: list):
+        self._event_logs.append({
+            'scoreAddress': score_address,
+            'indexed': [signature] + indexed,
+            'data': data
+        })
+
+    def storage(self, score_address: Address) -> dict:
+        """
+        :return: The items stored by the SCORE. Keys are tuples of (container type, container key, ...)
+        """
+        return self._databases[score_address].items
+
+    # Accounts & blocks
+
+    def create_wallet(self, balance: int = 0) -> Address:
+        # Wallets are derived from the sequence number, so that the same scenario gets the same addresses
+        self._wallet_count += 1
+        address = Address.from_data(AddressPrefix.EOA, b'wallet' + self._wallet_count.to_bytes(8, 'big'))
+        self._balances[address] = balance
+        return address
+
+    def advance(self, blocks: int):
+        block = self.context.block
+        self.context.block = Block(block.height + blocks, block.timestamp + blocks * BLOCK_INTERVAL)
+
+    @property
+    def block_height(self) -> int:
+        return self.context.block.height
+
+    # Transactions
+
+    def deploy(self, project_path: str, owner: Address, params: dict = None) -> dict:
+        score_class = load_score(project_path)
+        score_address = Address.from_data(AddressPrefix.CONTRACT, b'score' + len(self._scores).to_bytes(8, 'big'))
+        database = IconScoreDatabase(self)
+        score = score_class(database)
+        score._emulator = self
+        score._address = score_address
+        score._owner = owner
+        self._scores[score_address] = score
+        self._databases[score_address] = database
+
+        tx_result = self._run(owner, score_address, 0, lambda: score.on_install(**(params or {})))
+        if tx_result['status'] == 1:
+            tx_result['scoreAddress'] = score_address
+        else:
+            del self._scores[score_address]
+            del self._databases[score_address]
+        return tx_result
+
+    def update(self, score_address: Address, params: dict = None) -> dict:
+        # Runs 'on_update' of the deployed SCORE, with the state left by the previous version
+        score = self._scores[score_address]
+        return self._run(score.owner, score_address, 0, lambda: score.on_update(**(params or {})))
+
+    def transaction(self, addr_from: Address, addr_to: Address, method: str = None, params: dict = None, value: int = 0) -> dict:
+        """
+        Sends ICX, or invokes the external method of SCORE if 'method' is given.
+
+        :return: The result of transaction : 'status' (1 : success, 0 : failure), 'failure', 'eventLogs',
+                 'storageStepUsed' : the steps charged by iconservice for the storage accesses of transaction
+        """
+        if method is None:
+            return self._run(addr_from, addr_to, value, lambda: None)
+
+        def invoke():
+            function = self._get_external(addr_to, method)
+            if value > 0 and not getattr(function, 'is_payable', False):
+                revert(f"{method} is not payable")
+            function(**(params or {}))
+
+        return self._run(addr_from, addr_to, value, invoke)
+
+    def call(self, addr_from: Address, addr_to: Address, method: str, params: dict = None):
+        """
+        Invokes the readonly method of SCORE. Writes in the call raise IconScoreException.
+
+        :return: The return value of method, as it is
+        """
+        function = self._get_external(addr_to, method)
+        if not function.is_readonly:
+            revert(f"{method} is not readonly")
+
+        self.context.msg = Message(addr_from, 0)
+        self.context.tx = None
+        self._readonly = True
+        try:
+            return function(**(params or {}))
+        finally:
+            self._readonly = False
+
+    def call_score(self, addr_from: Address, addr_to: Address, method: str, args: tuple, kwargs: dict):
+        # Inter-SCORE call. 'msg.sender' is the calling SCORE during the call
+        function = self._get_external(addr_to, method)
+        msg = self.context.msg
+        self.context.msg = Message(addr_from, 0)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.context.msg = msg
+
+    def _get_external(self, score_address: Address, method: str):
+        score = self._scores.get(score_address)
+        if score is None:
+            revert(f"There is no SCORE : {score_address}")
+        function = getattr(score, method, None)
+        if function is None or not getattr(function, 'is_external', False):
+            revert(f"{method} is not an external method of {score_address}")
+        return function
+
+    def _run(self, addr_from: Address, addr_to: Address, value: int, action) -> dict:
+        self.advance(1)
+        block = self.context.block
+        self.context.tx = Transaction(addr_from, sha3_256(b'tx' + block.height.to_bytes(8, 'big')), block.timestamp)
+        self.context.msg = Message(addr_from, value)
+        self._journal = []
+        self._event_logs = []
+        self._storage_steps = 0
+        try:
+            if value > 0:
+                self.transfer_icx(addr_from, addr_to, value)
+            action()
+        except Exception as e:
+            self._undo()
+            if self.strict and not isinstance(e, IconScoreException):
+                raise
+            return {
+                'status': 0,
+                'blockHeight': block.height,
+                'failure': {'code': getattr(e, 'index', 0), 'message': str(e)},
+                'eventLogs': [],
+                'storageStepUsed': self._storage_steps
+            }
+        finally:
+            self._journal = None
+            storage_steps, self._storage_steps = self._storage_steps, None
+
+        return {
+            'status': 1,
+            'blockHeight': block.height,
+            'eventLogs': self._event_logs,
+            'storageStepUsed': storage_steps
+        }
@@ -0,0 +1,339 @@
+"""
+In-memory stand-ins for the iconservice API used by chip & samplegame SCOREs.
+The emulator imports SCORE packages with this module as 'iconservice'. Nothing here is used on the chain.
+"""
+import hashlib
+import json
+from enum import IntEnum
+from functools import wraps
+
+__all__ = ['IconScoreException', 'revert', 'json_dumps', 'json_loads', 'sha3_256', 'AddressPrefix', 'Address', 'ZERO_SCORE_ADDRESS',
+           'IconScoreDatabase', 'VarDB', 'DictDB', 'ArrayDB', 'external', 'payable', 'eventlog', 'interface', 'InterfaceScore',
+           'IconScoreBase']
+
+
+class IconScoreException(Exception):
+
+    def __init__(self, message: str = None, index: int = 0):
+        super().__init__(message)
+        self.message = message
+        self.index = index
+
+
+def revert(message: str = None, code: int = 0):
+    raise IconScoreException(message, code)
+
+
+def json_dumps(obj, **kwargs) -> str:
+    return json.dumps(obj, **kwargs)
+
+
+def json_loads(src: str, **kwargs):
+    return json.loads(src, **kwargs)
+
+
+def sha3_256(data: bytes) -> bytes:
+    return hashlib.sha3_256(data).digest()
+
+
+class AddressPrefix(IntEnum):
+    EOA = 0
+    CONTRACT = 1
+
+
+class Address:
+
+    def __init__(self, address_prefix: AddressPrefix, address_body: bytes):
+        if len(address_body) != 20:
+            raise ValueError(f"Invalid address body : {address_body}")
+        self.prefix = AddressPrefix(address_prefix)
+        self.body = bytes(address_body)
+
+    @classmethod
+    def from_string(cls, address: str) -> 'Address':
+        if not isinstance(address, str) or len(address) != 42 or address[:2] not in ('hx', 'cx'):
+            raise ValueError(f"Invalid address : {address}")
+        return cls(AddressPrefix.CONTRACT if address[:2] == 'cx' else AddressPrefix.EOA, bytes.fromhex(address[2:]))
+
+    @classmethod
+    def from_data(cls, address_prefix: AddressPrefix, data: bytes) -> 'Address':
+        return cls(address_prefix, sha3_256(data)[-20:])
+
+    @classmethod
+    def from_bytes(cls, address: bytes) -> 'Address':
+        if len(address) == 20:
+            return cls(AddressPrefix.EOA, address)
+        if len(address) == 21 and address[0] == AddressPrefix.CONTRACT:
+            return cls(AddressPrefix.CONTRACT, address[1:])
+        return None
+
+    @classmethod
+    def from_bytes_including_prefix(cls, address: bytes) -> 'Address':
+        return cls(AddressPrefix(address[0]), address[1:])
+
+    @property
+    def is_contract(self) -> bool:
+        return self.prefix == AddressPrefix.CONTRACT
+
+    def to_bytes(self) -> bytes:
+        return self.body if self.prefix == AddressPrefix.EOA else bytes([self.prefix]) + self.body
+
+    def to_bytes_including_prefix(self) -> bytes:
+        return bytes([self.prefix]) + self.body
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Address) and self.prefix == other.prefix and self.body == other.body
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    def __hash__(self) -> int:
+        return hash((self.prefix, self.body))
+
+    def __str__(self) -> str:
+        return ('cx' if self.is_contract else 'hx') + self.body.hex()
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+ZERO_SCORE_ADDRESS = Address(AddressPrefix.CONTRACT, bytes(20))
+
+_DEFAULT_VALUES = {int: 0, str: "", bool: False}
+_VALUE_TYPES = (int, str, bytes, bool, Address)
+
+
+def value_size(value) -> int:
+    # The size of value as encoded in the state DB by iconservice, which storage steps are charged by
+    if isinstance(value, int):
+        return len(int(value).to_bytes((int(value).bit_length() + 8) // 8, 'big', signed=True))
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, Address):
+        return len(value.to_bytes())
+    return len(value)
+
+
+class IconScoreDatabase:
+    """
+    The storage of a SCORE. Every write is journaled on the state of emulator, to be undone when the transaction fails.
+    """
+
+    def __init__(self, state):
+        self._state = state
+        self.items = {}
+
+    def get(self, key: tuple):
+        value = self.items.get(key)
+        self._state.charge('get', 1 if value is None else value_size(value))
+        return value
+
+    def put(self, key: tuple, value):
+        if not isinstance(value, _VALUE_TYPES):
+            raise TypeError(f"Unsupported value type : {type(value)}")
+        self._state.charge('replace' if key in self.items else 'set', value_size(value))
+        self._state.write(self.items, key, value)
+
+    def delete(self, key: tuple):
+        if key in self.items:
+            self._state.charge('delete', value_size(self.items[key]))
+            self._state.write(self.items, key, None)
+
+
+class VarDB:
+
+    def __init__(self, var_key, db: IconScoreDatabase, value_type: type):
+        self._key = ('V', var_key)
+        self._db = db
+        self._value_type = value_type
+
+    def get(self):
+        value = self._db.get(self._key)
+        return _DEFAULT_VALUES.get(self._value_type) if value is None else value
+
+    def set(self, value):
+        self._db.put(self._key, value)
+
+    def remove(self):
+        self._db.delete(self._key)
+
+
+class DictDB:
+
+    def __init__(self, key, db: IconScoreDatabase, value_type: type, depth: int = 1):
+        self._prefix = key if isinstance(key, tuple) else ('D', key)
+        self._db = db
+        self._value_type = value_type
+        self._depth = depth
+
+    def __getitem__(self, key):
+        if self._depth > 1:
+            return DictDB(self._prefix + (key,), self._db, self._value_type, self._depth - 1)
+        value = self._db.get(self._prefix + (key,))
+        return _DEFAULT_VALUES.get(self._value_type) if value is None else value
+
+    def __setitem__(self, key, value):
+        if self._depth > 1:
+            raise TypeError("Can not set the value of nested DictDB")
+        self._db.put(self._prefix + (key,), value)
+
+    def __delitem__(self, key):
+        self.remove(key)
+
+    def __contains__(self, key) -> bool:
+        return self._db.get(self._prefix + (key,)) is not None
+
+    def remove(self, key):
+        self._db.delete(self._prefix + (key,))
+
+
+class ArrayDB:
+
+    def __init__(self, key, db: IconScoreDatabase, value_type: type):
+        self._prefix = ('A', key)
+        self._db = db
+        self._value_type = value_type
+
+    def __len__(self) -> int:
+        return self._db.get(self._prefix + ('size',)) or 0
+
+    def _index(self, index: int) -> int:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("ArrayDB out of index")
+        return index
+
+    def __getitem__(self, index: int):
+        return self._db.get(self._prefix + (self._index(index),))
+
+    def __setitem__(self, index: int, value):
+        self._db.put(self._prefix + (self._index(index),), value)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._db.get(self._prefix + (index,))
+
+    def __contains__(self, value) -> bool:
+        return any(item == value for item in self)
+
+    def get(self, index: int = 0):
+        return self[index]
+
+    def put(self, value):
+        size = len(self)
+        self._db.put(self._prefix + (size,), value)
+        self._db.put(self._prefix + ('size',), size + 1)
+
+    def pop(self):
+        size = len(self)
+        if size == 0:
+            return None
+        value = self._db.get(self._prefix + (size - 1,))
+        self._db.delete(self._prefix + (size - 1,))
+        self._db.put(self._prefix + ('size',), size - 1)
+        return value
+
+
+def external(func=None, *, readonly: bool = False):
+    if func is None:
+        return lambda f: external(f, readonly=readonly)
+    func.is_external = True
+    func.is_readonly = readonly
+    return func
+
+
+def payable(func):
+    func.is_payable = True
+    return func
+
+
+def eventlog(func=None, *, indexed: int = 0):
+    if func is None:
+        return lambda f: eventlog(f, indexed=indexed)
+
+    param_names = [name for name in func.__code__.co_varnames[1:func.__code__.co_argcount]]
+    param_types = [func.__annotations__[name].__name__ for name in param_names]
+    signature = f"{func.__name__}({','.join(param_types)})"
+
+    @wraps(func)
+    def __wrapper(score, *args, **kwargs):
+        values = list(args) + [kwargs[name] for name in param_names[len(args):] if name in kwargs]
+        score._emulator.emit(score.address, signature, values[:indexed], values[indexed:])
+
+    return __wrapper
+
+
+def interface(func):
+    @wraps(func)
+    def __wrapper(interface_score, *args, **kwargs):
+        return interface_score._call(func.__name__, args, kwargs)
+
+    return __wrapper
+
+
+class InterfaceScore:
+
+    def __init__(self, address: Address, from_score: 'IconScoreBase'):
+        self._address = address
+        self._from_score = from_score
+
+    def _call(self, method: str, args: tuple, kwargs: dict):
+        return self._from_score._emulator.call_score(self._from_score.address, self._address, method, args, kwargs)
+
+
+class _Icx:
+
+    def __init__(self, score: 'IconScoreBase'):
+        self._score = score
+
+    def transfer(self, addr_to: Address, amount: int):
+        self._score._emulator.transfer_icx(self._score.address, addr_to, amount)
+
+    def get_balance(self, address: Address) -> int:
+        return self._score._emulator.get_balance(address)
+
+
+class IconScoreBase:
+    """
+    The base of SCOREs run by the emulator. The emulator sets its address, owner & itself after creating a SCORE.
+    """
+
+    def __init__(self, db: IconScoreDatabase):
+        self._emulator = None
+        self._address = None
+        self._owner = None
+
+    def on_install(self, **kwargs):
+        pass
+
+    def on_update(self, **kwargs):
+        pass
+
+    @property
+    def msg(self):
+        return self._emulator.context.msg
+
+    @property
+    def tx(self):
+        return self._emulator.context.tx
+
+    @property
+    def block(self):
+        return self._emulator.context.block
+
+    @property
+    def address(self) -> Address:
+        return self._address
+
+    @property
+    def owner(self) -> Address:
+        return self._owner
+
+    @property
+    def icx(self) -> _Icx:
+        return _Icx(self)
+
+    def create_interface_score(self, addr_to: Address, interface_cls: type):
+        return interface_cls(addr_to, self)
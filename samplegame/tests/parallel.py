@@ -0,0 +1,142 @@
+"""
+Runs the tests in a pool of processes. Each worker keeps the state of chain in its own directory, and derives its wallets
+from its own index, so that the tests of different workers do not interfere with each other.
+
+    python -m samplegame.tests.parallel [-j WORKERS] [-k PATTERN] [TEST_NAME ...]
+
+TEST_NAME is a module, class or method name as for 'python -m unittest'. (default : samplegame.tests.test_samplegame)
+The tests are dealt round robin to the workers in the order of their ids, so that a worker gets the same tests every run.
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+# Read by SampleGameTestBase
+WORKER_ENV = 'SAMPLEGAME_WORKER'
+STATE_DIR_ENV = 'SAMPLEGAME_STATE_DIR'
+
+DEFAULT_TEST_NAMES = ['samplegame.tests.test_samplegame']
+
+
+def _iter_tests(suite: unittest.TestSuite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _iter_tests(test)
+        else:
+            yield test
+
+
+def load_test_ids(test_names: list, pattern: str = None) -> list:
+    """
+    :param test_names: The names of modules, classes or methods to load the tests from
+    :param pattern: If set, only the tests whose id contains it are loaded
+    :return: The sorted ids of tests
+    """
+    loader = unittest.TestLoader()
+    suite = loader.loadTestsFromNames(test_names)
+    if loader.errors:
+        raise ImportError("\n".join(loader.errors))
+
+    test_ids = set()
+    for test in _iter_tests(suite):
+        if pattern is None or pattern in test.id():
+            test_ids.add(test.id())
+    return sorted(test_ids)
+
+
+def split_tests(test_ids: list, workers: int) -> list:
+    return [test_ids[worker::workers] for worker in range(workers) if test_ids[worker::workers]]
+
+
+def run_shard(worker: int, test_ids: list, state_root: str, verbosity: int = 1) -> dict:
+    """
+    Runs the tests in the worker process, with the state directory of the worker.
+
+    :return: 'worker', 'testsRun', 'failures' & 'errors' (list of [test id, traceback]), 'skipped', 'output'
+    """
+    state_dir = os.path.join(state_root, f'worker{worker}')
+    os.makedirs(state_dir, exist_ok=True)
+    os.environ[WORKER_ENV] = str(worker)
+    os.environ[STATE_DIR_ENV] = state_dir
+
+    stream = io.StringIO()
+    suite = unittest.defaultTestLoader.loadTestsFromNames(test_ids)
+    # The output of tests (e.g. print in setUp) is kept with the result of worker, not to be interleaved with the others
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = stream
+    try:
+        result = unittest.TextTestRunner(stream=stream, verbosity=verbosity).run(suite)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+    return {
+        'worker': worker,
+        'testsRun': result.testsRun,
+        'failures': [[test.id(), traceback] for test, traceback in result.failures] +
+                    [[test.id(), "Unexpected success"] for test in result.unexpectedSuccesses],
+        'errors': [[test.id(), traceback] for test, traceback in result.errors],
+        'skipped': len(result.skipped),
+        'output': stream.getvalue()
+    }
+
+
+def run(test_ids: list, workers: int, verbosity: int = 1, stream=sys.stderr) -> bool:
+    """
+    :return: True if all the tests have passed
+    """
+    state_root = tempfile.mkdtemp(prefix='samplegame_workers_')
+    start_time = time.perf_counter()
+    try:
+        shards = split_tests(test_ids, workers)
+        with ProcessPoolExecutor(max_workers=len(shards) or 1) as executor:
+            futures = [executor.submit(run_shard, worker, shard, state_root, verbosity) for worker, shard in enumerate(shards)]
+            results = [future.result() for future in futures]
+    finally:
+        shutil.rmtree(state_root, ignore_errors=True)
+
+    for result in results:
+        if verbosity > 1 or result['failures'] or result['errors']:
+            stream.write(f"===== worker {result['worker']} =====\n{result['output']}\n")
+
+    tests_run = sum(result['testsRun'] for result in results)
+    failures = sum(len(result['failures']) for result in results)
+    errors = sum(len(result['errors']) for result in results)
+    skipped = sum(result['skipped'] for result in results)
+    stream.write(f"Ran {tests_run} tests in {time.perf_counter() - start_time:.3f}s with {len(results)} workers\n")
+    if failures or errors:
+        stream.write(f"FAILED (failures={failures}, errors={errors}, skipped={skipped})\n")
+        return False
+    stream.write(f"OK (skipped={skipped})\n")
+    return True
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m samplegame.tests.parallel', description="Runs the tests in a pool of processes")
+    parser.add_argument('test_names', nargs='*', default=DEFAULT_TEST_NAMES, help="modules, classes or methods to run")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="the number of worker processes")
+    parser.add_argument('-k', dest='pattern', help="only run the tests whose id contains the pattern")
+    parser.add_argument('-v', '--verbose', dest='verbosity', action='store_const', const=2, default=1)
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("The number of workers must be positive")
+
+    try:
+        test_ids = load_test_ids(args.test_names, args.pattern)
+    except ImportError as e:
+        sys.stderr.write(f"Failed to load the tests\n{e}\n")
+        return 1
+    if not test_ids:
+        sys.stderr.write("No tests to run\n")
+        return 1
+    return 0 if run(test_ids, args.workers, args.verbosity) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
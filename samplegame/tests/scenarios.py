@@ -0,0 +1,245 @@
+import json
+
+from ..core.core import Hand, card_from_dict
+
+
+class SampleGameScenarios:
+    """
+    The scenarios run against both backends : the local tbears node (test_samplegame.py) & the emulator (test_emulator.py).
+    They use only the helpers of the test base, which return the results in the JSON-RPC form of tbears.
+    """
+
+    def test_score_update(self):
+        # update SCORE
+        print('Update')
+        tx_result = self._deploy_score(to=self._sample_game_score_address)
+
+        self.assertEqual(self._sample_game_score_address, tx_result['scoreAddress'])
+
+    def test_scenario1(self):
+        response = self._show_game_room_list(self.test1_wallet)
+        print(response)
+
+        tx_result_create_room = self._create_room(self.test1_wallet)
+        self.assertTrue('status' in tx_result_create_room)
+        self.assertEqual(1, tx_result_create_room['status'])
+
+        tx_result_create_room = self._create_room(self.test2_wallet)
+        self.assertTrue('status' in tx_result_create_room)
+        self.assertEqual(1, tx_result_create_room['status'])
+
+        tx_result_create_room = self._create_room(self.test1_wallet)
+        self.assertTrue('status' in tx_result_create_room)
+        self.assertEqual(0, tx_result_create_room['status'])
+
+        response = self._show_game_room_list(self.test1_wallet)
+        print(response)
+
+    def test_scenario2(self):
+
+        tx_result_create_room = self._create_room(self.test1_wallet)
+        self.assertTrue('status' in tx_result_create_room)
+        self.assertEqual(1, tx_result_create_room['status'])
+
+        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
+        print(result_show_game_room_list)
+        self.assertEqual(1, len(result_show_game_room_list))
+
+        tx_result_join_room = self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self.assertTrue('status' in tx_result_join_room)
+        self.assertEqual(1, tx_result_join_room['status'])
+
+        tx_result_join_room = self._join_room(self.test3_wallet, self.test1_wallet.get_address())
+        self.assertTrue('status' in tx_result_join_room)
+        self.assertEqual(0, tx_result_join_room['status'])
+
+        tx_result_escape_room = self._escape(self.test1_wallet)
+        self.assertTrue('status' in tx_result_escape_room)
+        self.assertEqual(0, tx_result_escape_room['status'])
+
+        tx_result_escape_room = self._escape(self.test2_wallet)
+        self.assertTrue('status' in tx_result_escape_room)
+        self.assertEqual(1, tx_result_escape_room['status'])
+        # The hand of participant is deleted when escaping
+        self.assertEqual("", self._show_mine(self.test2_wallet))
+
+        tx_result_join_room = self._join_room(self.test3_wallet, self.test1_wallet.get_address())
+        self.assertTrue('status' in tx_result_join_room)
+        self.assertEqual(1, tx_result_join_room['status'])
+
+        tx_result_escape_room = self._escape(self.test3_wallet)
+        self.assertTrue('status' in tx_result_escape_room)
+        self.assertEqual(1, tx_result_escape_room['status'])
+
+        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
+        self.assertEqual(1, len(result_show_game_room_list))
+
+        tx_result_escape_room = self._escape(self.test1_wallet)
+        self.assertTrue('status' in tx_result_escape_room)
+        self.assertEqual(1, tx_result_escape_room['status'])
+
+        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
+        self.assertEqual(0, len(result_show_game_room_list))
+        self.assertEqual("", self._show_mine(self.test1_wallet))
+
+    def test_scenario3(self):
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+
+        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
+        print(result_show_game_room_list)
+
+        tx_result_toggle_ready = self._toggle_ready(self.test1_wallet)
+        self.assertTrue('status' in tx_result_toggle_ready)
+        self.assertEqual(1, tx_result_toggle_ready['status'])
+
+        tx_result_game_start = self._game_start(self.test1_wallet)
+        self.assertTrue('status' in tx_result_game_start)
+        self.assertEqual(0, tx_result_game_start['status'])
+
+        tx_result_toggle_ready = self._toggle_ready(self.test2_wallet)
+        self.assertTrue('status' in tx_result_toggle_ready)
+        self.assertEqual(1, tx_result_toggle_ready['status'])
+
+        tx_result_hit = self._hit(self.test1_wallet)
+        self.assertTrue('status' in tx_result_hit)
+        self.assertEqual(0, tx_result_hit['status'])
+
+        tx_result_game_start = self._game_start(self.test2_wallet)
+        self.assertTrue('status' in tx_result_game_start)
+        self.assertEqual(0, tx_result_game_start['status'])
+
+        tx_result_game_start = self._game_start(self.test1_wallet)
+        self.assertTrue('status' in tx_result_game_start)
+        self.assertEqual(1, tx_result_game_start['status'])
+        print(tx_result_game_start)
+
+        tx_result_game_start = self._game_start(self.test1_wallet)
+        self.assertTrue('status' in tx_result_game_start)
+        self.assertEqual(0, tx_result_game_start['status'])
+
+        tx_result_escape = self._escape(self.test1_wallet)
+        self.assertTrue('status' in tx_result_escape)
+        self.assertEqual(0, tx_result_escape['status'])
+
+        tx_result_hit = self._hit(self.test1_wallet)
+        self.assertTrue('status' in tx_result_hit)
+        self.assertEqual(1, tx_result_hit['status'])
+
+        result_show_mine = self._show_mine(self.test1_wallet)
+        print(result_show_mine)
+
+        tx_result_hit = self._hit(self.test2_wallet)
+        self.assertTrue('status' in tx_result_hit)
+        self.assertEqual(1, tx_result_hit['status'])
+
+        result_show_mine = self._show_mine(self.test2_wallet)
+        print(result_show_mine)
+
+        tx_result_fix = self._fix(self.test1_wallet)
+        self.assertTrue('status' in tx_result_fix)
+        self.assertEqual(1, tx_result_fix['status'])
+
+        tx_result_fix = self._fix(self.test2_wallet)
+        self.assertTrue('status' in tx_result_fix)
+        self.assertEqual(1, tx_result_fix['status'])
+
+        result_get_results = self._get_results(self.test1_wallet)
+        print(result_get_results)
+
+        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
+        print(result_show_game_room_list)
+
+    def test_scenario4(self):
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+
+        tx_result_toggle_ready = self._toggle_ready(self.test1_wallet)
+        self.assertTrue('status' in tx_result_toggle_ready)
+        self.assertEqual(1, tx_result_toggle_ready['status'])
+
+        tx_result_game_start = self._game_start(self.test1_wallet)
+        self.assertTrue('status' in tx_result_game_start)
+        self.assertEqual(0, tx_result_game_start['status'])
+
+        tx_result_toggle_ready = self._toggle_ready(self.test2_wallet)
+        self.assertTrue('status' in tx_result_toggle_ready)
+        self.assertEqual(1, tx_result_toggle_ready['status'])
+
+        tx_result_hit = self._hit(self.test1_wallet)
+        self.assertTrue('status' in tx_result_hit)
+        self.assertEqual(0, tx_result_hit['status'])
+
+        tx_result_game_start = self._game_start(self.test2_wallet)
+        self.assertTrue('status' in tx_result_game_start)
+        self.assertEqual(0, tx_result_game_start['status'])
+
+        tx_result_game_start = self._game_start(self.test1_wallet)
+        self.assertTrue('status' in tx_result_game_start)
+        self.assertEqual(1, tx_result_game_start['status'])
+
+        tx_result_escape = self._escape(self.test1_wallet)
+        self.assertTrue('status' in tx_result_escape)
+        self.assertEqual(0, tx_result_escape['status'])
+
+        for _ in range(5):
+            tx_result_hit = self._hit(self.test1_wallet)
+            self.assertTrue('status' in tx_result_hit)
+            self.assertEqual(1, tx_result_hit['status'])
+
+            # The hand is deleted when the participant exceeding 21 is banned
+            result_show_mine = self._show_mine(self.test1_wallet)
+            if result_show_mine == "" or json.loads(result_show_mine)['value'] > 21:
+                break
+
+            tx_result_hit = self._hit(self.test2_wallet)
+            self.assertTrue('status' in tx_result_hit)
+            self.assertEqual(1, tx_result_hit['status'])
+
+            # The hand is deleted when the participant exceeding 21 is banned
+            result_show_mine = self._show_mine(self.test2_wallet)
+            if result_show_mine == "" or json.loads(result_show_mine)['value'] > 21:
+                break
+
+        result_get_results = self._get_results(self.test2_wallet)
+        print(result_get_results)
+
+        result_show_game_room_list = self._show_game_room_list(self.test2_wallet)
+        print(result_show_game_room_list)
+
+    def test_hit_many_and_hit_until(self):
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self._toggle_ready(self.test1_wallet)
+        self._toggle_ready(self.test2_wallet)
+        self._game_start(self.test1_wallet)
+
+        tx_result_hit_many = self._hit_many(self.test2_wallet, 6)
+        self.assertEqual(0, tx_result_hit_many['status'])
+
+        # Two cards never exceed 21
+        tx_result_hit_many = self._hit_many(self.test2_wallet, 2)
+        self.assertEqual(1, tx_result_hit_many['status'])
+        self.assertEqual(2, len(json.loads(self._show_mine(self.test2_wallet))['cards']))
+
+        # Two cards are worth 4 at least. Nothing is drawn for the threshold reached already, and no Hit event is logged
+        tx_result_hit_until = self._hit_until(self.test2_wallet, 4)
+        self.assertEqual(1, tx_result_hit_until['status'])
+        self.assertEqual([], tx_result_hit_until['eventLogs'])
+        self.assertEqual(2, len(json.loads(self._show_mine(self.test2_wallet))['cards']))
+
+        # Any card drawn below 11 does not exceed 21, so the hand of test1 stands whatever is dealt
+        tx_result_hit_until = self._hit_until(self.test1_wallet, 11, True)
+        self.assertEqual(1, tx_result_hit_until['status'])
+
+        # Drawing stopped at the first card reaching the threshold, or at 5 cards. The game goes on until test2 fixes
+        hand = json.loads(self._show_mine(self.test1_wallet))
+        self.assertTrue(hand['fix'])
+        self.assertTrue(1 <= len(hand['cards']) <= 5)
+        self.assertTrue(11 <= hand['value'] <= 21 or len(hand['cards']) == 5)
+        self.assertLess(Hand([card_from_dict(json.loads(card)) for card in hand['cards'][:-1]]).value, 11)
+        self.assertEqual(0, len(self._get_results(self.test1_wallet)))
+
+        tx_result_fix = self._fix(self.test2_wallet)
+        self.assertEqual(1, tx_result_fix['status'])
+        self.assertEqual(1, len(self._get_results(self.test1_wallet)))
@@ -0,0 +1,35 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+
+class StateSnapshot:
+    """
+    A copy of the state directories of IconIntegrateTestBase (SCORE root & state DB root),
+    with the values needed to continue the chain from it. (e.g. block height, deployed SCORE addresses)
+    The copy is removed when the process exits.
+
+    :param paths: The directories to copy. Missing directories are restored as missing
+    :param values: The values to keep with the copy
+    """
+
+    def __init__(self, paths: list, **values):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.values = values
+        self._root = tempfile.mkdtemp(prefix='samplegame_snapshot_')
+        atexit.register(shutil.rmtree, self._root, True)
+
+        for index, path in enumerate(self.paths):
+            if os.path.exists(path):
+                shutil.copytree(path, self._copy_path(index))
+
+    def _copy_path(self, index: int) -> str:
+        return os.path.join(self._root, str(index))
+
+    def restore(self):
+        # Replace the directories with the copies. The engine using them must be closed, or not opened yet
+        for index, path in enumerate(self.paths):
+            shutil.rmtree(path, ignore_errors=True)
+            if os.path.exists(self._copy_path(index)):
+                shutil.copytree(self._copy_path(index), path)
@@ -0,0 +1,120 @@
+import fcntl
+import json
+import os
+import tempfile
+from unittest import skipUnless
+
+from .test_samplegame import SampleGameTestBase, DIR_PATH
+
+# The benchmark fills the lobby up to 10,000 rooms. Set BENCHMARK=1 to run it, it is skipped by the usual test runs
+RUN_BENCHMARK = os.environ.get('BENCHMARK') == '1'
+# Comma separated sizes can be overridden, e.g. BENCHMARK_LOBBY_SIZES=10,100 for a quick run
+LOBBY_SIZES = [int(size) for size in os.environ.get('BENCHMARK_LOBBY_SIZES', '10,100,1000,10000').split(',')]
+HISTORY_SIZES = [int(size) for size in os.environ.get('BENCHMARK_HISTORY_SIZES', '0,10,100').split(',')]
+REPORT_PATH = os.environ.get('BENCHMARK_REPORT') or os.path.join(tempfile.gettempdir(), 'samplegame_benchmark_report.json')
+
+
+@skipUnless(RUN_BENCHMARK, "Set BENCHMARK=1 to run the benchmark")
+class TestSampleGameBenchmark(SampleGameTestBase):
+    """
+    Records step usage by every external method of samplegame, at growing lobby & results sizes.
+    The report is written as JSON to BENCHMARK_REPORT (default : samplegame_benchmark_report.json in the temp directory),
+    to be diffed between versions.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.records = []
+
+    def _measure(self, method: str, tx_function, *args, **params) -> dict:
+        tx_result = tx_function(*args)
+        self.assertEqual(1, tx_result['status'], f"{method} failed : {tx_result.get('failure')}")
+
+        record = {
+            'method': method,
+            'stepUsed': tx_result['stepUsed']
+        }
+        record.update(params)
+        self.records.append(record)
+        return tx_result
+
+    def _fill_lobby(self, lobby: list, size: int):
+        # Rooms with zero prize can be created by wallets without chips
+        while len(lobby) < size:
+            owner = self._create_wallet()
+            self.assertEqual(1, self._create_room(owner, 0)['status'])
+            lobby.append(owner)
+
+    def _play_draw(self, **params):
+        # Both participants fix their empty hands, so that the game ends in a draw and nobody is banned
+        self._measure('toggleReady', self._toggle_ready, self.test1_wallet, **params)
+        self._toggle_ready(self.test2_wallet)
+        self._measure('gameStart', self._game_start, self.test1_wallet, **params)
+        self._measure('fix', self._fix, self.test1_wallet, **params)
+        self._measure('calculate', self._fix, self.test2_wallet, **params)
+
+    def _write_report(self, name: str):
+        with open(os.path.join(DIR_PATH, '..', 'package.json')) as package_file:
+            version = json.load(package_file)['version']
+
+        # The workers of the parallel runner may write the report at the same time
+        with open(REPORT_PATH, 'a+') as report_file:
+            fcntl.flock(report_file, fcntl.LOCK_EX)
+            report_file.seek(0)
+            content = report_file.read()
+            report = json.loads(content) if content else {}
+            report['version'] = version
+            report[name] = sorted(self.records, key=lambda record: sorted(record.items()))
+
+            report_file.seek(0)
+            report_file.truncate()
+            json.dump(report, report_file, indent=2, sort_keys=True)
+
+    def test_benchmark_lobby(self):
+        lobby = []
+        for lobby_size in sorted(LOBBY_SIZES):
+            self._fill_lobby(lobby, lobby_size)
+
+            self._measure('mintChips', self._mint_chips, self.test3_wallet, 1, lobbySize=lobby_size)
+            self._measure('exchange', self._exchange, self.test3_wallet, 1, lobbySize=lobby_size)
+
+            self._measure('createRoom', self._create_room, self.test1_wallet, lobbySize=lobby_size)
+            self._measure('joinRoom', self._join_room, self.test2_wallet, self.test1_wallet.get_address(), lobbySize=lobby_size)
+
+            self._toggle_ready(self.test1_wallet)
+            self._toggle_ready(self.test2_wallet)
+            self._measure('gameStart', self._game_start, self.test1_wallet, lobbySize=lobby_size)
+            # A single card never busts. The game is finalized by 'fix' of the other participant, who loses with an empty hand
+            self._measure('hit', self._hit, self.test1_wallet, lobbySize=lobby_size)
+            self._measure('fix', self._fix, self.test1_wallet, lobbySize=lobby_size)
+            self._measure('calculate', self._fix, self.test2_wallet, lobbySize=lobby_size)
+
+            # Leave the lobby as it was. The loser has been banned by 'calculate' if the chips are not enough for the next game
+            self._escape(self.test2_wallet)
+            self._escape(self.test1_wallet)
+            for wallet in (self.test1_wallet, self.test2_wallet):
+                self._mint_chips(_from=wallet, amount=11)
+
+            self._measure('escape', self._escape, lobby.pop(), lobbySize=lobby_size)
+            self._fill_lobby(lobby, lobby_size)
+
+        self._write_report('lobby')
+
+    def test_benchmark_results(self):
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+
+        results = 0
+        for history_size in sorted(HISTORY_SIZES):
+            while results < history_size:
+                self._toggle_ready(self.test1_wallet)
+                self._toggle_ready(self.test2_wallet)
+                self._game_start(self.test1_wallet)
+                self._fix(self.test1_wallet)
+                self._fix(self.test2_wallet)
+                results += 1
+
+            self._play_draw(results=history_size)
+            results += 1
+
+        self._write_report('results')
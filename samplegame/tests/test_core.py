@@ -0,0 +1,76 @@
+import hashlib
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from ..core.core import Deck, GameRoom, Hand, DECK_SIZE, FULL, OPEN, PLAYING, card_from_dict, card_to_dict, ranks, winners
+
+ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+
+def _sha3_256(data: bytes) -> bytes:
+    return hashlib.sha3_256(data).digest()
+
+
+def _card(rank: str, suit_index: int = 0) -> int:
+    return suit_index * len(ranks) + ranks.index(rank)
+
+
+class TestCore(TestCase):
+
+    def test_import_without_iconservice(self):
+        code = "import sys, samplegame.core.core; sys.exit('iconservice' in sys.modules)"
+        self.assertEqual(0, subprocess.run([sys.executable, '-c', code], cwd=ROOT_PATH).returncode)
+
+    def test_hand_value(self):
+        self.assertEqual(21, Hand([_card('Ace'), _card('King')]).value)
+        self.assertEqual(12, Hand([_card('Ace'), _card('Ace', 1)]).value)
+        self.assertEqual(1, Hand([_card('Ace'), _card('Ace', 1)]).aces)
+
+        # The ace counts 1 when it busts the hand with 11
+        hand = Hand([_card('Ace'), _card('Nine')])
+        self.assertEqual(20, hand.value)
+        hand.add_card(_card('Five'))
+        self.assertEqual(15, hand.value)
+        self.assertEqual(0, hand.aces)
+
+        hand.add_card(_card('King'))
+        self.assertTrue(hand.is_bust)
+        self.assertEqual(hand.cards, Hand.from_bytes(bytes(hand)).cards)
+
+    def test_card_dict(self):
+        self.assertEqual({'suit': 'Spades', 'rank': 'Ace'}, card_to_dict(_card('Ace', 2)))
+        self.assertEqual(list(range(DECK_SIZE)), [card_from_dict(card_to_dict(card)) for card in range(DECK_SIZE)])
+
+    def test_winners(self):
+        self.assertEqual([1], winners([18, 20, 25]))
+        self.assertEqual([0, 2], winners([20, 19, 20]))
+        # If all hands exceed 21, it is a draw
+        self.assertEqual([0, 1], winners([22, 25]))
+
+    def test_deal(self):
+        deck = Deck(_sha3_256(b'seed'), hash_function=_sha3_256)
+        cards = [deck.deal(block_height, 'hx0') for block_height in range(DECK_SIZE)]
+        self.assertEqual(list(range(DECK_SIZE)), sorted(cards))
+
+        # The same seed, cursor & block information deal the same card
+        deck = Deck.from_bytes(bytes(Deck(_sha3_256(b'seed'))), _sha3_256)
+        self.assertEqual(cards[0], deck.deal(0, 'hx0'))
+        self.assertEqual(1, deck.cursor)
+
+        with self.assertRaises(ValueError):
+            Deck(_sha3_256(b'seed')).deal(0, 'hx0')
+
+    def test_game_room(self):
+        game_room = GameRoom('hx1', 'hx1', 0, 10, ['hx1'], _seats=3)
+        self.assertEqual(OPEN, game_room.status)
+        game_room.join('hx2')
+        game_room.join('hx3')
+        self.assertEqual(FULL, game_room.status)
+        game_room.game_start()
+        self.assertEqual(PLAYING, game_room.status)
+        game_room.game_stop()
+        game_room.escape('hx2')
+        self.assertEqual(OPEN, game_room.status)
+        self.assertEqual(['hx1', 'hx3'], game_room.to_dict()['participants'])
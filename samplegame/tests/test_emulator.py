@@ -0,0 +1,710 @@
+import json
+import os
+import random
+import sys
+from unittest import TestCase, mock
+
+from .emulator.emulator import Emulator, load_score
+from .emulator.runtime import Address, IconScoreException
+from .scenarios import SampleGameScenarios
+
+DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+
+# The number of randomized action sequences per ledger mode & actions in each of them, e.g. EMULATOR_RANDOM_RUNS=1000 for a long run
+RANDOM_RUNS = int(os.environ.get('EMULATOR_RANDOM_RUNS', '20'))
+RANDOM_ACTIONS = int(os.environ.get('EMULATOR_RANDOM_ACTIONS', '300'))
+
+SUITS = ('Hearts', 'Diamonds', 'Spades', 'Clubs')
+RANKS = ('Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine', 'Ten', 'Jack', 'Queen', 'King', 'Ace')
+
+# Per-player state which must not remain after the player leaves the game room
+PLAYER_STATE = ('in_game_room', 'deck', 'hand', 'ready')
+
+# The address to deploy a new SCORE to, as in tbears
+SCORE_INSTALL_ADDRESS = f"cx{'0' * 40}"
+
+
+def _to_json(value):
+    # The return value of readonly call, as encoded in the JSON-RPC response of tbears
+    if isinstance(value, bool):
+        return hex(int(value))
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, Address):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    return value
+
+
+class EmulatorTestBase(TestCase):
+    """
+    Deploys chip & samplegame SCOREs on the emulator with funded wallets, and provides the helpers to invoke samplegame.
+    """
+    SAMPLE_GAME_PROJECT = os.path.abspath(os.path.join(DIR_PATH, '..'))
+    CHIP_PROJECT = os.path.abspath(os.path.join(DIR_PATH, '../../chip'))
+
+    # If False, samplegame keeps the chip ledger itself. (Embedded mode)
+    USE_CHIP_SCORE = True
+
+    def setUp(self):
+        self.emulator = Emulator()
+        self.owner = self.emulator.create_wallet(10 ** 9)
+        if self.USE_CHIP_SCORE:
+            self.chip_address = self.emulator.deploy(self.CHIP_PROJECT, self.owner, {'_decimals': 0})['scoreAddress']
+            params = {'_tokenAddress': self.chip_address}
+        else:
+            self.chip_address = None
+            params = {'_decimals': 0}
+        self.game_address = self.emulator.deploy(self.SAMPLE_GAME_PROJECT, self.owner, params)['scoreAddress']
+        if self.USE_CHIP_SCORE:
+            self.emulator.transaction(self.owner, self.chip_address, 'setGame', {'_game': self.game_address})
+
+        self.wallets = [self.emulator.create_wallet(10 ** 6) for _ in range(3)]
+        self.test1, self.test2, self.test3 = self.wallets
+        for wallet in self.wallets:
+            self._tx(wallet, 'mintChips', _value=11)
+
+    def _tx(self, _from, method: str, _value: int = 0, **params) -> dict:
+        return self.emulator.transaction(_from, self.game_address, method, params, _value)
+
+    def _call(self, _from, method: str, **params):
+        return self.emulator.call(_from, self.game_address, method, params)
+
+    def _balance(self, owner) -> int:
+        score_address = self.chip_address or self.game_address
+        return self.emulator.call(owner, score_address, 'balanceOf', {'_owner': owner})
+
+    def _start_game(self, owner, *players):
+        for participant in (owner,) + players:
+            self._tx(participant, 'toggleReady')
+        return self._tx(owner, 'gameStart')
+
+    def _player_state(self, player) -> list:
+        return [key for key in self.emulator.storage(self.game_address) if key[0] == 'D' and key[1] in PLAYER_STATE and key[2] == player]
+
+    def _game_room_positions(self) -> tuple:
+        """
+        :return: The positions of game rooms in the lobby partitions, and the positions kept in the index of them
+        """
+        game_room_class = sys.modules[load_score(self.SAMPLE_GAME_PROJECT).__module__].GameRoom
+        storage = self.emulator.storage(self.game_address)
+        positions = {}
+        for key, value in storage.items():
+            if key[0] == 'A' and key[1].startswith('game_room_list|') and key[2] != 'size':
+                positions[game_room_class.from_bytes(value).game_room_id] = key[2]
+        index = {key[2]: value for key, value in storage.items() if key[:2] == ('D', 'game_room_index')}
+        return positions, index
+
+
+class EmulatorWallet:
+    """
+    The wallet of emulator with the interface of KeyWallet, which the helpers of SampleGameTestBase take.
+    """
+
+    def __init__(self, address: Address):
+        self.address = address
+
+    def get_address(self) -> str:
+        return str(self.address)
+
+
+class EmulatorSampleGameTestBase(EmulatorTestBase):
+    """
+    Provides the helpers of SampleGameTestBase on the emulator, so that the scenarios of SampleGameScenarios run unchanged.
+    Transactions return the results of emulator. Calls return the values encoded as in the JSON-RPC response of tbears.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.test1_wallet, self.test2_wallet, self.test3_wallet = [EmulatorWallet(wallet) for wallet in self.wallets]
+        self._sample_game_score_address = str(self.game_address)
+        self._chip_score_address = str(self.chip_address)
+
+    def _create_wallet(self) -> EmulatorWallet:
+        return EmulatorWallet(self.emulator.create_wallet(10 ** 6))
+
+    def _send(self, _from: EmulatorWallet, method: str, params: dict = None, value: int = 0) -> dict:
+        return self.emulator.transaction(_from.address, self.game_address, method, params, value)
+
+    def _query(self, _from: EmulatorWallet, method: str, params: dict = None, score_address: Address = None):
+        return _to_json(self.emulator.call(_from.address, score_address or self.game_address, method, params))
+
+    def _deploy_score(self, to: str = SCORE_INSTALL_ADDRESS, content: str = EmulatorTestBase.SAMPLE_GAME_PROJECT, params: dict = None) -> dict:
+        if to == SCORE_INSTALL_ADDRESS:
+            tx_result = self.emulator.deploy(content, self.owner, params)
+        else:
+            tx_result = self.emulator.update(Address.from_string(to), params)
+            tx_result['scoreAddress'] = Address.from_string(to)
+
+        self.assertEqual(1, tx_result['status'])
+        tx_result['scoreAddress'] = str(tx_result['scoreAddress'])
+        return tx_result
+
+    def _set_game(self, game_address: str):
+        tx_result = self.emulator.transaction(self.owner, self.chip_address, 'setGame', {'_game': Address.from_string(game_address)})
+        self.assertEqual(1, tx_result['status'])
+
+    def _show_game_room_list(self, _from: EmulatorWallet):
+        return self._query(_from, 'showGameRoomList')
+
+    def _get_game_room_list(self, _from: EmulatorWallet, params: dict = None):
+        return self._query(_from, 'getGameRoomList', params)
+
+    def _get_chip_balance(self, _from: EmulatorWallet):
+        return self._query(_from, 'getChipBalance')
+
+    def _create_room(self, _from: EmulatorWallet, _prize_per_game: int = None, _seats: int = None):
+        params = {} if _prize_per_game is None else {'_prizePerGame': _prize_per_game}
+        if _seats is not None:
+            params['_seats'] = _seats
+        return self._send(_from, 'createRoom', params)
+
+    def _join_room(self, _from: EmulatorWallet, _game_room_id: str):
+        return self._send(_from, 'joinRoom', {'_gameRoomId': Address.from_string(f'{_game_room_id}')})
+
+    def _escape(self, _from: EmulatorWallet):
+        return self._send(_from, 'escape')
+
+    def _toggle_ready(self, _from: EmulatorWallet):
+        return self._send(_from, 'toggleReady')
+
+    def _game_start(self, _from: EmulatorWallet):
+        return self._send(_from, 'gameStart')
+
+    def _hit(self, _from: EmulatorWallet):
+        return self._send(_from, 'hit')
+
+    def _hit_until(self, _from: EmulatorWallet, _threshold: int, _fix: bool = False):
+        return self._send(_from, 'hitUntil', {'_threshold': _threshold, '_fix': _fix})
+
+    def _hit_many(self, _from: EmulatorWallet, _count: int):
+        return self._send(_from, 'hitMany', {'_count': _count})
+
+    def _fix(self, _from: EmulatorWallet):
+        return self._send(_from, 'fix')
+
+    def _finalize_expired(self, _from: EmulatorWallet, _max_rooms: int):
+        return self._send(_from, 'finalizeExpired', {'_maxRooms': _max_rooms})
+
+    def _queue_for_match(self, _from: EmulatorWallet, _prize_per_game: int = 10):
+        return self._send(_from, 'queueForMatch', {'_prizePerGame': _prize_per_game})
+
+    def _set_result_retention(self, _from: EmulatorWallet, _results_to_keep: int, _retention_blocks: int = 0):
+        return self._send(_from, 'setResultRetention', {'_resultsToKeep': _results_to_keep, '_retentionBlocks': _retention_blocks})
+
+    def _show_mine(self, _from: EmulatorWallet = None):
+        return self._query(_from or self._create_wallet(), 'showMine')
+
+    def _get_results(self, _from: EmulatorWallet):
+        return self._query(_from, 'getResults')
+
+    def _get_results_for(self, _from: EmulatorWallet, _player: str, params: dict = None):
+        return self._query(_from, 'getResultsFor', {'_player': Address.from_string(f'{_player}'), **(params or {})})
+
+    def _get_game_state(self, _from: EmulatorWallet, _game_room_id: str):
+        return self._query(_from, 'getGameState', {'_gameRoomId': Address.from_string(f'{_game_room_id}')})
+
+    def _multicall(self, _from: EmulatorWallet, _score_address: str, _calls: list):
+        return self._query(_from, 'multicall', {'_calls': json.dumps(_calls)}, Address.from_string(_score_address))
+
+    def _mint_chips(self, _from: EmulatorWallet, amount: int):
+        return self._send(_from, 'mintChips', value=amount)
+
+    def _exchange(self, _from: EmulatorWallet, amount: int):
+        return self._send(_from, 'exchange', {'amount': amount})
+
+
+class TestEmulatorSampleGame(SampleGameScenarios, EmulatorSampleGameTestBase):
+    pass
+
+
+class TestEmulatorScenarios(EmulatorTestBase):
+
+    def test_lobby(self):
+        self.assertEqual(1, self._tx(self.test1, 'createRoom')['status'])
+        self.assertEqual(1, len(self._call(self.test1, 'showGameRoomList')))
+
+        self.assertEqual(1, self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)['status'])
+        self.assertEqual(0, self._tx(self.test3, 'joinRoom', _gameRoomId=self.test1)['status'])
+        self.assertEqual(0, self._tx(self.test1, 'escape')['status'])
+
+        self.assertEqual(1, self._tx(self.test2, 'escape')['status'])
+        self.assertEqual([], self._player_state(self.test2))
+
+        self.assertEqual(1, self._tx(self.test1, 'escape')['status'])
+        self.assertEqual(0, len(self._call(self.test1, 'showGameRoomList')))
+        self.assertEqual([], self._player_state(self.test1))
+
+    def test_game_room_index(self):
+        owners = self.wallets + [self.emulator.create_wallet(10 ** 6) for _ in range(3)]
+        for owner in owners[len(self.wallets):]:
+            self._tx(owner, 'mintChips', _value=11)
+        for owner in owners:
+            self._tx(owner, 'createRoom')
+
+        # Crash the game rooms in the middle, at the head & at the tail of the partition. The last one fills the slot of removed one
+        for owner in (owners[2], owners[0], owners[4], owners[1]):
+            self.assertEqual(1, self._tx(owner, 'escape')['status'])
+            positions, index = self._game_room_positions()
+            self.assertEqual(positions, index)
+            self.assertEqual(list(range(len(positions))), sorted(positions.values()))
+        self.assertEqual({owners[3], owners[5]}, set(positions))
+
+    def test_game(self):
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self._tx(self.test1, 'toggleReady')
+        self.assertEqual(0, self._tx(self.test1, 'gameStart')['status'])
+        self._tx(self.test2, 'toggleReady')
+        self.assertEqual(0, self._tx(self.test2, 'gameStart')['status'])
+        self.assertEqual(1, self._tx(self.test1, 'gameStart')['status'])
+        self.assertEqual(1, self._balance(self.test1))
+
+        self.assertEqual(1, self._tx(self.test1, 'hit')['status'])
+        self.assertEqual(1, self._tx(self.test1, 'fix')['status'])
+        self.assertEqual(0, self._tx(self.test1, 'fix')['status'])
+        self.assertEqual(1, self._tx(self.test2, 'fix')['status'])
+
+        # The winner gets the pot. The loser is banned because 1 chip is left
+        self.assertEqual(1, len(self._call(self.test1, 'getResults')))
+        self.assertEqual(21, self._balance(self.test1))
+        self.assertEqual(1, self._balance(self.test2))
+        self.assertEqual([], self._player_state(self.test2))
+
+        # A finalized game can not be settled again
+        self.assertEqual(0, self._tx(self.test1, 'fix')['status'])
+
+    def test_failed_transaction_is_undone(self):
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self._tx(self.test2, 'exchange', amount=5)
+        storage = dict(self.emulator.storage(self.game_address))
+        chip_storage = dict(self.emulator.storage(self.chip_address))
+
+        # The stake of test1 is collected before the stake of test2 fails in Chip SCORE
+        tx_result = self._start_game(self.test1, self.test2)
+        self.assertEqual(0, tx_result['status'])
+        self.assertEqual([], tx_result['eventLogs'])
+        self.assertEqual(11, self._balance(self.test1))
+        self.assertEqual(chip_storage, self.emulator.storage(self.chip_address))
+        ready = {key: value for key, value in self.emulator.storage(self.game_address).items() if key[1] != 'ready'}
+        self.assertEqual({key: value for key, value in storage.items() if key[1] != 'ready'}, ready)
+
+    def test_readonly_call_can_not_write(self):
+        with self.assertRaises(Exception):
+            self.emulator.call(self.test1, self.game_address, 'createRoom', {})
+
+    def test_multicall(self):
+        calls = [{'method': 'getResults', 'params': {'_limit': '0x5'}}, {'method': 'getMatchQueueLength', 'params': {'_prizePerGame': 5}}]
+        self.assertEqual([[], 0], self._call(self.test1, 'multicall', _calls=json.dumps(calls)))
+
+        # Malformed calls & the values which can not be converted to the types of params revert the call
+        invalid_calls = [
+            [1],
+            [{'method': 'getResults', 'params': [0]}],
+            [{'method': 'getResults', 'params': {'_offset': 'ten'}}],
+            [{'method': 'balanceOf', 'params': {'_owner': 'hx1234'}}]
+        ]
+        for calls in invalid_calls:
+            with self.subTest(calls=calls), self.assertRaises(IconScoreException):
+                self._call(self.test1, 'multicall', _calls=json.dumps(calls))
+
+    def test_chip_multicall(self):
+        if not self.USE_CHIP_SCORE:
+            self.skipTest("Chip SCORE is not deployed in embedded mode")
+
+        calls = [{'method': 'balanceOf', 'params': {'_owner': str(wallet)}} for wallet in self.wallets] + [{'method': 'isGame', 'params': {'_game': str(self.game_address)}}]
+        self.assertEqual([11, 11, 11, True], self.emulator.call(self.test1, self.chip_address, 'multicall', {'_calls': json.dumps(calls)}))
+
+        for calls in ([1], [{'method': 'balanceOf', 'params': {'_owner': 'hx1234'}}], [{'method': 'balanceOf', 'params': {'_owner': 11}}]):
+            with self.subTest(calls=calls), self.assertRaises(IconScoreException):
+                self.emulator.call(self.test1, self.chip_address, 'multicall', {'_calls': json.dumps(calls)})
+
+    def test_multicall_module_copies(self):
+        # Both SCOREs must decode the calls the same way
+        with open(os.path.join(self.SAMPLE_GAME_PROJECT, 'multicall', 'multicall.py')) as sample_game_module, \
+                open(os.path.join(self.CHIP_PROJECT, 'multicall', 'multicall.py')) as chip_module:
+            self.assertEqual(sample_game_module.read(), chip_module.read())
+
+    def test_finalize_expired(self):
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self._start_game(self.test1, self.test2)
+
+        self._tx(self.test3, 'finalizeExpired', _maxRooms=10)
+        self.assertEqual(0, len(self._call(self.test1, 'getResults')))
+
+        self.emulator.advance(60)
+        self._tx(self.test3, 'finalizeExpired', _maxRooms=10)
+        self.assertEqual(['Draw!! {}, {}.'.format(self.test1, self.test2)], self._call(self.test1, 'getResults'))
+
+    def test_expiry_boundary(self):
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        start = self._start_game(self.test1, self.test2)['blockHeight']
+
+        # The game is still live at start + 60, with 1 block left
+        self.emulator.advance(start + 59 - self.emulator.block_height)
+        self.assertEqual(1, self._tx(self.test1, 'hit')['status'])
+        self.assertEqual(start + 60, self.emulator.block_height)
+        game_state = self._call(self.test1, 'getGameState', _gameRoomId=self.test1)
+        self.assertEqual((True, 1), (game_state['active'], game_state['blocks_until_expiry']))
+        self._tx(self.test3, 'finalizeExpired', _maxRooms=10)
+        self.assertEqual(start + 61, self.emulator.block_height)
+
+        # The finalizeExpired at start + 61 settles the game, whereas the state at start + 60 reported 1 block left
+        game_state = self._call(self.test1, 'getGameState', _gameRoomId=self.test1)
+        self.assertEqual((False, -1), (game_state['active'], game_state['blocks_until_expiry']))
+        self.assertEqual(1, len(self._call(self.test1, 'getResults')))
+
+    def test_expiry_boundary_state(self):
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        start = self._start_game(self.test1, self.test2)['blockHeight']
+        self.assertEqual(61, self._call(self.test1, 'getGameState', _gameRoomId=self.test1)['blocks_until_expiry'])
+
+        # The state reports 0 block left exactly when the game is expired
+        self.emulator.advance(start + 61 - self.emulator.block_height)
+        self.assertEqual(0, self._call(self.test1, 'getGameState', _gameRoomId=self.test1)['blocks_until_expiry'])
+
+    def test_queue_for_match(self):
+        self.assertEqual(1, self._tx(self.test1, 'queueForMatch', _prizePerGame=5)['status'])
+        self.assertEqual(1, self._tx(self.test2, 'queueForMatch', _prizePerGame=10)['status'])
+        self.assertEqual(1, self._tx(self.test3, 'queueForMatch', _prizePerGame=5)['status'])
+
+        game_state = self._call(self.test3, 'getGameState', _gameRoomId=self.test1)
+        self.assertEqual([str(self.test1), str(self.test3)], [player['player'] for player in game_state['players']])
+        self.assertEqual(1, self._call(self.test1, 'getMatchQueueLength', _prizePerGame=10))
+
+    def test_queue_for_match_lists_room_once(self):
+        score_class = load_score(self.SAMPLE_GAME_PROJECT)
+        self._tx(self.test1, 'queueForMatch', _prizePerGame=5)
+
+        # The matched game room is put to the partition of full game rooms, without passing through the open one
+        with mock.patch.object(score_class, '_put_game_room_list', autospec=True, side_effect=score_class._put_game_room_list) as put, \
+                mock.patch.object(score_class, '_update_game_room_list', autospec=True) as update:
+            self.assertEqual(1, self._tx(self.test2, 'queueForMatch', _prizePerGame=5)['status'])
+        self.assertEqual(1, put.call_count)
+        self.assertEqual('full', put.call_args[0][1].status)
+        update.assert_not_called()
+
+        positions, index = self._game_room_positions()
+        self.assertEqual({self.test1: 0}, positions)
+        self.assertEqual(positions, index)
+
+    def test_queue_for_match_skips_stale_entries(self):
+        # More stale entries than the previous bound of 5 are ahead of the waiting player
+        for _ in range(8):
+            player = self.emulator.create_wallet(10 ** 6)
+            self._tx(player, 'mintChips', _value=5)
+            self._tx(player, 'queueForMatch', _prizePerGame=5)
+            self._tx(player, 'leaveMatchQueue')
+        self._tx(self.test1, 'queueForMatch', _prizePerGame=5)
+
+        self.assertEqual(1, self._tx(self.test2, 'queueForMatch', _prizePerGame=5)['status'])
+        game_state = self._call(self.test2, 'getGameState', _gameRoomId=self.test1)
+        self.assertEqual([str(self.test1), str(self.test2)], [player['player'] for player in game_state['players']])
+        self.assertEqual(0, self._call(self.test1, 'getMatchQueueLength', _prizePerGame=5))
+
+    def test_three_player_room(self):
+        self._tx(self.test1, 'createRoom', _prizePerGame=3, _seats=3)
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self._tx(self.test3, 'joinRoom', _gameRoomId=self.test1)
+        self.assertEqual(1, self._start_game(self.test1, self.test2, self.test3)['status'])
+
+        for wallet in self.wallets:
+            self._tx(wallet, 'hitUntil', _threshold=15, _fix=True)
+
+        self.assertEqual(1, len(self._call(self.test1, 'getResults')))
+        self.assertEqual(33, sum(self._balance(wallet) for wallet in self.wallets))
+
+    def test_hit_until_reached_threshold(self):
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self._start_game(self.test1, self.test2)
+        self._tx(self.test1, 'hitUntil', _threshold=1)
+
+        # The hand has a card already. Nothing is drawn, and neither the event nor the state is written
+        storage = dict(self.emulator.storage(self.game_address))
+        tx_result = self._tx(self.test1, 'hitUntil', _threshold=1)
+        self.assertEqual(1, tx_result['status'])
+        self.assertEqual([], tx_result['eventLogs'])
+        self.assertEqual(storage, self.emulator.storage(self.game_address))
+
+        # Fixing the hand is still done without drawing
+        tx_result = self._tx(self.test1, 'hitUntil', _threshold=1, _fix=True)
+        self.assertEqual(['Fix(Address,Address)'], [event['indexed'][0] for event in tx_result['eventLogs']])
+        self.assertEqual(1, len(json.loads(self._call(self.test1, 'showMine'))['cards']))
+
+    def test_join_active_game(self):
+        self._tx(self.test1, 'createRoom', _prizePerGame=3, _seats=3)
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self._start_game(self.test1, self.test2)
+
+        # The vacant seat can not be taken until the game is finalized
+        self.assertEqual(0, self._tx(self.test3, 'joinRoom', _gameRoomId=self.test1)['status'])
+        self.assertEqual(0, self._tx(self.test3, 'gameStart')['status'])
+        self.assertEqual([], self._player_state(self.test3))
+
+
+class TestEmulatorChip(EmulatorTestBase):
+
+    def test_registered_games_only(self):
+        packed_players = b''.join(bytes([wallet.prefix]) + wallet.body for wallet in self.wallets)
+        tx_result = self.emulator.transaction(self.test1, self.chip_address, 'collectStakes', {'_froms': packed_players, '_value': 1})
+        self.assertEqual(0, tx_result['status'])
+
+        # The game SCORE not registered by the owner of chip SCORE can not collect the stakes
+        game_address = self.game_address
+        self.game_address = self.emulator.deploy(self.SAMPLE_GAME_PROJECT, self.owner, {'_tokenAddress': self.chip_address})['scoreAddress']
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self.assertEqual(0, self._start_game(self.test1, self.test2)['status'])
+
+        self.assertEqual(0, self.emulator.transaction(self.test1, self.chip_address, 'setGame', {'_game': self.game_address})['status'])
+        self.assertEqual(1, self.emulator.transaction(self.owner, self.chip_address, 'setGame', {'_game': self.game_address})['status'])
+        self.assertEqual(1, self._tx(self.test1, 'gameStart')['status'])
+
+        self.emulator.transaction(self.owner, self.chip_address, 'setGame', {'_game': game_address, '_registered': False})
+        self.assertFalse(self.emulator.call(self.test1, self.chip_address, 'isGame', {'_game': game_address}))
+
+
+class TestEmulatorEmbeddedLedger(TestEmulatorScenarios):
+    USE_CHIP_SCORE = False
+
+    def test_failed_transaction_is_undone(self):
+        self._tx(self.test1, 'createRoom')
+        storage = dict(self.emulator.storage(self.game_address))
+
+        self.assertEqual(0, self._tx(self.test2, 'exchange', amount=12)['status'])
+        self.assertEqual(storage, self.emulator.storage(self.game_address))
+        self.assertEqual(11, self._balance(self.test2))
+
+
+class TestEmulatorUpdate(EmulatorTestBase):
+    """
+    Updates samplegame over the state stored by the baseline version, which kept the JSON of game rooms in a single list.
+    """
+
+    def _put_legacy_game_room(self, owner, participants: list, active: bool, prize_per_game: int = 10):
+        storage = self.emulator.storage(self.game_address)
+        game_room = {
+            'owner': str(owner),
+            'game_room_id': str(owner),
+            'creation_time': 0,
+            'prize_per_game': prize_per_game,
+            'participants': [str(participant) for participant in participants],
+            'active': active
+        }
+        storage[('D', 'game_room', owner)] = json.dumps(game_room).encode()
+        for participant in participants:
+            storage[('D', 'in_game_room', participant)] = owner
+
+        # The copy in the list is not updated by game start
+        size = storage.get(('A', 'game_room_list', 'size'), 0)
+        storage[('A', 'game_room_list', size)] = json.dumps(dict(game_room, active=False))
+        storage[('A', 'game_room_list', 'size')] = size + 1
+
+    def _put_legacy_hand(self, player, cards: list, fix: bool):
+        # cards : (suit, rank) of the cards on the hand. The value is recalculated from the cards
+        hand = {
+            'cards': [json.dumps({'suit': suit, 'rank': rank}) for suit, rank in cards],
+            'value': 0,
+            'aces': 0,
+            'fix': fix
+        }
+        self.emulator.storage(self.game_address)[('D', 'hand', player)] = json.dumps(hand).encode()
+
+    def _put_legacy_deck(self, player, dealt: list):
+        # dealt : (suit, rank) of the cards dealt from the deck
+        deck = [json.dumps({'suit': suit, 'rank': rank}) for suit in SUITS for rank in RANKS if (suit, rank) not in dealt]
+        self.emulator.storage(self.game_address)[('D', 'deck', player)] = json.dumps({'deck': deck}).encode()
+
+    def test_migrate_game_rooms(self):
+        self._put_legacy_game_room(self.test3, [self.test3], False)
+        self._put_legacy_game_room(self.test1, [self.test1, self.test2], True)
+
+        with mock.patch.object(load_score(self.SAMPLE_GAME_PROJECT), '_MAX_ROOMS_TO_MIGRATE', 1):
+            self.assertEqual(1, self.emulator.update(self.game_address)['status'])
+        self.assertEqual(1, self._call(self.test1, 'getLegacyGameRoomCount'))
+
+        # The active game room is listed with the status of its record
+        rooms = self._call(self.test1, 'getGameRoomList', _active=True)['rooms']
+        self.assertEqual([str(self.test1)], [room['game_room_id'] for room in rooms])
+
+        # The game room not moved yet can be crashed
+        self.assertEqual(1, self._tx(self.test3, 'escape')['status'])
+        self.assertEqual(1, self._tx(self.test1, 'migrateGameRooms')['status'])
+        self.assertEqual(0, self._call(self.test1, 'getLegacyGameRoomCount'))
+
+        self.assertEqual(1, len(self._call(self.test1, 'showGameRoomList')))
+        positions, index = self._game_room_positions()
+        self.assertEqual({self.test1: 0}, positions)
+        self.assertEqual(positions, index)
+
+    def test_finalize_migrated_game(self):
+        self._put_legacy_game_room(self.test1, [self.test1, self.test2], True)
+        self._put_legacy_hand(self.test1, [('Hearts', 'Ten')], False)
+        self._put_legacy_hand(self.test2, [('Clubs', 'Nine')], False)
+        storage = self.emulator.storage(self.game_address)
+        storage[('D', 'game_start_time', self.test1)] = self.emulator.block_height
+
+        # The previous version kept the stakes in the balance of samplegame
+        chip_storage = self.emulator.storage(self.chip_address)
+        for player in (self.test1, self.test2):
+            chip_storage[('D', 'balances', player)] -= 10
+        chip_storage[('D', 'balances', self.game_address)] = 20
+
+        self.assertEqual(1, self.emulator.update(self.game_address)['status'])
+        self.emulator.advance(60)
+        self.assertEqual(1, self._tx(self.test3, 'finalizeExpired', _maxRooms=10)['status'])
+
+        self.assertEqual(1, len(self._call(self.test1, 'getResults')))
+        self.assertFalse(self._call(self.test1, 'getGameState', _gameRoomId=self.test1)['active'])
+        self.assertEqual((21, 1), (self._balance(self.test1), self._balance(self.test2)))
+
+    def test_legacy_hands(self):
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self._start_game(self.test1, self.test2)
+        self._put_legacy_hand(self.test1, [('Hearts', 'Ten'), ('Spades', 'Ace')], False)
+        self._put_legacy_hand(self.test2, [('Clubs', 'Nine')], True)
+
+        self.assertEqual(21, json.loads(self._call(self.test1, 'showMine'))['value'])
+        game_state = self._call(self.test1, 'getGameState', _gameRoomId=self.test1)
+        self.assertEqual([2, 1], [player['cards'] for player in game_state['players']])
+
+        # The game with the hands of previous version is settled, and the stakes are paid out
+        self.assertEqual(1, self._tx(self.test1, 'fix')['status'])
+        self.assertEqual(21, self._balance(self.test1))
+
+    def test_legacy_decks(self):
+        self._tx(self.test1, 'createRoom')
+        self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1)
+        self._start_game(self.test1, self.test2)
+        cards = [('Hearts', 'Two'), ('Clubs', 'Three')]
+        self._put_legacy_hand(self.test1, cards, False)
+        self._put_legacy_deck(self.test1, cards)
+
+        # The deck is stored as a seed & the mask of dealt cards, with the cards on the hand dealt already
+        self.assertEqual(1, self._tx(self.test1, 'hit')['status'])
+        self.assertEqual(3, len(json.loads(self._call(self.test1, 'showMine'))['cards']))
+        dealt = int.from_bytes(self.emulator.storage(self.game_address)[('D', 'deck', self.test1)][32:], 'big')
+        self.assertEqual(3, bin(dealt).count('1'))
+        for suit, rank in cards:
+            self.assertTrue(dealt >> (SUITS.index(suit) * len(RANKS) + RANKS.index(rank)) & 1)
+        self._tx(self.test2, 'fix')
+        self.assertEqual(1, self._tx(self.test1, 'fix')['status'])
+        self.assertEqual(1, len(self._call(self.test1, 'getResults')))
+
+
+class TestEmulatorStorageSteps(EmulatorTestBase):
+    """
+    Compares the storage steps of game rooms stored as binary records with the ones stored as JSON, the encoding of previous version.
+    """
+
+    def _play(self) -> dict:
+        # The prize is low enough for both participants to stay after the game
+        steps = {
+            'createRoom': self._tx(self.test1, 'createRoom', _prizePerGame=5),
+            'joinRoom': self._tx(self.test2, 'joinRoom', _gameRoomId=self.test1),
+            'gameStart': self._start_game(self.test1, self.test2),
+            'hit': self._tx(self.test1, 'hit'),
+            'fix': self._tx(self.test1, 'fix'),
+            'calculate': self._tx(self.test2, 'fix'),
+            'escape': self._tx(self.test2, 'escape')
+        }
+        for method, tx_result in steps.items():
+            self.assertEqual(1, tx_result['status'], method)
+        return {method: tx_result['storageStepUsed'] for method, tx_result in steps.items()}
+
+    def test_game_room_encoding(self):
+        binary_steps = self._play()
+
+        self.setUp()
+        game_room_class = sys.modules[load_score(self.SAMPLE_GAME_PROJECT).__module__].GameRoom
+        with mock.patch.object(game_room_class, '__bytes__', lambda game_room: str(game_room).encode()):
+            json_steps = self._play()
+
+        for method in binary_steps:
+            self.assertLess(binary_steps[method], json_steps[method], method)
+
+
+class TestEmulatorRandomPlay(EmulatorTestBase):
+    """
+    Runs randomized action sequences, and checks the invariants after every transaction.
+    """
+
+    def _random_action(self, rng: random.Random, wallet) -> int:
+        """
+        :return: The amount of chips minted by the action. (Negative if burned)
+        """
+        action = rng.randrange(15)
+        if action == 0:
+            self._tx(wallet, 'createRoom', _prizePerGame=rng.choice((0, 1, 5, 10)), _seats=rng.randint(2, 4))
+        elif action == 1:
+            self._tx(wallet, 'joinRoom', _gameRoomId=rng.choice(self.wallets))
+        elif action == 2:
+            self._tx(wallet, 'escape')
+        elif action in (3, 4):
+            self._tx(wallet, 'toggleReady')
+        elif action == 5:
+            self._tx(wallet, 'gameStart')
+        elif action == 6:
+            self._tx(wallet, 'hit')
+        elif action == 7:
+            self._tx(wallet, 'hitMany', _count=rng.randint(1, 3))
+        elif action == 8:
+            self._tx(wallet, 'hitUntil', _threshold=rng.randint(12, 20), _fix=rng.random() < 0.5)
+        elif action == 9:
+            self._tx(wallet, 'fix')
+        elif action == 10:
+            self._tx(wallet, 'queueForMatch', _prizePerGame=rng.choice((1, 5)))
+        elif action == 11:
+            self._tx(wallet, 'leaveMatchQueue')
+        elif action == 12:
+            self.emulator.advance(rng.randint(1, 30))
+            self._tx(wallet, 'finalizeExpired', _maxRooms=5)
+        elif action == 13:
+            amount = rng.randint(1, 10)
+            return amount if self._tx(wallet, 'mintChips', _value=amount)['status'] == 1 else 0
+        else:
+            amount = rng.randint(1, 5)
+            return -amount if self._tx(wallet, 'exchange', amount=amount)['status'] == 1 else 0
+        return 0
+
+    def _check_invariants(self, total_chips: int):
+        # Chips are neither created nor lost by games. Stakes of active games are kept by samplegame
+        self.assertEqual(total_chips, sum(self._balance(wallet) for wallet in self.wallets) + self._balance(self.game_address))
+
+        seated = set()
+        for room in self._call(self.test1, 'getGameRoomList', _limit=50)['rooms']:
+            game_state = self._call(self.test1, 'getGameState', _gameRoomId=self.emulator_address(room['game_room_id']))
+            players = [player['player'] for player in game_state['players']]
+            self.assertTrue(0 < len(players) <= game_state['seats'])
+            self.assertTrue(seated.isdisjoint(players))
+            seated.update(players)
+
+        for wallet in self.wallets:
+            if str(wallet) not in seated:
+                self.assertEqual([], self._player_state(wallet))
+
+    def emulator_address(self, address: str):
+        return next(wallet for wallet in self.wallets if str(wallet) == address)
+
+    def test_random_play(self):
+        for seed in range(RANDOM_RUNS):
+            with self.subTest(seed=seed):
+                self.setUp()
+                rng = random.Random(seed)
+                total_chips = 33
+                for _ in range(RANDOM_ACTIONS):
+                    total_chips += self._random_action(rng, rng.choice(self.wallets))
+                    self._check_invariants(total_chips)
+
+
+class TestEmulatorEmbeddedRandomPlay(TestEmulatorRandomPlay):
+    USE_CHIP_SCORE = False
@@ -1,3 +1,4 @@
+import hashlib
 import os
 
 from iconsdk.builder.call_builder import CallBuilder
@@ -8,18 +9,46 @@ from iconsdk.builder.transaction_builder import (
 from iconsdk.libs.in_memory_zip import gen_deploy_data_content
 from iconsdk.signed_transaction import SignedTransaction
 from iconsdk.wallet.wallet import KeyWallet
-from iconservice import Address, json_loads
+from iconservice import Address, json_dumps
 from tbears.libs.icon_integrate_test import IconIntegrateTestBase, SCORE_INSTALL_ADDRESS
 
+from .parallel import STATE_DIR_ENV, WORKER_ENV
+from .scenarios import SampleGameScenarios
+from .snapshot import StateSnapshot
+
 DIR_PATH = os.path.abspath(os.path.dirname(__file__))
 
+# Set SAMPLEGAME_SNAPSHOT=0 to deploy & fund before every test, instead of restoring the snapshot
+USE_SNAPSHOT = os.environ.get('SAMPLEGAME_SNAPSHOT', '1') != '0'
+
 
-class TestSampleGame(IconIntegrateTestBase):
+class SampleGameTestBase(IconIntegrateTestBase):
+    """
+    Deploys chip & samplegame SCOREs with funded wallets, and provides the helpers to invoke samplegame.
+    The deployed state is built once per test class, and restored from the snapshot of state DB before each test.
+    """
     SAMPLE_GAME_PROJECT = os.path.abspath(os.path.join(DIR_PATH, '..'))
     CHIP_PROJECT = os.path.abspath(os.path.join(DIR_PATH, '../../chip'))
 
+    # StateSnapshot taken after deploying & funding, per test class
+    _snapshot = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Each worker of the parallel runner (samplegame/tests/parallel.py) keeps the state of chain in its own directory
+        state_dir = os.environ.get(STATE_DIR_ENV)
+        if state_dir:
+            cls._score_root_path = os.path.join(state_dir, '.testscore')
+            cls._state_db_root_path = os.path.join(state_dir, '.teststatedb')
+
     def setUp(self):
         print("---------------------setup-------------------------")
+        self._set_up_state()
+
+    def _set_up_state(self):
+        # '_make_init_config' & '_genesis_invoke' are called by super().setUp(), after clearing the state directories
+        self._restoring = USE_SNAPSHOT and self._snapshot is not None
         super().setUp()
 
         self.icon_service = None
@@ -29,9 +58,16 @@ class TestSampleGame(IconIntegrateTestBase):
         self.test2_wallet = self._wallet_array[0]
         self.test3_wallet = self._wallet_array[1]
         wallet_list = [self.test1_wallet, self.test2_wallet, self.test3_wallet]
+        self.decimals = 0
+
+        if self._restoring:
+            self._block_height = self._snapshot.values['block_height']
+            self._prev_block_hash = self._snapshot.values['prev_block_hash']
+            self._chip_score_address = self._snapshot.values['chip_score_address']
+            self._sample_game_score_address = self._snapshot.values['sample_game_score_address']
+            return
 
         # install SCORE
-        self.decimals = 0
         params_for_chip = {
             '_decimals': self.decimals
         }
@@ -43,14 +79,43 @@ class TestSampleGame(IconIntegrateTestBase):
         }
         # self._sample_game_score_address = 'cx4623bb6f4604e488a70b5c609c60fa860ed4e825'
         self._sample_game_score_address = self._deploy_score(params=params_for_sample_game)['scoreAddress']
+        self._set_game(self._sample_game_score_address)
 
         for wallet in wallet_list:
             self._transfer(wallet.get_address())
             self._mint_chips(_from=wallet, amount=11)
 
+        if USE_SNAPSHOT:
+            # Close the engine to flush the state DB before copying it, and continue from the copy as the other tests do
+            self.icon_service_engine.close()
+            type(self)._snapshot = StateSnapshot([self._score_root_path, self._state_db_root_path],
+                                                 block_height=self._block_height,
+                                                 prev_block_hash=self._prev_block_hash,
+                                                 chip_score_address=self._chip_score_address,
+                                                 sample_game_score_address=self._sample_game_score_address)
+            self._set_up_state()
+
+    def _make_init_config(self) -> dict:
+        if self._restoring:
+            self._snapshot.restore()
+        return super()._make_init_config()
+
+    def _genesis_invoke(self, genesis_accounts: list) -> list:
+        # The snapshot has been taken after the genesis block
+        if self._restoring:
+            return []
+        return super()._genesis_invoke(genesis_accounts)
+
     def tearDown(self):
         print("---------------------------------------------------")
 
+    def _create_wallet(self) -> KeyWallet:
+        # Derived from the worker, the test & the sequence number, so that every run creates the same wallets
+        # and the workers sharing a node do not use the same wallets
+        self._wallet_count = getattr(self, '_wallet_count', 0) + 1
+        seed = f"{os.environ.get(WORKER_ENV, '0')}:{self.id()}:{self._wallet_count}"
+        return KeyWallet.load(hashlib.sha3_256(seed.encode()).digest())
+
     def _transfer(self, to: str):
         transaction = TransactionBuilder().from_(self.test1_wallet.get_address()) \
             .to(to) \
@@ -90,6 +155,22 @@ class TestSampleGame(IconIntegrateTestBase):
 
         return tx_result
 
+    def _set_game(self, game_address: str):
+        # Allow the game SCORE to settle the games with the chips of players
+        transaction_set_game = CallTransactionBuilder() \
+            .from_(self.test1_wallet.get_address()) \
+            .to(self._chip_score_address) \
+            .step_limit(10_000_000) \
+            .nid(3) \
+            .nonce(100) \
+            .method("setGame") \
+            .params({'_game': game_address}) \
+            .build()
+
+        signed_transaction_set_game = SignedTransaction(transaction_set_game, self.test1_wallet)
+        tx_result = self.process_transaction(signed_transaction_set_game, self.icon_service)
+        self.assertEqual(1, tx_result['status'])
+
     def _show_game_room_list(self, _from: KeyWallet):
         call = CallBuilder().from_(_from.get_address()) \
             .to(self._sample_game_score_address) \
@@ -100,6 +181,17 @@ class TestSampleGame(IconIntegrateTestBase):
         response = self.process_call(call, self.icon_service)
         return response
 
+    def _get_game_room_list(self, _from: KeyWallet, params: dict = None):
+        call = CallBuilder().from_(_from.get_address()) \
+            .to(self._sample_game_score_address) \
+            .method("getGameRoomList") \
+            .params(params) \
+            .build()
+
+        # Sends the call request
+        response = self.process_call(call, self.icon_service)
+        return response
+
     def _get_chip_balance(self, _from: KeyWallet):
         call = CallBuilder().from_(_from.get_address()) \
             .to(self._sample_game_score_address) \
@@ -110,7 +202,11 @@ class TestSampleGame(IconIntegrateTestBase):
         response = self.process_call(call, self.icon_service)
         return response
 
-    def _create_room(self, _from: KeyWallet):
+    def _create_room(self, _from: KeyWallet, _prize_per_game: int = None, _seats: int = None):
+        params = {} if _prize_per_game is None else {'_prizePerGame': _prize_per_game}
+        if _seats is not None:
+            params['_seats'] = _seats
+
         transaction_create_room = CallTransactionBuilder() \
             .from_(_from.get_address()) \
             .to(self._sample_game_score_address) \
@@ -118,7 +214,7 @@ class TestSampleGame(IconIntegrateTestBase):
             .nid(3) \
             .nonce(100) \
             .method("createRoom") \
-            .params('') \
+            .params(params) \
             .build()
 
         signed_transaction_create_room = SignedTransaction(transaction_create_room, _from)
@@ -202,6 +298,38 @@ class TestSampleGame(IconIntegrateTestBase):
         tx_result_hit = self.process_transaction(signed_transaction_hit, self.icon_service)
         return tx_result_hit
 
+    def _hit_until(self, _from: KeyWallet, _threshold: int, _fix: bool = False):
+        transaction_hit_until = CallTransactionBuilder() \
+            .from_(_from.get_address()) \
+            .to(self._sample_game_score_address) \
+            .step_limit(10_000_000) \
+            .nid(3) \
+            .nonce(100) \
+            .method("hitUntil") \
+            .params({'_threshold': _threshold, '_fix': '0x1' if _fix else '0x0'}) \
+            .build()
+
+        signed_transaction_hit_until = SignedTransaction(transaction_hit_until, _from)
+
+        tx_result_hit_until = self.process_transaction(signed_transaction_hit_until, self.icon_service)
+        return tx_result_hit_until
+
+    def _hit_many(self, _from: KeyWallet, _count: int):
+        transaction_hit_many = CallTransactionBuilder() \
+            .from_(_from.get_address()) \
+            .to(self._sample_game_score_address) \
+            .step_limit(10_000_000) \
+            .nid(3) \
+            .nonce(100) \
+            .method("hitMany") \
+            .params({'_count': _count}) \
+            .build()
+
+        signed_transaction_hit_many = SignedTransaction(transaction_hit_many, _from)
+
+        tx_result_hit_many = self.process_transaction(signed_transaction_hit_many, self.icon_service)
+        return tx_result_hit_many
+
     def _fix(self, _from: KeyWallet):
         transaction_fix = CallTransactionBuilder() \
             .from_(_from.get_address()) \
@@ -218,6 +346,54 @@ class TestSampleGame(IconIntegrateTestBase):
         tx_result_fix = self.process_transaction(signed_transaction_fix, self.icon_service)
         return tx_result_fix
 
+    def _finalize_expired(self, _from: KeyWallet, _max_rooms: int):
+        transaction_finalize_expired = CallTransactionBuilder() \
+            .from_(_from.get_address()) \
+            .to(self._sample_game_score_address) \
+            .step_limit(10_000_000) \
+            .nid(3) \
+            .nonce(100) \
+            .method("finalizeExpired") \
+            .params({'_maxRooms': _max_rooms}) \
+            .build()
+
+        signed_transaction_finalize_expired = SignedTransaction(transaction_finalize_expired, _from)
+
+        tx_result_finalize_expired = self.process_transaction(signed_transaction_finalize_expired, self.icon_service)
+        return tx_result_finalize_expired
+
+    def _queue_for_match(self, _from: KeyWallet, _prize_per_game: int = 10):
+        transaction_queue_for_match = CallTransactionBuilder() \
+            .from_(_from.get_address()) \
+            .to(self._sample_game_score_address) \
+            .step_limit(10_000_000) \
+            .nid(3) \
+            .nonce(100) \
+            .method("queueForMatch") \
+            .params({'_prizePerGame': _prize_per_game}) \
+            .build()
+
+        signed_transaction_queue_for_match = SignedTransaction(transaction_queue_for_match, _from)
+
+        tx_result_queue_for_match = self.process_transaction(signed_transaction_queue_for_match, self.icon_service)
+        return tx_result_queue_for_match
+
+    def _set_result_retention(self, _from: KeyWallet, _results_to_keep: int, _retention_blocks: int = 0):
+        transaction_set_result_retention = CallTransactionBuilder() \
+            .from_(_from.get_address()) \
+            .to(self._sample_game_score_address) \
+            .step_limit(10_000_000) \
+            .nid(3) \
+            .nonce(100) \
+            .method("setResultRetention") \
+            .params({'_resultsToKeep': _results_to_keep, '_retentionBlocks': _retention_blocks}) \
+            .build()
+
+        signed_transaction_set_result_retention = SignedTransaction(transaction_set_result_retention, _from)
+
+        tx_result_set_result_retention = self.process_transaction(signed_transaction_set_result_retention, self.icon_service)
+        return tx_result_set_result_retention
+
     def _show_mine(self, _from: KeyWallet = KeyWallet.create()):
         call = CallBuilder().from_(_from.get_address()) \
             .to(self._sample_game_score_address) \
@@ -237,6 +413,39 @@ class TestSampleGame(IconIntegrateTestBase):
         response = self.process_call(call, self.icon_service)
         return response
 
+    def _get_results_for(self, _from: KeyWallet, _player: Address, params: dict = None):
+        call = CallBuilder().from_(_from.get_address()) \
+            .to(self._sample_game_score_address) \
+            .method("getResultsFor") \
+            .params({'_player': _player, **(params or {})}) \
+            .build()
+
+        # Sends the call request
+        response = self.process_call(call, self.icon_service)
+        return response
+
+    def _get_game_state(self, _from: KeyWallet, _game_room_id: Address):
+        call = CallBuilder().from_(_from.get_address()) \
+            .to(self._sample_game_score_address) \
+            .method("getGameState") \
+            .params({'_gameRoomId': _game_room_id}) \
+            .build()
+
+        # Sends the call request
+        response = self.process_call(call, self.icon_service)
+        return response
+
+    def _multicall(self, _from: KeyWallet, _score_address: str, _calls: list):
+        call = CallBuilder().from_(_from.get_address()) \
+            .to(_score_address) \
+            .method("multicall") \
+            .params({'_calls': json_dumps(_calls)}) \
+            .build()
+
+        # Sends the call request
+        response = self.process_call(call, self.icon_service)
+        return response
+
     def _mint_chips(self, _from: KeyWallet, amount: int):
         transaction_mint_chips = CallTransactionBuilder() \
             .from_(_from.get_address()) \
@@ -273,228 +482,339 @@ class TestSampleGame(IconIntegrateTestBase):
         tx_result_exchange = self.process_transaction(signed_transaction_exchange, self.icon_service)
         return tx_result_exchange
 
-    def test_score_update(self):
-        # update SCORE
-        print('Update')
-        tx_result = self._deploy_score(to=self._sample_game_score_address)
 
-        self.assertEqual(self._sample_game_score_address, tx_result['scoreAddress'])
+class TestSampleGame(SampleGameScenarios, SampleGameTestBase):
 
-    def test_scenario1(self):
-        call = CallBuilder().from_(self.test1_wallet.get_address()) \
-            .to(self._sample_game_score_address) \
-            .method("showGameRoomList") \
-            .build()
+    def test_scenario5(self):
+        tx_result_exchange = self._exchange(self.test1_wallet, 10)
+        self.assertTrue('status' in tx_result_exchange)
+        self.assertEqual(1, tx_result_exchange['status'])
 
-        # Sends the call request
-        response = self.process_call(call, self.icon_service)
-        print(response)
+        tx_result_exchange = self._exchange(self.test1_wallet, 10)
+        self.assertTrue('status' in tx_result_exchange)
+        self.assertEqual(0, tx_result_exchange['status'])
 
         tx_result_create_room = self._create_room(self.test1_wallet)
         self.assertTrue('status' in tx_result_create_room)
-        self.assertEqual(1, tx_result_create_room['status'])
+        self.assertEqual(0, tx_result_create_room['status'])
 
         tx_result_create_room = self._create_room(self.test2_wallet)
         self.assertTrue('status' in tx_result_create_room)
         self.assertEqual(1, tx_result_create_room['status'])
 
-        tx_result_create_room = self._create_room(self.test1_wallet)
-        self.assertTrue('status' in tx_result_create_room)
-        self.assertEqual(0, tx_result_create_room['status'])
-
-        call = CallBuilder().from_(self.test1_wallet.get_address()) \
-            .to(self._sample_game_score_address) \
-            .method("showGameRoomList") \
-            .build()
-
-        # Sends the call request
-        response = self.process_call(call, self.icon_service)
-        print(response)
-
-    def test_scenario2(self):
+        tx_result_join_room = self._join_room(self.test1_wallet, self.test2_wallet.get_address())
+        self.assertTrue('status' in tx_result_join_room)
+        self.assertEqual(0, tx_result_join_room['status'])
 
-        tx_result_create_room = self._create_room(self.test1_wallet)
-        self.assertTrue('status' in tx_result_create_room)
-        self.assertEqual(1, tx_result_create_room['status'])
+    def test_crash_room_in_large_lobby(self):
+        # Rooms with zero prize can be created by wallets without chips
+        owners = [self._create_wallet() for _ in range(1000)]
+        for owner in owners:
+            tx_result_create_room = self._create_room(owner, 0)
+            self.assertEqual(1, tx_result_create_room['status'])
 
         result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
-        print(result_show_game_room_list)
-        self.assertEqual(1, len(result_show_game_room_list))
+        self.assertEqual(1000, len(result_show_game_room_list))
 
-        tx_result_join_room = self._join_room(self.test2_wallet, self.test1_wallet.get_address())
-        self.assertTrue('status' in tx_result_join_room)
-        self.assertEqual(1, tx_result_join_room['status'])
+        # Crash the rooms at the head, in the middle and at the tail of the lobby
+        step_used_list = []
+        for owner in (owners[0], owners[500], owners[-1], owners[1]):
+            tx_result_escape = self._escape(owner)
+            self.assertEqual(1, tx_result_escape['status'])
+            step_used_list.append(tx_result_escape['stepUsed'])
 
-        tx_result_join_room = self._join_room(self.test3_wallet, self.test1_wallet.get_address())
-        self.assertTrue('status' in tx_result_join_room)
-        self.assertEqual(0, tx_result_join_room['status'])
-
-        tx_result_escape_room = self._escape(self.test1_wallet)
-        self.assertTrue('status' in tx_result_escape_room)
-        self.assertEqual(0, tx_result_escape_room['status'])
+        # The cost of crashing a room does not depend on its position in the lobby
+        self.assertLess(max(step_used_list) - min(step_used_list), min(step_used_list) // 10)
 
-        tx_result_escape_room = self._escape(self.test2_wallet)
-        self.assertTrue('status' in tx_result_escape_room)
-        self.assertEqual(1, tx_result_escape_room['status'])
+        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
+        self.assertEqual(996, len(result_show_game_room_list))
+        for owner in (owners[0], owners[500], owners[-1], owners[1]):
+            self.assertFalse(any(room.startswith(owner.get_address()) for room in result_show_game_room_list))
 
-        tx_result_join_room = self._join_room(self.test3_wallet, self.test1_wallet.get_address())
-        self.assertTrue('status' in tx_result_join_room)
+        # The rooms moved by the crash are still reachable through the index
+        tx_result_join_room = self._join_room(self.test2_wallet, owners[-2].get_address())
         self.assertEqual(1, tx_result_join_room['status'])
 
-        tx_result_escape_room = self._escape(self.test3_wallet)
-        self.assertTrue('status' in tx_result_escape_room)
-        self.assertEqual(1, tx_result_escape_room['status'])
-
-        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
-        self.assertEqual(1, len(result_show_game_room_list))
+        tx_result_escape = self._escape(self.test2_wallet)
+        self.assertEqual(1, tx_result_escape['status'])
 
-        tx_result_escape_room = self._escape(self.test1_wallet)
-        self.assertTrue('status' in tx_result_escape_room)
-        self.assertEqual(1, tx_result_escape_room['status'])
+        tx_result_escape = self._escape(owners[-2])
+        self.assertEqual(1, tx_result_escape['status'])
 
         result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
-        self.assertEqual(0, len(result_show_game_room_list))
+        self.assertEqual(995, len(result_show_game_room_list))
 
-    def test_scenario3(self):
+    def test_get_game_room_list(self):
         self._create_room(self.test1_wallet)
         self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self._create_room(self.test3_wallet, 5)
+
+        result_get_game_room_list = self._get_game_room_list(self.test1_wallet)
+        self.assertEqual(2, len(result_get_game_room_list['rooms']))
+        self.assertEqual('-0x1', result_get_game_room_list['next'])
+
+        # Lower prize tiers come first
+        result_get_game_room_list = self._get_game_room_list(self.test1_wallet, {'_limit': '0x1'})
+        self.assertEqual(1, len(result_get_game_room_list['rooms']))
+        self.assertEqual(self.test3_wallet.get_address(), result_get_game_room_list['rooms'][0]['game_room_id'])
+        self.assertEqual('0x1', result_get_game_room_list['rooms'][0]['participants'])
+        self.assertEqual('0x1', result_get_game_room_list['next'])
+
+        result_get_game_room_list = self._get_game_room_list(self.test1_wallet, {'_offset': '0x1'})
+        self.assertEqual(1, len(result_get_game_room_list['rooms']))
+        self.assertEqual(self.test1_wallet.get_address(), result_get_game_room_list['rooms'][0]['game_room_id'])
+        self.assertEqual('0x2', result_get_game_room_list['rooms'][0]['participants'])
+
+        result_get_game_room_list = self._get_game_room_list(self.test1_wallet, {'_vacantOnly': '0x1'})
+        self.assertEqual(1, len(result_get_game_room_list['rooms']))
+        self.assertEqual(self.test3_wallet.get_address(), result_get_game_room_list['rooms'][0]['game_room_id'])
+
+        result_get_game_room_list = self._get_game_room_list(self.test1_wallet, {'_prizeMin': '0x6', '_prizeMax': '0xa'})
+        self.assertEqual(1, len(result_get_game_room_list['rooms']))
+        self.assertEqual(self.test1_wallet.get_address(), result_get_game_room_list['rooms'][0]['game_room_id'])
+
+        self._toggle_ready(self.test1_wallet)
+        self._toggle_ready(self.test2_wallet)
+        self._game_start(self.test1_wallet)
+
+        result_get_game_room_list = self._get_game_room_list(self.test1_wallet, {'_active': '0x1'})
+        self.assertEqual(1, len(result_get_game_room_list['rooms']))
+        self.assertEqual('0x1', result_get_game_room_list['rooms'][0]['active'])
+
+    def test_embedded_ledger(self):
+        # Deploy SampleGame without Chip SCORE. The chip ledger is kept in SampleGame itself
+        params_for_sample_game = {
+            '_decimals': self.decimals
+        }
+        self._sample_game_score_address = self._deploy_score(params=params_for_sample_game)['scoreAddress']
 
-        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
-        print(result_show_game_room_list)
+        for wallet in [self.test1_wallet, self.test2_wallet]:
+            tx_result_mint = self._mint_chips(_from=wallet, amount=11)
+            self.assertEqual(1, tx_result_mint['status'])
+            self.assertEqual('0xb', self._get_chip_balance(wallet))
 
-        tx_result_toggle_ready = self._toggle_ready(self.test1_wallet)
-        self.assertTrue('status' in tx_result_toggle_ready)
-        self.assertEqual(1, tx_result_toggle_ready['status'])
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self._toggle_ready(self.test1_wallet)
+        self._toggle_ready(self.test2_wallet)
 
         tx_result_game_start = self._game_start(self.test1_wallet)
-        self.assertTrue('status' in tx_result_game_start)
-        self.assertEqual(0, tx_result_game_start['status'])
+        self.assertEqual(1, tx_result_game_start['status'])
+        self.assertEqual('0x1', self._get_chip_balance(self.test1_wallet))
 
-        tx_result_toggle_ready = self._toggle_ready(self.test2_wallet)
-        self.assertTrue('status' in tx_result_toggle_ready)
-        self.assertEqual(1, tx_result_toggle_ready['status'])
+        self._fix(self.test1_wallet)
+        tx_result_fix = self._fix(self.test2_wallet)
+        self.assertEqual(1, tx_result_fix['status'])
 
-        tx_result_hit = self._hit(self.test1_wallet)
-        self.assertTrue('status' in tx_result_hit)
-        self.assertEqual(0, tx_result_hit['status'])
+        # Draw, because nobody has a card on hand
+        self.assertEqual('0xb', self._get_chip_balance(self.test1_wallet))
+        self.assertEqual('0xb', self._get_chip_balance(self.test2_wallet))
 
-        tx_result_game_start = self._game_start(self.test2_wallet)
-        self.assertTrue('status' in tx_result_game_start)
-        self.assertEqual(0, tx_result_game_start['status'])
+        tx_result_exchange = self._exchange(self.test1_wallet, 11)
+        self.assertEqual(1, tx_result_exchange['status'])
+        self.assertEqual('0x0', self._get_chip_balance(self.test1_wallet))
 
-        tx_result_game_start = self._game_start(self.test1_wallet)
-        self.assertTrue('status' in tx_result_game_start)
-        self.assertEqual(1, tx_result_game_start['status'])
-        print(tx_result_game_start)
+    def test_finalize_expired(self):
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self._toggle_ready(self.test1_wallet)
+        self._toggle_ready(self.test2_wallet)
+        self._game_start(self.test1_wallet)
 
-        tx_result_game_start = self._game_start(self.test1_wallet)
-        self.assertTrue('status' in tx_result_game_start)
-        self.assertEqual(0, tx_result_game_start['status'])
+        # The game is not expired yet
+        tx_result_finalize_expired = self._finalize_expired(self.test3_wallet, 10)
+        self.assertEqual(1, tx_result_finalize_expired['status'])
+        self.assertEqual(1, len(self._get_game_room_list(self.test1_wallet, {'_active': '0x1'})['rooms']))
 
-        tx_result_escape = self._escape(self.test1_wallet)
-        self.assertTrue('status' in tx_result_escape)
+        tx_result_escape = self._escape(self.test2_wallet)
         self.assertEqual(0, tx_result_escape['status'])
 
-        tx_result_hit = self._hit(self.test1_wallet)
-        self.assertTrue('status' in tx_result_hit)
-        self.assertEqual(1, tx_result_hit['status'])
+        # Every transaction makes a new block
+        for _ in range(61):
+            self._transfer(self.test3_wallet.get_address())
 
-        result_show_mine = self._show_mine(self.test1_wallet)
-        print(result_show_mine)
+        tx_result_finalize_expired = self._finalize_expired(self.test3_wallet, 10)
+        self.assertEqual(1, tx_result_finalize_expired['status'])
+        self.assertEqual(0, len(self._get_game_room_list(self.test1_wallet, {'_active': '0x1'})['rooms']))
+        self.assertEqual(1, len(self._get_results(self.test1_wallet)))
 
-        tx_result_hit = self._hit(self.test2_wallet)
-        self.assertTrue('status' in tx_result_hit)
-        self.assertEqual(1, tx_result_hit['status'])
+        # Draw, because nobody has a card on hand
+        tx_result_escape = self._escape(self.test2_wallet)
+        self.assertEqual(1, tx_result_escape['status'])
+        self.assertEqual("", self._show_mine(self.test2_wallet))
 
-        result_show_mine = self._show_mine(self.test2_wallet)
-        print(result_show_mine)
+    def test_queue_for_match(self):
+        tx_result_queue_for_match = self._queue_for_match(self.test1_wallet)
+        self.assertEqual(1, tx_result_queue_for_match['status'])
 
-        tx_result_fix = self._fix(self.test1_wallet)
-        self.assertTrue('status' in tx_result_fix)
-        self.assertEqual(1, tx_result_fix['status'])
+        # Can not wait twice
+        tx_result_queue_for_match = self._queue_for_match(self.test1_wallet)
+        self.assertEqual(0, tx_result_queue_for_match['status'])
 
-        tx_result_fix = self._fix(self.test2_wallet)
-        self.assertTrue('status' in tx_result_fix)
-        self.assertEqual(1, tx_result_fix['status'])
+        # Waiting for another prize per game
+        tx_result_queue_for_match = self._queue_for_match(self.test2_wallet, 5)
+        self.assertEqual(1, tx_result_queue_for_match['status'])
+        self.assertEqual(0, len(self._get_game_room_list(self.test1_wallet)['rooms']))
 
-        result_get_results = self._get_results(self.test1_wallet)
-        print(result_get_results)
+        tx_result_queue_for_match = self._queue_for_match(self.test3_wallet)
+        self.assertEqual(1, tx_result_queue_for_match['status'])
 
-        result_show_game_room_list = self._show_game_room_list(self.test1_wallet)
-        print(result_show_game_room_list)
-
-    def test_scenario4(self):
-        self._create_room(self.test1_wallet)
-        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
-
-        tx_result_toggle_ready = self._toggle_ready(self.test1_wallet)
-        self.assertTrue('status' in tx_result_toggle_ready)
-        self.assertEqual(1, tx_result_toggle_ready['status'])
+        # The waiting player becomes the owner of game room
+        rooms = self._get_game_room_list(self.test1_wallet)['rooms']
+        self.assertEqual(1, len(rooms))
+        self.assertEqual(str(self.test1_wallet.get_address()), rooms[0]['game_room_id'])
+        self.assertEqual('0x2', rooms[0]['participants'])
 
+        self._toggle_ready(self.test1_wallet)
+        self._toggle_ready(self.test3_wallet)
         tx_result_game_start = self._game_start(self.test1_wallet)
-        self.assertTrue('status' in tx_result_game_start)
-        self.assertEqual(0, tx_result_game_start['status'])
+        self.assertEqual(1, tx_result_game_start['status'])
 
-        tx_result_toggle_ready = self._toggle_ready(self.test2_wallet)
-        self.assertTrue('status' in tx_result_toggle_ready)
-        self.assertEqual(1, tx_result_toggle_ready['status'])
+    def test_three_player_room(self):
+        tx_result_create_room = self._create_room(self.test1_wallet, _seats=8)
+        self.assertEqual(0, tx_result_create_room['status'])
 
-        tx_result_hit = self._hit(self.test1_wallet)
-        self.assertTrue('status' in tx_result_hit)
-        self.assertEqual(0, tx_result_hit['status'])
+        tx_result_create_room = self._create_room(self.test1_wallet, _seats=3)
+        self.assertEqual(1, tx_result_create_room['status'])
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self.assertEqual(1, len(self._get_game_room_list(self.test1_wallet, {'_vacantOnly': '0x1'})['rooms']))
 
-        tx_result_game_start = self._game_start(self.test2_wallet)
-        self.assertTrue('status' in tx_result_game_start)
-        self.assertEqual(0, tx_result_game_start['status'])
+        tx_result_join_room = self._join_room(self.test3_wallet, self.test1_wallet.get_address())
+        self.assertEqual(1, tx_result_join_room['status'])
+        rooms = self._get_game_room_list(self.test1_wallet)['rooms']
+        self.assertEqual('0x3', rooms[0]['seats'])
+        self.assertEqual('0x3', rooms[0]['participants'])
+        self.assertEqual(0, len(self._get_game_room_list(self.test1_wallet, {'_vacantOnly': '0x1'})['rooms']))
 
+        for wallet in (self.test1_wallet, self.test2_wallet, self.test3_wallet):
+            self._toggle_ready(wallet)
         tx_result_game_start = self._game_start(self.test1_wallet)
-        self.assertTrue('status' in tx_result_game_start)
         self.assertEqual(1, tx_result_game_start['status'])
 
-        tx_result_escape = self._escape(self.test1_wallet)
-        self.assertTrue('status' in tx_result_escape)
-        self.assertEqual(0, tx_result_escape['status'])
+        # The game goes on until all participants fix their hands
+        self._hit(self.test1_wallet)
+        self._fix(self.test1_wallet)
+        self._fix(self.test2_wallet)
+        self.assertEqual(0, len(self._get_results(self.test1_wallet)))
+        self._fix(self.test3_wallet)
+        self.assertEqual(1, len(self._get_results(self.test1_wallet)))
 
-        for _ in range(5):
-            tx_result_hit = self._hit(self.test1_wallet)
-            self.assertTrue('status' in tx_result_hit)
-            self.assertEqual(1, tx_result_hit['status'])
+        # The pot of 30 chips is paid out to the winner without loss
+        balances = [int(self._get_chip_balance(wallet), 16) for wallet in (self.test1_wallet, self.test2_wallet, self.test3_wallet)]
+        self.assertEqual(33, sum(balances))
 
-            result_show_mine = self._show_mine(self.test1_wallet)
-            if json_loads(result_show_mine)['value'] > 21:
-                break
+    def test_get_results_for(self):
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        for _ in range(3):
+            self._toggle_ready(self.test1_wallet)
+            self._toggle_ready(self.test2_wallet)
+            self._game_start(self.test1_wallet)
+            self._fix(self.test1_wallet)
+            self._fix(self.test2_wallet)
+
+        result_get_results_for = self._get_results_for(self.test1_wallet, self.test2_wallet.get_address(), {'_limit': '0x2'})
+        self.assertEqual(2, len(result_get_results_for['results']))
+        self.assertEqual('0x2', result_get_results_for['next'])
+        # From the newest one
+        self.assertEqual('0x3', result_get_results_for['results'][0]['result_id'])
+        self.assertEqual(str(self.test1_wallet.get_address()), result_get_results_for['results'][0]['game_room_id'])
+        # Draw, because nobody has a card on hand
+        self.assertEqual(['0xa', '0xa'], [player['payout'] for player in result_get_results_for['results'][0]['players']])
+
+        result_get_results_for = self._get_results_for(self.test1_wallet, self.test2_wallet.get_address(), {'_offset': '0x2'})
+        self.assertEqual(1, len(result_get_results_for['results']))
+        self.assertEqual('-0x1', result_get_results_for['next'])
+
+        result_get_results_for = self._get_results_for(self.test1_wallet, self.test3_wallet.get_address())
+        self.assertEqual(0, len(result_get_results_for['results']))
+
+    def test_prune_results(self):
+        # Only the owner of SCORE can set the retention
+        tx_result_set_result_retention = self._set_result_retention(self.test2_wallet, 2)
+        self.assertEqual(0, tx_result_set_result_retention['status'])
+        tx_result_set_result_retention = self._set_result_retention(self.test1_wallet, 2)
+        self.assertEqual(1, tx_result_set_result_retention['status'])
 
-            tx_result_hit = self._hit(self.test2_wallet)
-            self.assertTrue('status' in tx_result_hit)
-            self.assertEqual(1, tx_result_hit['status'])
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        for _ in range(4):
+            self._toggle_ready(self.test1_wallet)
+            self._toggle_ready(self.test2_wallet)
+            self._game_start(self.test1_wallet)
+            self._fix(self.test1_wallet)
+            tx_result_fix = self._fix(self.test2_wallet)
+
+        # The full record of result is kept in the event log
+        self.assertTrue(any(event_log['indexed'][0].startswith('GameResult(') for event_log in tx_result_fix['eventLogs']))
+
+        # Only the latest 2 results are kept
+        self.assertEqual(2, len(self._get_results(self.test1_wallet)))
+        result_get_results_for = self._get_results_for(self.test1_wallet, self.test1_wallet.get_address())
+        self.assertEqual(['0x4', '0x3'], [result['result_id'] for result in result_get_results_for['results']])
+        self.assertEqual('-0x1', result_get_results_for['next'])
+
+    def test_escape_resets_ready(self):
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self._toggle_ready(self.test2_wallet)
+        self._escape(self.test2_wallet)
 
-            result_show_mine = self._show_mine(self.test2_wallet)
-            if json_loads(result_show_mine)['value'] > 21:
-                break
+        # The ready status is not kept after escaping
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self._toggle_ready(self.test1_wallet)
+        tx_result_game_start = self._game_start(self.test1_wallet)
+        self.assertEqual(0, tx_result_game_start['status'])
 
-        result_get_results = self._get_results(self.test2_wallet)
-        print(result_get_results)
+        self._toggle_ready(self.test2_wallet)
+        tx_result_game_start = self._game_start(self.test1_wallet)
+        self.assertEqual(1, tx_result_game_start['status'])
 
-        result_show_game_room_list = self._show_game_room_list(self.test2_wallet)
-        print(result_show_game_room_list)
+    def test_get_game_state(self):
+        self._create_room(self.test1_wallet)
+        self._join_room(self.test2_wallet, self.test1_wallet.get_address())
+        self._toggle_ready(self.test1_wallet)
 
-    def test_scenario5(self):
-        tx_result_exchange = self._exchange(self.test1_wallet, 10)
-        self.assertTrue('status' in tx_result_exchange)
-        self.assertEqual(1, tx_result_exchange['status'])
+        result_get_game_state = self._get_game_state(self.test1_wallet, self.test1_wallet.get_address())
+        self.assertEqual('0x0', result_get_game_state['active'])
+        self.assertEqual('-0x1', result_get_game_state['blocks_until_expiry'])
+        self.assertEqual(['0x1', '0x0'], [player['ready'] for player in result_get_game_state['players']])
 
-        tx_result_exchange = self._exchange(self.test1_wallet, 10)
-        self.assertTrue('status' in tx_result_exchange)
-        self.assertEqual(0, tx_result_exchange['status'])
+        self._toggle_ready(self.test2_wallet)
+        self._game_start(self.test1_wallet)
+        self._hit(self.test2_wallet)
 
-        tx_result_create_room = self._create_room(self.test1_wallet)
-        self.assertTrue('status' in tx_result_create_room)
-        self.assertEqual(0, tx_result_create_room['status'])
+        result_get_game_state = self._get_game_state(self.test2_wallet, self.test1_wallet.get_address())
+        self.assertEqual('0x1', result_get_game_state['active'])
+        self.assertEqual('0xa', result_get_game_state['prize_per_game'])
+        self.assertEqual(['0x0', '0x1'], [player['cards'] for player in result_get_game_state['players']])
+        self.assertEqual(1, len(result_get_game_state['my_hand']['cards']))
+        self.assertTrue(0 < int(result_get_game_state['blocks_until_expiry'], 16) <= 61)
 
-        tx_result_create_room = self._create_room(self.test2_wallet)
-        self.assertTrue('status' in tx_result_create_room)
-        self.assertEqual(1, tx_result_create_room['status'])
+        # The hand is returned only to the participant
+        result_get_game_state = self._get_game_state(self.test3_wallet, self.test1_wallet.get_address())
+        self.assertEqual({}, result_get_game_state['my_hand'])
 
-        tx_result_join_room = self._join_room(self.test1_wallet, self.test2_wallet.get_address())
-        self.assertTrue('status' in tx_result_join_room)
-        self.assertEqual(0, tx_result_join_room['status'])
+    def test_multicall(self):
+        self._create_room(self.test1_wallet)
+        wallets = (self.test1_wallet, self.test2_wallet, self.test3_wallet)
+
+        result_multicall = self._multicall(self.test1_wallet, self._sample_game_score_address, [
+            {'method': 'getChipBalance'},
+            {'method': 'showMine'},
+            {'method': 'getGameState', 'params': {'_gameRoomId': str(self.test1_wallet.get_address())}},
+            {'method': 'getGameRoomList', 'params': {'_vacantOnly': '0x1'}}
+        ])
+        self.assertEqual(4, len(result_multicall))
+        self.assertEqual('0xb', result_multicall[0])
+        self.assertEqual(str(self.test1_wallet.get_address()), result_multicall[2]['owner'])
+        self.assertEqual(1, len(result_multicall[3]['rooms']))
+
+        result_multicall = self._multicall(self.test1_wallet, self._chip_score_address, [
+            {'method': 'balanceOf', 'params': {'_owner': str(wallet.get_address())}} for wallet in wallets
+        ])
+        self.assertEqual(['0xb', '0xb', '0xb'], result_multicall)
+
+        # Only the readonly methods are allowed
+        with self.assertRaises(Exception):
+            self._multicall(self.test1_wallet, self._sample_game_score_address, [{'method': 'escape'}])